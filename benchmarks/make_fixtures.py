@@ -0,0 +1,267 @@
+"""
+Writes the API responses served by weatherpy.mockserver, which the
+benchmarks and offline tests run against.
+
+The weather underground API has been retired, so the fixtures are
+generated in the exact shape of its recorded responses, one file per
+feature, from a fixed random seed so every run produces the same bytes.
+openmeteo.json is an open-meteo forecast with every block weatherpy uses.
+
+    python benchmarks/make_fixtures.py
+"""
+import os
+import sys
+import json
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from weatherpy.mockserver import FIXTURE_DIR
+
+CONDITIONS = ["Clear", "Partly Cloudy", "Mostly Cloudy", "Overcast", "Fog",
+              "Chance of Rain", "Rain", "Chance of a Thunderstorm",
+              "Thunderstorm", "Chance of Snow", "Snow Showers"]
+DIRECTIONS = ["North", "NNE", "NE", "ENE", "East", "ESE", "SE", "SSE", "South",
+              "SSW", "SW", "WSW", "West", "WNW", "NW", "NNW", "Variable"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday",
+            "Saturday", "Sunday"]
+
+# Saturday May 9 2015, 8 PM UTC
+START = 1431201600
+# Eastern daylight time, in seconds
+UTC_OFFSET = -4 * 3600
+
+
+def response(*features):
+    return {
+        "version": "0.1",
+        "termsofService": "http://www.wunderground.com/weather/api/d/terms.html",
+        "features": dict((feature, 1) for feature in features),
+    }
+
+
+def to_celsius(fahrenheit):
+    return int(round((fahrenheit - 32) * 5.0 / 9))
+
+
+def conditions():
+    return {
+        "response": response("conditions"),
+        "current_observation": {
+            "image": {"url": "http://icons.wxug.com/graphics/wu2/logo_130x80.png",
+                      "title": "Weather Underground", "link": "http://www.wunderground.com"},
+            "display_location": {
+                "full": "Ann Arbor, MI", "city": "Ann Arbor", "state": "MI",
+                "state_name": "Michigan", "country": "US", "country_iso3166": "US",
+                "zip": "48104", "magic": "1", "wmo": "99999", "latitude": "42.27000046",
+                "longitude": "-83.73000336", "elevation": "256.00000000",
+            },
+            "observation_location": {
+                "full": "Burns Park, Ann Arbor, Michigan", "city": "Burns Park, Ann Arbor",
+                "state": "Michigan", "country": "US", "country_iso3166": "US",
+                "latitude": "42.264965", "longitude": "-83.727211", "elevation": "873 ft",
+            },
+            "estimated": {},
+            "station_id": "KMIANNAR22",
+            "observation_time": "Last Updated on May 9, 7:09 PM EDT",
+            "observation_time_rfc822": "Sat, 09 May 2015 19:09:37 -0400",
+            "observation_epoch": "1431212977",
+            "local_time_rfc822": "Sat, 09 May 2015 19:09:47 -0400",
+            "local_epoch": "1431212987", "local_tz_short": "EDT",
+            "local_tz_long": "America/New_York", "local_tz_offset": "-0400",
+            "weather": "Clear", "temperature_string": "61.3 F (16.3 C)",
+            "temp_f": 61.3, "temp_c": 16.3, "relative_humidity": "59%",
+            "wind_string": "Calm", "wind_dir": "North", "wind_degrees": 0,
+            "wind_mph": 0, "wind_gust_mph": 0, "wind_kph": 0, "wind_gust_kph": 0,
+            "pressure_mb": "1016", "pressure_in": "30.01", "pressure_trend": "0",
+            "dewpoint_string": "47 F (8 C)", "dewpoint_f": 47, "dewpoint_c": 8,
+            "heat_index_string": "NA", "heat_index_f": "NA", "heat_index_c": "NA",
+            "windchill_string": "NA", "windchill_f": "NA", "windchill_c": "NA",
+            "feelslike_string": "61.3 F (16.3 C)", "feelslike_f": "61.3", "feelslike_c": "16.3",
+            "visibility_mi": "10.0", "visibility_km": "16.1", "solarradiation": "--",
+            "UV": "0", "precip_1hr_string": "0.00 in ( 0 mm)", "precip_1hr_in": "0.00",
+            "precip_1hr_metric": " 0", "precip_today_string": "0.00 in (0 mm)",
+            "precip_today_in": "0.00", "precip_today_metric": "0", "icon": "clear",
+            "icon_url": "http://icons.wxug.com/i/c/k/nt_clear.gif",
+            "forecast_url": "http://www.wunderground.com/US/MI/Ann_Arbor.html",
+            "history_url": "http://www.wunderground.com/weatherstation/WXDailyHistory.asp?ID=KMIANNAR22",
+            "ob_url": "http://www.wunderground.com/cgi-bin/findweather/getForecast?query=42.264965,-83.727211",
+        },
+    }
+
+
+def alerts():
+    return {
+        "response": response("alerts"),
+        "query_zone": "083",
+        "alerts": [{
+            "type": "SVR", "description": "Severe Thunderstorm Warning",
+            "date": "7:00 PM EDT on May 9, 2015", "date_epoch": "1431212400",
+            "expires": "8:00 PM EDT on May 9, 2015", "expires_epoch": "1431216000",
+            "message": ("\n...Severe thunderstorm warning for Washtenaw county until 8 PM EDT...\n\n"
+                        "At 703 PM EDT, a severe thunderstorm was located near Ann Arbor, moving "
+                        "east at 35 mph.\n\nHazard...60 mph wind gusts and quarter size hail.\n"),
+            "phenomena": "SV", "significance": "W",
+        }],
+    }
+
+
+def hourly(rng, hours=36):
+    items = []
+    for offset in range(hours):
+        epoch = START + offset * 3600
+        tm = time.gmtime(epoch)
+        hour = tm.tm_hour
+        temp = rng.randint(40, 90)
+        weekday = WEEKDAYS[tm.tm_wday]
+        items.append({
+            "FCTTIME": {
+                "hour": str(hour), "hour_padded": "%02d" % hour, "min": "00",
+                "min_unpadded": "0", "sec": "0", "year": str(tm.tm_year),
+                "mon": str(tm.tm_mon), "mon_padded": "%02d" % tm.tm_mon,
+                "mon_abbrev": MONTHS[tm.tm_mon - 1][:3], "mday": str(tm.tm_mday),
+                "mday_padded": "%02d" % tm.tm_mday, "yday": str(tm.tm_yday - 1),
+                "isdst": "1", "epoch": str(epoch),
+                "pretty": "%d:00 %s EDT on %s %d, %d" % ((hour % 12) or 12, "AM" if hour < 12 else "PM",
+                                                          MONTHS[tm.tm_mon - 1], tm.tm_mday, tm.tm_year),
+                "civil": "%d:00 %s" % ((hour % 12) or 12, "AM" if hour < 12 else "PM"),
+                "month_name": MONTHS[tm.tm_mon - 1], "month_name_abbrev": MONTHS[tm.tm_mon - 1][:3],
+                "weekday_name": weekday, "weekday_name_night": weekday + " Night",
+                "weekday_name_abbrev": weekday[:3], "weekday_name_unlang": weekday,
+                "weekday_name_night_unlang": weekday + " Night",
+                "ampm": "AM" if hour < 12 else "PM", "tz": "", "age": "", "UTCDATE": "",
+            },
+            "temp": {"english": str(temp), "metric": str(to_celsius(temp))},
+            "dewpoint": {"english": str(temp - 10), "metric": str(to_celsius(temp - 10))},
+            "condition": rng.choice(CONDITIONS), "icon": "partlycloudy",
+            "icon_url": "http://icons.wxug.com/i/c/k/partlycloudy.gif",
+            "fctcode": "2", "sky": str(rng.randint(0, 100)),
+            "wspd": {"english": str(rng.randint(0, 20)), "metric": str(rng.randint(0, 32))},
+            "wdir": {"dir": rng.choice(DIRECTIONS), "degrees": str(rng.randint(0, 359))},
+            "wx": "Partly Cloudy", "uvi": str(rng.randint(0, 9)),
+            "humidity": str(rng.randint(20, 99)),
+            "windchill": {"english": "-9999", "metric": "-9999"},
+            "heatindex": {"english": "-9999", "metric": "-9999"},
+            "feelslike": {"english": str(temp), "metric": str(to_celsius(temp))},
+            "qpf": {"english": "0.0", "metric": "0"}, "snow": {"english": "0.0", "metric": "0"},
+            "pop": str(rng.randint(0, 100)),
+            "mslp": {"english": "30.04", "metric": "1017"},
+        })
+    return {"response": response("hourly"), "hourly_forecast": items}
+
+
+def forecast(rng, days, feature):
+    text_days = []
+    simple_days = []
+    for offset in range(days):
+        epoch = START + offset * 86400 + 3600 * 3
+        tm = time.gmtime(epoch)
+        weekday = WEEKDAYS[tm.tm_wday]
+        high = rng.randint(50, 95)
+        low = high - rng.randint(5, 25)
+        wind = rng.randint(0, 20)
+        for night in (False, True):
+            text_days.append({
+                "period": offset * 2 + night, "icon": "chancetstorms",
+                "icon_url": "http://icons.wxug.com/i/c/k/chancetstorms.gif",
+                "title": weekday + (" Night" if night else ""),
+                "fcttext": ("Partly cloudy with a chance of thunderstorms. High around %dF. "
+                            "Winds SSW at 10 to 15 mph. Chance of rain 40%%." % high),
+                "fcttext_metric": ("Partly cloudy with a chance of thunderstorms. High %dC. "
+                                   "Winds SSW at 15 to 25 km/h. Chance of rain 40%%." % to_celsius(high)),
+                "pop": str(rng.randint(0, 100)),
+            })
+        simple_days.append({
+            "date": {
+                "epoch": str(epoch), "pretty": "7:00 PM EDT on %s %d, %d" % (MONTHS[tm.tm_mon - 1], tm.tm_mday, tm.tm_year),
+                "day": tm.tm_mday, "month": tm.tm_mon, "year": tm.tm_year,
+                "yday": tm.tm_yday - 1, "hour": 19, "min": "00", "sec": 0, "isdst": "1",
+                "monthname": MONTHS[tm.tm_mon - 1], "monthname_short": MONTHS[tm.tm_mon - 1][:3],
+                "weekday_short": weekday[:3], "weekday": weekday, "ampm": "PM",
+                "tz_short": "EDT", "tz_long": "America/New_York",
+            },
+            "period": offset + 1,
+            "high": {"fahrenheit": str(high), "celsius": str(to_celsius(high))},
+            "low": {"fahrenheit": str(low), "celsius": str(to_celsius(low))},
+            "conditions": rng.choice(CONDITIONS), "icon": "chancetstorms",
+            "icon_url": "http://icons.wxug.com/i/c/k/chancetstorms.gif", "skyicon": "",
+            "pop": rng.randint(0, 100),
+            "qpf_allday": {"in": 0.12, "mm": 3}, "qpf_day": {"in": 0.1, "mm": 3},
+            "qpf_night": {"in": 0.02, "mm": 1}, "snow_allday": {"in": 0.0, "cm": 0.0},
+            "snow_day": {"in": 0.0, "cm": 0.0}, "snow_night": {"in": 0.0, "cm": 0.0},
+            "maxwind": {"mph": wind + 5, "kph": int((wind + 5) * 1.609), "dir": rng.choice(DIRECTIONS), "degrees": 200},
+            "avewind": {"mph": wind, "kph": int(wind * 1.609), "dir": rng.choice(DIRECTIONS), "degrees": 200},
+            "avehumidity": rng.randint(20, 99), "maxhumidity": 0, "minhumidity": 0,
+        })
+    return {
+        "response": response(feature),
+        "forecast": {
+            "txt_forecast": {"date": "7:22 PM EDT", "forecastday": text_days},
+            "simpleforecast": {"forecastday": simple_days},
+        },
+    }
+
+
+def openmeteo(rng, hours=36, days=10):
+    hourly_times = [START + offset * 3600 for offset in range(hours)]
+    # Local midnights, starting with the day START falls on
+    first_day = (START + UTC_OFFSET) // 86400 * 86400 - UTC_OFFSET
+    daily_times = [first_day + offset * 86400 for offset in range(days)]
+    highs = [rng.randint(50, 95) + rng.randint(0, 9) / 10.0 for _ in range(days)]
+    return {
+        "latitude": 42.27, "longitude": -83.73, "generationtime_ms": 0.05,
+        "utc_offset_seconds": UTC_OFFSET, "timezone": "America/New_York",
+        "timezone_abbreviation": "EDT", "elevation": 256.0,
+        "current_units": {"time": "unixtime", "interval": "seconds", "temperature_2m": "°F",
+                          "relative_humidity_2m": "%", "weather_code": "wmo code",
+                          "wind_speed_10m": "mp/h", "wind_direction_10m": "°"},
+        "current": {"time": START, "interval": 900, "temperature_2m": 61.3,
+                    "relative_humidity_2m": 59, "weather_code": 0,
+                    "wind_speed_10m": 4.2, "wind_direction_10m": 315},
+        "hourly_units": {"time": "unixtime", "temperature_2m": "°F",
+                         "precipitation_probability": "%", "weather_code": "wmo code"},
+        "hourly": {
+            "time": hourly_times,
+            "temperature_2m": [rng.randint(400, 900) / 10.0 for _ in hourly_times],
+            "precipitation_probability": [rng.randint(0, 100) for _ in hourly_times],
+            "weather_code": [rng.choice([0, 1, 2, 3, 45, 61, 63, 80, 95]) for _ in hourly_times],
+        },
+        "daily_units": {"time": "unixtime", "weather_code": "wmo code",
+                        "temperature_2m_max": "°F", "temperature_2m_min": "°F",
+                        "precipitation_probability_max": "%", "wind_speed_10m_max": "mp/h",
+                        "wind_direction_10m_dominant": "°", "relative_humidity_2m_mean": "%"},
+        "daily": {
+            "time": daily_times,
+            "weather_code": [rng.choice([0, 1, 2, 3, 61, 80, 95]) for _ in daily_times],
+            "temperature_2m_max": highs,
+            "temperature_2m_min": [high - rng.randint(5, 25) for high in highs],
+            "precipitation_probability_max": [rng.randint(0, 100) for _ in daily_times],
+            "wind_speed_10m_max": [rng.randint(0, 200) / 10.0 for _ in daily_times],
+            "wind_direction_10m_dominant": [rng.randint(0, 359) for _ in daily_times],
+            "relative_humidity_2m_mean": [rng.randint(20, 99) for _ in daily_times],
+        },
+    }
+
+
+def main():
+    rng = random.Random(2015)
+    fixtures = {
+        "conditions": conditions(),
+        "alerts": alerts(),
+        "hourly": hourly(rng),
+        "forecast": forecast(rng, 4, "forecast"),
+        "forecast10day": forecast(rng, 10, "forecast10day"),
+    }
+    fixtures["openmeteo"] = openmeteo(rng)
+    if not os.path.exists(FIXTURE_DIR):
+        os.makedirs(FIXTURE_DIR)
+    for name, data in fixtures.items():
+        with open(os.path.join(FIXTURE_DIR, name + ".json"), "w") as fixture:
+            json.dump(data, fixture, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Times weatherpy's fetch, parse and render hot paths.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare results.json
+
+Results are written as JSON with the per-call timings of every benchmark.
+With --compare, benchmarks whose median got slower than the given run by
+more than --threshold are reported and the exit status is 1.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import json
+import shutil
+import timeit
+import platform
+import argparse
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+# Keep the benchmarks away from the user's .weatherrc and response cache,
+# this has to happen before weatherpy is imported
+HOME = tempfile.mkdtemp(prefix="weatherpy-bench-")
+os.environ['HOME'] = HOME
+os.environ['XDG_CACHE_HOME'] = os.path.join(HOME, ".cache")
+
+import weatherpy.weather as weather
+from weatherpy.mockserver import MockServer, load_fixtures, merge_features
+from weatherpy import formatting
+from weatherpy.records import normalize_response
+from weatherpy.cache import ResponseCache
+
+# Minimum seconds spent in each timed repeat
+MIN_REPEAT_TIME = 0.05
+REPEATS = 5
+# Locations fetched by each run of the fleet benchmarks
+FLEET_SIZE = 256
+
+
+class NullOut(object):
+    def write(self, string):
+        pass
+
+
+def measure(func, repeats=REPEATS):
+    """
+    Returns per-call timings of func, calling it enough times per repeat
+    for the clock's resolution not to matter.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= MIN_REPEAT_TIME:
+            break
+        number *= 10 if elapsed < MIN_REPEAT_TIME / 10 else 2
+
+    times = sorted(t / number for t in timer.repeat(repeats, number))
+    mean = sum(times) / len(times)
+    return {
+        'number': number,
+        'min': times[0],
+        'median': times[len(times) // 2],
+        'mean': mean,
+        'stdev': (sum((t - mean) ** 2 for t in times) / len(times)) ** 0.5,
+    }
+
+
+def make_args(argv):
+    return weather.parse_args(argv + ['--no-daemon'])
+
+
+def bench_print_weather_data(fixtures):
+    out = NullOut()
+    cases = {
+        'now': (['-n'], ('conditions', 'alerts')),
+        'hourly': (['-o'], ('hourly',)),
+        'extended': (['-e'], ('forecast10day',)),
+        'all': (['-anoe'], ('conditions', 'alerts', 'hourly', 'forecast10day')),
+    }
+    for name, (argv, features) in sorted(cases.items()):
+        args = make_args(argv)
+        settings = weather.Settings(args)
+        body = merge_features(fixtures, features)
+        yield ('print_weather_data[%s]' % name,
+               lambda body=body, args=args, settings=settings:
+               weather.print_weather_data(body, args, settings, out))
+
+
+def bench_decode(fixtures):
+    """
+    Decodes and normalizes response bodies, and unpacks the records the
+    cache keeps for them
+    """
+    from weatherpy.packing import unpack_response
+    from weatherpy.providers import Wunderground
+
+    provider = Wunderground()
+    for name in ('hourly', 'forecast10day'):
+        body = merge_features(fixtures, (name,))
+        records = weather.pack_records(provider, body)
+        yield ('decode[%s json]' % name,
+               lambda body=body: provider.normalize(weather.decode_response(body)))
+        yield ('decode[%s packed]' % name,
+               lambda records=records: unpack_response(records))
+
+
+def bench_print_table(fixtures):
+    settings = weather.Settings()
+    data = normalize_response(fixtures['hourly'])
+    printer = weather.ResultPrinter(NullOut(), settings)
+    header = ["Date", "Hour", "Temperature", "Chance of Rain", "Weather"]
+    rows = [[formatting.format_date(point, settings.date),
+             formatting.format_hour(point, settings.time),
+             formatting.format_temperature(point.temp_f, settings.units),
+             str(point.pop) + "%", point.condition] for point in data['hourly']]
+
+    for count in (36, 1000):
+        table = [header] + (rows * (count // len(rows) + 1))[:count]
+        yield ('ResultPrinter._print_table[%d rows]' % count,
+               lambda table=table: printer._print_table(list(table)))
+
+
+def bench_formatters(fixtures):
+    points = normalize_response(fixtures['hourly'])['hourly']
+    days = normalize_response(fixtures['forecast10day'])['forecast']
+    unit = "english"
+
+    yield ('format_temperature[hourly]',
+           lambda: [formatting.format_temperature(point.temp_f, unit) for point in points])
+    yield ('format_temperatures[hourly]',
+           lambda: formatting.format_temperatures(
+               formatting.temperature_column(points, 'temp_f', 'temp_c', unit), unit))
+    yield ('format_hour[hourly]',
+           lambda: [formatting.format_hour(point, "military") for point in points])
+    yield ('format_hours[hourly]',
+           lambda: formatting.format_hours(points, "military"))
+    yield ('format_date[forecast10day]',
+           lambda: [formatting.format_date(day, "date") for day in days])
+    yield ('format_dates[forecast10day]',
+           lambda: formatting.format_dates(days, "date"))
+    yield ('format_wind[forecast10day]',
+           lambda: [formatting.format_wind(day.wind_mph, day.wind_dir, unit) for day in days])
+    yield ('format_winds[forecast10day]',
+           lambda: formatting.format_winds([day.wind_mph for day in days],
+                                           [day.wind_dir for day in days], unit))
+
+
+def bench_settings(fixtures):
+    yield ('Settings()', weather.Settings)
+
+
+def bench_cli(fixtures):
+    """
+    Runs the weatherpy command against the stub server
+    """
+    server = MockServer(fixtures=fixtures).start()
+    with open(os.path.join(HOME, ".weatherrc"), "w") as weatherrc:
+        json.dump({'api_key': "bench", 'api_root': server.api_root}, weatherrc)
+
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    command = [sys.executable, "-m", "weatherpy", "--no-daemon"]
+
+    def run(argv):
+        subprocess.check_call(command + argv, env=env, stdout=subprocess.PIPE)
+
+    # Fill the response cache the way a first run would
+    settings = weather.Settings()
+    cache = ResponseCache.from_settings(settings)
+    provider = weather.get_provider(settings)
+    for argv in (['-n'], ['-anoe']):
+        args = make_args(argv)
+        api_url = weather.make_api_url(args, settings)
+        body = server.body_for("/" + api_url.split("/", 3)[3])[1]
+        cache.put(api_url, body, weather.pack_records(provider, body))
+
+    yield ('cli[-n cached]', lambda: run(['-n']))
+    yield ('cli[-anoe cached]', lambda: run(['-anoe']))
+    yield ('cli[-n fetched]', lambda: run(['-n', '--no-cache']))
+    yield ('cli[-anoe fetched]', lambda: run(['-anoe', '--no-cache']))
+
+
+def bench_fleet(fixtures):
+    """
+    Fetches FLEET_SIZE locations with weatherpy fleet on 1, 2 and 4
+    processes, against a stub server running in its own process so it
+    doesn't take turns with the one being measured
+    """
+    from weatherpy import fleet
+
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR, PYTHONUNBUFFERED="1")
+    server = subprocess.Popen([sys.executable, "-m", "weatherpy.mockserver", "--port", "0"],
+                              env=env, stdout=subprocess.PIPE, universal_newlines=True)
+    try:
+        # The server prints the api_root of each provider, by name
+        api_root = dict(server.stdout.readline().split(' api_root: ')
+                        for _ in weather.PROVIDERS)['wunderground'].strip().strip('"')
+        settings = weather.Settings().copy()
+        settings.settings.update(api_key="bench", api_root=api_root, provider="wunderground",
+                                 history=False)
+        locations = ["%05d" % number for number in range(FLEET_SIZE)]
+        for processes in (1, 2, 4):
+            args = fleet.parse_args(['-anoe', '--no-cache', '-p', str(processes)])
+            yield ('fleet[-anoe %d locations, %d process%s]' % (
+                FLEET_SIZE, processes, "es" if processes > 1 else ""),
+                   lambda args=args: fleet.run(locations, args, settings, NullOut()))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+BENCHMARKS = [
+    bench_print_weather_data,
+    bench_decode,
+    bench_print_table,
+    bench_formatters,
+    bench_settings,
+    bench_cli,
+    bench_fleet,
+]
+
+
+def run_benchmarks(pattern=None):
+    fixtures = load_fixtures()
+    results = {}
+    for benchmark in BENCHMARKS:
+        for name, func in benchmark(fixtures):
+            if pattern and pattern not in name:
+                continue
+            results[name] = measure(func)
+            print("{0:45} {1:12.1f} us".format(name, results[name]['median'] * 1e6),
+                  file=sys.stderr)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(old, new, threshold):
+    """
+    Returns the names of the benchmarks that got slower than threshold
+    """
+    regressions = []
+    for name, timing in sorted(new['results'].items()):
+        if name not in old['results']:
+            continue
+        ratio = timing['median'] / old['results'][name]['median']
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print("{0:45} {1:6.2f}x{2}".format(name, ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark weatherpy's hot paths")
+    parser.add_argument('-o', '--output', help='Write the results as JSON to this file')
+    parser.add_argument('-c', '--compare', metavar='RESULTS',
+                        help='Compare against the JSON results of an earlier run')
+    parser.add_argument('-t', '--threshold', type=float, default=0.1,
+                        help='Slowdown ratio reported as a regression (default 0.1)')
+    parser.add_argument('-k', '--filter', help='Only run benchmarks whose name contains this')
+    args = parser.parse_args()
+
+    try:
+        results = run_benchmarks(args.filter)
+    finally:
+        shutil.rmtree(HOME, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if args.compare:
+        with open(args.compare) as old:
+            if compare(json.load(old), results, args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,9 @@ setup(
     author_email='jackwink@umich.edu',
     license='MIT',
     packages=['weatherpy'],
-    install_requires=['requests>=2.0.0'],
+    package_data={'weatherpy': ['fixtures/*.json']},
+    install_requires=['futures; python_version < "3"'],
+    extras_require={'fast': ['orjson', 'numpy']},
     tests_require=['coverage', 'nose'],
     test_suite='tests',
     entry_points={
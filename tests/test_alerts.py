@@ -0,0 +1,123 @@
+import unittest
+import tempfile
+import shutil
+import json
+import time
+import sys
+import os
+
+import weatherpy.weather as weather
+from weatherpy import alerts
+from weatherpy.mockserver import load_fixtures, merge_features
+from weather_mock import MockIO
+
+WARNING = {'type': "SVR", 'description': "Severe Thunderstorm Warning", 'date_epoch': "1431212400",
+           'expires': "8:00 PM EDT on May 9, 2015", 'expires_epoch': "1431216000",
+           'message': "\n...Severe thunderstorm warning for Washtenaw county...\n"}
+WATCH = {'type': "TOR", 'description': "Tornado Watch", 'date_epoch': "1431212400",
+         'expires': "9:00 PM EDT on May 9, 2015", 'expires_epoch': "1431219600",
+         'message': "\n...Tornado watch for Washtenaw county...\n"}
+
+
+class TestAlertTracker(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.tracker = alerts.AlertTracker(os.path.join(self.directory, alerts.ALERTS_FILE))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_new_changed_expired(self):
+        self.assertEqual(self.tracker.update("wunderground:48104", [WARNING]),
+                         [alerts.AlertChange(alerts.NEW, WARNING)])
+        self.assertEqual(self.tracker.update("wunderground:48104", [WARNING]), [])
+
+        extended = dict(WARNING, expires="9:00 PM EDT on May 9, 2015", expires_epoch="1431219600")
+        self.assertEqual(self.tracker.update("wunderground:48104", [extended, WATCH]),
+                         [alerts.AlertChange(alerts.CHANGED, extended),
+                          alerts.AlertChange(alerts.NEW, WATCH)])
+
+        changes = self.tracker.update("wunderground:48104", [WATCH])
+        self.assertEqual(changes, [alerts.AlertChange(alerts.EXPIRED, {
+            'type': "SVR", 'description': "Severe Thunderstorm Warning",
+            'expires': "9:00 PM EDT on May 9, 2015"})])
+
+    def test_index_keeps_locations_with_alerts(self):
+        self.tracker.update("wunderground:48104", [WARNING])
+        self.tracker.update("wunderground:10001", [WATCH])
+        self.tracker.update("wunderground:48104", [])
+        with open(self.tracker.path) as index_file:
+            self.assertEqual(list(json.load(index_file)), ["wunderground:10001"])
+
+    def test_first_of_a_type_removed(self):
+        """
+        Test that the alert left when another of its type goes away is
+        neither changed nor the one reported expired
+        """
+        wayne = dict(WARNING, date_epoch="1431214200", expires="9:00 PM EDT on May 9, 2015",
+                     expires_epoch="1431219600",
+                     message="...Severe thunderstorm warning for Wayne county...")
+        self.tracker.update("wunderground:48104", [WARNING, wayne])
+        self.assertEqual(self.tracker.update("wunderground:48104", [wayne]),
+                         [alerts.AlertChange(alerts.EXPIRED, {
+                             'type': "SVR", 'description': "Severe Thunderstorm Warning",
+                             'expires': "8:00 PM EDT on May 9, 2015"})])
+
+    def test_alert_keys(self):
+        undated = dict(WATCH, date_epoch=None)
+        self.assertEqual(alerts.alert_keys([WARNING, WATCH, WARNING]),
+                         ["SVR@1431212400", "TOR@1431212400", "SVR@1431212400#2"])
+        self.assertEqual(alerts.alert_keys([undated]),
+                         ["TOR@" + alerts._message_hash(undated)])
+
+
+class TestAlertsSinceLast(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = weather.Settings().copy()
+        self.settings.settings.update(cache_dir=self.directory, provider="wunderground")
+        self.body = merge_features(load_fixtures(), ["conditions", "alerts"])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def render(self, argv, body=None):
+        out = MockIO()
+        weather.print_weather_data(body or self.body, weather.parse_args(argv), self.settings, out)
+        return "".join(out.captured_out)
+
+    def test_only_changes_printed(self):
+        output = self.render(['--alerts-since-last'])
+        self.assertTrue(output.startswith("New alert for Ann Arbor, MI: Severe Thunderstorm Warning\n"))
+        self.assertTrue("Expires: 8:00 PM EDT on May 9, 2015" in output)
+        self.assertEqual(self.render(['--alerts-since-last']), "")
+
+        # -a still prints every alert and leaves the tracking alone
+        self.assertTrue("Severe thunderstorm warning" in self.render(['-a']))
+
+        data = json.loads(self.body.decode('utf-8'))
+        data['alerts'] = []
+        self.assertEqual(self.render(['--alerts-since-last'], json.dumps(data).encode('utf-8')),
+                         "Expired alert for Ann Arbor, MI: Severe Thunderstorm Warning\n\n")
+
+    def test_records(self):
+        output = self.render(['--alerts-since-last', '--format', 'jsonl'])
+        record = json.loads(output.splitlines()[0])
+        self.assertEqual((record['type'], record['name']), ("new_alert", "Ann Arbor, MI"))
+
+    @unittest.skipIf(sys.platform == "win32", "the alert command is a shell script")
+    def test_alert_command(self):
+        path = os.path.join(self.directory, "alert.txt")
+        self.settings.settings['alert_command'] = (
+            'echo "$WEATHERPY_ALERT_CHANGE $WEATHERPY_ALERT_TYPE" > {0}.tmp && mv {0}.tmp {0}'.format(path))
+        self.render(['--alerts-since-last'])
+
+        deadline = time.time() + 5
+        while not os.path.exists(path) and time.time() < deadline:
+            time.sleep(0.05)
+        with open(path) as alert_file:
+            self.assertEqual(alert_file.read(), "new SVR\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,7 @@
 import unittest
+import weatherpy.weather as weather
+
+from weather_mock import MockArgs, MockSettings
 
 class TestApiRequests(unittest.TestCase):
 
@@ -8,10 +11,28 @@ class TestApiRequests(unittest.TestCase):
         pass
 
     def test_make_query_path(self):
-        pass
+        # Conditions are the default
+        self.assertEqual(weather.make_query_path(MockArgs()), "conditions/alerts/")
+        self.assertEqual(weather.make_query_path(MockArgs(hourly=True, extended=True)),
+                         "hourly/forecast10day/")
+        self.assertEqual(weather.make_query_path(MockArgs(alerts=True, forecast=True)),
+                         "conditions/alerts/forecast/")
 
     def test_make_api_url(self):
-        pass
+        self.assertEqual(weather.make_api_url(MockArgs(), MockSettings()),
+                         "http://api.wunderground.com/api/1234/conditions/alerts/q/autoip.json")
+        self.assertEqual(weather.make_api_url(MockArgs(location=["MI/Ann", "Arbor"]), MockSettings()),
+                         "http://api.wunderground.com/api/1234/conditions/alerts/q/MI/Ann_Arbor.json")
+        self.assertEqual(weather.make_api_url(MockArgs(hourly=True), MockSettings(), "MI/Ann Arbor"),
+                         "http://api.wunderground.com/api/1234/hourly/q/MI/Ann_Arbor.json")
+
+    def test_make_feature_urls(self):
+        urls = weather.make_feature_urls(MockArgs(now=True, hourly=True), MockSettings(), "48104")
+        self.assertEqual(urls, [
+            "http://api.wunderground.com/api/1234/conditions/q/48104.json",
+            "http://api.wunderground.com/api/1234/alerts/q/48104.json",
+            "http://api.wunderground.com/api/1234/hourly/q/48104.json",
+        ])
 
     def test_main(self):
         pass
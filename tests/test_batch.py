@@ -0,0 +1,119 @@
+import unittest
+import tempfile
+import shutil
+import json
+import os
+import time
+
+import weatherpy.weather as weather
+from weatherpy import batch
+from weather_mock import MockIO, MockSession, url_location
+
+
+def named_conditions(url):
+    """
+    Returns conditions named after the queried location, and fails for
+    locations starting with "bad"
+    """
+    location = url_location(url)
+    if location.startswith("bad"):
+        raise IOError("connection refused")
+    return json.dumps({'response': {}, 'current_observation': {
+        'display_location': {'full': location}, 'temp_f': 61.3, 'temp_c': 16.3,
+        'weather': 'Clear', 'wind_string': 'Calm', 'relative_humidity': '59%',
+    }}).encode('utf-8')
+
+
+class TestBatchFunctions(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read_locations(self):
+        path = os.path.join(self.directory, "locations")
+        with open(path, "w") as f:
+            f.write("48104\n\n# Detroit office\nMI/Detroit\n  CA/San Francisco  \n")
+
+        self.assertEqual(batch.read_locations(path),
+                         ["48104", "MI/Detroit", "CA/San Francisco"])
+
+    def test_fetch_all_keeps_input_order(self):
+        """
+        Test that results come back in input order even when later urls
+        finish first
+        """
+        def fetch(url):
+            time.sleep(0.01 * (5 - int(url)))
+            return url
+
+        urls = [str(i) for i in range(5)]
+        self.assertEqual(list(batch.fetch_all(urls, fetch, workers=5)), urls)
+
+    def test_fetch_all_reports_errors(self):
+        """
+        Test that a failing fetch doesn't stop the rest of the batch
+        """
+        def fetch(url):
+            if url == "bad":
+                raise IOError("connection refused")
+            return url
+
+        results = list(batch.fetch_all(["a", "bad", "b"], fetch, workers=2))
+        self.assertEqual(results[0], "a")
+        self.assertTrue(isinstance(results[1], batch.FetchError))
+        self.assertEqual(str(results[1]), "connection refused")
+        self.assertEqual(results[2], "b")
+
+
+class TestPrintBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = weather.Settings().copy()
+        self.settings.settings.update(
+            cache_dir=self.directory, location_index=os.path.join(self.directory, "locations.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_print_batch(self):
+        """
+        Test that locations print in input order whatever order they're
+        fetched in, and that a failure is reported on err without stopping
+        the rest of the batch
+        """
+        out, err = MockIO(), MockIO()
+        session = MockSession(named_conditions, delays={'first': 0.05, 'bad_place': 0.02})
+        args = weather.parse_args(['-n', '-u', 'english', '-b', 'first', 'bad place', 'last'])
+        weather.run(args, self.settings, out, err, session)
+
+        output = "".join(out.captured_out)
+        self.assertTrue(output.startswith("==> first <==\nWeather for first\n"))
+        self.assertTrue(output.index("Weather for first") < output.index("==> last <==") <
+                        output.index("Weather for last"))
+        self.assertTrue("bad place" not in output)
+        self.assertEqual("".join(err.captured_out),
+                         "Could not fetch bad place: connection refused\n")
+
+    def test_headings_for_every_section(self):
+        """
+        Test that the forecast and hourly tables of each location are
+        headed with the location, which only the conditions name
+        """
+        from weatherpy.mockserver import load_fixtures, merge_features
+        session = MockSession(merge_features(load_fixtures(), ["hourly", "forecast"]))
+
+        for flag in ('-f', '-o'):
+            out, err = MockIO(), MockIO()
+            args = weather.parse_args([flag, '--no-cache', '-b', '48104', '60601'])
+            weather.run(args, self.settings, out, err, session)
+            lines = "".join(out.captured_out).splitlines()
+            self.assertEqual(lines[0], "==> 48104 <==")
+            self.assertEqual([line for line in lines if line.startswith("==>")],
+                             ["==> 48104 <==", "==> 60601 <=="])
+            self.assertEqual("".join(err.captured_out), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+import tempfile
+import threading
+import shutil
+import time
+import os
+
+import weatherpy.weather as weather
+from weatherpy.cache import ResponseCache, load_json_state, save_json_state
+from weather_mock import MockSettings, MockSession
+
+URL = "http://api.wunderground.com/api/1234/conditions/alerts/q/autoip.json"
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        self.assertEqual(self.cache.get(URL), None)
+        self.cache.put(URL, b'{"response": {}}')
+        self.assertEqual(self.cache.get(URL), b'{"response": {}}')
+
+    def test_ttl_by_feature(self):
+        """
+        Test that a url expires with the shortest TTL of its features
+        """
+        cache = ResponseCache(self.directory, ttls={'conditions': 10, 'hourly': 100})
+        self.assertEqual(cache.ttl_for(URL), 10)
+        self.assertEqual(cache.ttl_for(URL.replace("conditions/alerts", "hourly")), 100)
+
+    def test_max_age(self):
+        self.cache.put(URL, b'{}')
+        self.assertEqual(self.cache.get(URL, max_age=60), b'{}')
+
+        time.sleep(0.01)
+        self.assertEqual(self.cache.get(URL, max_age=0), None)
+        # Stale entries can still be looked up
+        self.assertEqual(self.cache.lookup(URL).body, b'{}')
+
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used entries are removed first
+        """
+        cache = ResponseCache(self.directory)
+        for i in range(3):
+            url = URL + str(i)
+            cache.put(url, b'x' * 50)
+            os.utime(cache.path_for(url), (i, i))
+
+        # Room for exactly three entries
+        cache.max_size = 3 * os.path.getsize(cache.path_for(URL + "0")) + 2
+
+        # Reading the first entry makes the second the least recently used
+        cache.get(URL + "0")
+        cache.put(URL + "3", b'x' * 50)
+
+        self.assertNotEqual(cache.get(URL + "0"), None)
+        self.assertEqual(cache.get(URL + "1"), None)
+        self.assertNotEqual(cache.get(URL + "3"), None)
+
+    def test_locks_removed_with_entries(self):
+        """
+        Test that every url has its own lock file, removed when its entry is
+        evicted or cleared
+        """
+        cache = ResponseCache(self.directory, lock_timeout=0)
+        self.assertNotEqual(cache.fetch_lock(URL).path, cache.fetch_lock(URL + "0").path)
+        for url in (URL, URL + "0"):
+            with cache.fetch_lock(url):
+                cache.put(url, b'x' * 50)
+            self.assertTrue(os.path.exists(cache.fetch_lock(url).path))
+
+        os.utime(cache.path_for(URL), (0, 0))
+        cache.max_size = os.path.getsize(cache.path_for(URL)) + 2
+        cache.evict()
+        self.assertFalse(os.path.exists(cache.fetch_lock(URL).path))
+        self.assertTrue(os.path.exists(cache.fetch_lock(URL + "0").path))
+
+        cache.clear()
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_unwritable_directory(self):
+        cache = ResponseCache(os.path.join(self.directory, "file", "cache"))
+        with open(os.path.join(self.directory, "file"), "w") as f:
+            f.write("")
+        cache.put(URL, b'{}')
+        self.assertEqual(cache.get(URL), None)
+
+    def test_json_state(self):
+        path = os.path.join(self.directory, "state", "quota.json")
+        self.assertEqual(load_json_state(path), {})
+        self.assertTrue(save_json_state(path, {'key': [1, 2]}))
+        self.assertEqual(load_json_state(path), {'key': [1, 2]})
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["quota.json"])
+
+        with open(path, "w") as state_file:
+            state_file.write("{")
+        self.assertEqual(load_json_state(path), {})
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = MockSettings(cache_dir=self.directory)
+        self.args = weather.parse_args([])
+        self.session = MockSession()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def fetch_in_thread(self):
+        results = []
+        thread = threading.Thread(target=lambda: results.append(
+            weather.fetch_response(URL, self.args, self.settings, self.session)))
+        thread.start()
+        return thread, results
+
+    def test_waiter_uses_stored_response(self):
+        """
+        Test that a call waiting on the lock of a url being fetched reads
+        the response stored by the fetcher instead of fetching it again
+        """
+        cache = ResponseCache(self.directory)
+        with cache.fetch_lock(URL) as lock:
+            self.assertTrue(lock.locked)
+            thread, results = self.fetch_in_thread()
+            time.sleep(0.1)
+            cache.put(URL, b'{"shared": true}')
+        thread.join()
+
+        self.assertEqual(results[0].body, b'{"shared": true}')
+        self.assertEqual(self.session.urls, [])
+
+    def test_no_cache_waiter_uses_new_response(self):
+        self.args.no_cache = True
+        cache = ResponseCache(self.directory)
+        cache.put(URL, b'{"old": true}')
+        with cache.fetch_lock(URL):
+            thread, results = self.fetch_in_thread()
+            time.sleep(0.1)
+            cache.put(URL, b'{"new": true}')
+        thread.join()
+        self.assertEqual(results[0].body, b'{"new": true}')
+
+    def test_lock_timeout(self):
+        self.settings.settings['cache_lock_timeout'] = 0
+        cache = ResponseCache(self.directory)
+        with cache.fetch_lock(URL):
+            thread, results = self.fetch_in_thread()
+            thread.join()
+        self.assertEqual(results[0].body, b'{"fetched": true}')
+        self.assertEqual(self.session.urls, [URL])
+
+
+if __name__ == "__main__":
+    unittest.main()
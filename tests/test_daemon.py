@@ -0,0 +1,146 @@
+import unittest
+import tempfile
+import threading
+import shutil
+import time
+import sys
+import os
+
+import weatherpy.weather as weather
+from weatherpy import daemon
+from weather_mock import MockIO
+
+
+CONDITIONS = {
+    'response': {},
+    'current_observation': {
+        'display_location': {'full': 'Ann Arbor, MI'},
+        'temp_f': 61.3, 'temp_c': 16.3, 'weather': 'Clear',
+        'wind_string': 'Calm', 'relative_humidity': '59%',
+    },
+}
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "daemon.sock")
+        # Keep the developer's cache, location index and history out of it
+        settings = weather.Settings().copy()
+        settings.settings.update(cache_dir=self.directory, history=False,
+                                 location_index=os.path.join(self.directory, "locations.json"))
+        self.daemon = daemon.WeatherDaemon(settings=settings)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _request(self, argv):
+        return dict(vars(weather.parse_args(argv + ['--no-daemon'])))
+
+    def test_handle_from_memory(self):
+        """
+        Test that fresh decoded responses are rendered without a fetch
+        """
+        request = self._request(['-n', '-u', 'english', '48104'])
+        api_url = weather.make_api_url(weather.parse_args(['-n', '48104']),
+                                       self.daemon.settings)
+        self.daemon.responses[api_url] = (time.time(), CONDITIONS)
+
+        response = self.daemon.handle(request)
+        self.assertEqual(response['err'], '')
+        self.assertEqual(response['out'].splitlines()[:2],
+                         ['Weather for Ann Arbor, MI',
+                          u'Currently: 61.3\xb0F (16.3\xb0C) Clear'])
+
+    def test_handle_records_history(self):
+        from weatherpy.history import HistoryStore
+        from weatherpy.locations import location_key
+        from weatherpy.providers import get_provider
+
+        history_dir = os.path.join(self.directory, "history")
+        self.daemon.settings.settings.update(history=True, history_dir=history_dir)
+        api_url = weather.make_api_url(weather.parse_args(['-n', '48104']),
+                                       self.daemon.settings)
+        conditions = dict(CONDITIONS, current_observation=dict(
+            CONDITIONS['current_observation'], observation_epoch="1431201600"))
+        self.daemon.responses[api_url] = (time.time(), conditions)
+
+        response = self.daemon.handle(self._request(['-n', '-u', 'english', '48104']))
+        self.assertEqual(response['err'], '')
+        key = location_key(get_provider(self.daemon.settings), "48104")
+        rows = HistoryStore(history_dir).location(key).query(0, 2000000000)
+        self.assertEqual(len(rows), 1)
+        self.assertAlmostEqual(rows[0][1], 61.3, places=4)
+
+    def test_handle_errors(self):
+        """
+        Test that a failed request gets the message and exit status a
+        run without the daemon has
+        """
+        response = self.daemon.handle(self._request(['--pick', '3', '-n', 'zzz']))
+        self.assertEqual(response['out'], '')
+        self.assertEqual(response['err'], "No earlier matches to pick from for zzz\n")
+        self.assertEqual(response['status'], 1)
+
+    def test_weatherrc_changes_picked_up(self):
+        """
+        Test that a daemon reading the weatherrc file itself uses its
+        latest version for every request
+        """
+        import json
+        from weatherpy import settings as settings_module
+
+        conf_path = os.path.join(self.directory, "weatherrc")
+        conf = {'api_key': "first", 'cache_dir': self.directory, 'history': False,
+                'location_index': os.path.join(self.directory, "locations.json")}
+        with open(conf_path, "w") as conf_file:
+            json.dump(conf, conf_file)
+        old_path, settings_module.WEATHER_CONF_FILE = settings_module.WEATHER_CONF_FILE, conf_path
+        try:
+            reloading = daemon.WeatherDaemon()
+            args = weather.parse_args(['-n', '48104'])
+            self.assertEqual(reloading.settings_for(args).api_key, "first")
+            reloading.responses['url'] = (time.time(), CONDITIONS)
+
+            with open(conf_path, "w") as conf_file:
+                json.dump(dict(conf, api_key="second-key"), conf_file)
+            settings = reloading.settings_for(args)
+            self.assertEqual(settings.api_key, "second-key")
+            self.assertEqual(reloading.settings.api_key, "second-key")
+            self.assertEqual(reloading.responses, {})
+        finally:
+            settings_module.WEATHER_CONF_FILE = old_path
+
+    def test_forward_without_daemon(self):
+        args = weather.parse_args(['-n'])
+        self.assertFalse(daemon.forward(args, self.path))
+
+    def test_forward(self):
+        """
+        Test that the client prints what the daemon rendered
+        """
+        class EchoDaemon(object):
+            def handle(self, request):
+                return {'out': "now: {0}\n".format(request['now']), 'err': '',
+                        'status': 1 if request['location'] else 0}
+
+        thread = threading.Thread(target=daemon.serve, args=(self.path, EchoDaemon()))
+        thread.daemon = True
+        thread.start()
+        while not os.path.exists(self.path):
+            time.sleep(0.01)
+
+        spy = MockIO()
+        stdout, sys.stdout = sys.stdout, spy
+        try:
+            self.assertTrue(daemon.forward(weather.parse_args(['-n']), self.path))
+            with self.assertRaises(SystemExit) as raised:
+                daemon.forward(weather.parse_args(['-n', 'badloc']), self.path)
+            self.assertEqual(raised.exception.code, 1)
+        finally:
+            sys.stdout = stdout
+        self.assertEqual(spy.captured_out, ['now: True\n', 'now: True\n'])
+
+
+if __name__ == "__main__":
+    unittest.main()
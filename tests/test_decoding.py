@@ -0,0 +1,49 @@
+import unittest
+import json
+
+from weatherpy import decoding
+
+RESPONSE = {
+    'response': {'version': '0.1'},
+    'current_observation': {'display_location': {'full': 'Ann Arbor, MI'}, 'temp_f': 61.3},
+    'alerts': [],
+    'forecast': {
+        'txt_forecast': {'forecastday': ["a long text forecast"]},
+        'simpleforecast': {'forecastday': [{'pop': 20}]},
+    },
+}
+
+
+class TestDecoding(unittest.TestCase):
+    def test_loads_bytes(self):
+        data = json.dumps(RESPONSE).encode('utf-8')
+        self.assertEqual(decoding.loads(data), RESPONSE)
+        self.assertEqual(decoding.decode_response(data), RESPONSE)
+
+    def test_make_spec(self):
+        spec = decoding.make_spec([('current_observation', 'display_location'),
+                                   ('forecast', 'simpleforecast'),
+                                   ('current_observation',)])
+        self.assertEqual(spec, {'current_observation': True,
+                                'forecast': {'simpleforecast': True}})
+
+    def test_prune(self):
+        """
+        Test that only the requested subtrees survive decoding
+        """
+        data = json.dumps(RESPONSE).encode('utf-8')
+        decoded = decoding.decode_response(data, [
+            ('response',),
+            ('current_observation', 'display_location'),
+            ('forecast', 'simpleforecast', 'forecastday'),
+            ('hourly_forecast',),
+        ])
+        self.assertEqual(decoded, {
+            'response': {'version': '0.1'},
+            'current_observation': {'display_location': {'full': 'Ann Arbor, MI'}},
+            'forecast': {'simpleforecast': {'forecastday': [{'pop': 20}]}},
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import tempfile
+import shutil
+import pickle
+import os
+
+import weatherpy.weather as weather
+from weatherpy import fleet
+from weatherpy.mockserver import MockServer
+from weather_mock import MockIO
+
+LOCATIONS = ["48104", "Ann Arbor, MI", "10001", "94107", "60601"]
+
+
+class TestFleet(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = MockServer().start()
+        self.settings = weather.Settings().copy()
+        self.settings.settings.update(
+            api_key="1234", api_root=self.server.api_root, provider="wunderground",
+            cache_dir=self.directory, history=False,
+            location_index=os.path.join(self.directory, "locations.json"))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def run_fleet(self, argv):
+        args = fleet.parse_args(argv + ["--no-cache"])
+        out, err = MockIO(), MockIO()
+        fleet.run(list(args.location), args, self.settings, out, err)
+        return "".join(out.captured_out), "".join(err.captured_out)
+
+    def test_make_shards(self):
+        self.assertEqual(fleet.make_shards(list(range(5)), 2), [[0, 1, 2], [3, 4]])
+        shards = fleet.make_shards(list(range(100)), 2)
+        self.assertEqual([len(shard) for shard in shards], [32, 32, 32, 4])
+        self.assertEqual(fleet.make_shards([], 4), [])
+
+    def test_settings_picklable(self):
+        settings = pickle.loads(pickle.dumps(self.settings))
+        self.assertEqual(settings.settings, self.settings.settings)
+        self.assertEqual(settings.api_root, self.server.api_root)
+
+    def test_same_as_batch(self):
+        """
+        Test that the records printed by the processes are the ones batch
+        mode prints, in the order the locations were given
+        """
+        args = weather.parse_args(['-b', '-anoe', '--format', 'jsonl', '--no-cache'] + LOCATIONS)
+        out = MockIO()
+        weather.print_batch(LOCATIONS, args, self.settings, out, MockIO())
+        expected = "".join(out.captured_out)
+
+        for processes in ("1", "2"):
+            output, errors = self.run_fleet(['-anoe', '-p', processes] + LOCATIONS)
+            self.assertEqual(errors, "")
+            self.assertEqual(output, expected)
+
+    def test_failed_locations_reported(self):
+        self.settings.settings['api_root'] = self.server.url + "missing/"
+        output, errors = self.run_fleet(['-n', '-p', '2'] + LOCATIONS[:2])
+        self.assertEqual(output, "")
+        self.assertEqual(errors.splitlines()[0].split(":")[0], "Could not fetch 48104")
+        self.assertEqual(len(errors.splitlines()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# -*- encoding: utf-8 -*-
+import unittest
+
+from weatherpy import formatting
+from weatherpy.records import HourlyPoint, ForecastDay
+from weatherpy.types import Units, TimeFormats, DateFormats
+
+POINTS = [
+    HourlyPoint(1431212400, "May", 9, 7, 0, "7:00 AM", 61, 16, 20, "Clear"),
+    HourlyPoint(1431216000, "May", 10, 18, 30, "6:30 PM", -4, "", 100, "Snow"),
+]
+
+DAYS = [
+    ForecastDay(1431216000, "May", 9, "Sat", "Clear", 20, 79, 26, 53, 12, 5, 8, "North", 82),
+    ForecastDay(1431302400, "May", 10, None, "Rain", 40, "", 21, 47, 8, "", 22, "NW", 57),
+]
+
+
+class TestFormatting(unittest.TestCase):
+    def test_conversions(self):
+        self.assertEqual(formatting.fahrenheit_to_celsius([32, 212, -40, 61]), [0, 100, -40, 16])
+        self.assertEqual(formatting.celsius_to_fahrenheit([0, 16, -40]), [32, 61, -40])
+        self.assertEqual(formatting.mph_to_kph([0, 10, ""]), [0, 16, ""])
+        self.assertEqual(formatting.kph_to_mph([16, 22]), [10, 14])
+
+    def test_missing_values_are_converted(self):
+        """
+        Test that values the API left out are computed from the other unit
+        """
+        self.assertEqual(formatting.temperature_column(POINTS, 'temp_f', 'temp_c', Units.METRIC),
+                         [16, -20])
+        self.assertEqual(formatting.temperature_column(DAYS, 'high_f', 'high_c', Units.ENGLISH),
+                         [79, 70])
+        self.assertEqual(formatting.windspeed_column(DAYS, Units.ENGLISH), [5, 14])
+
+    def test_columns_match_cell_formatters(self):
+        for unit in Units.to_array():
+            self.assertEqual(formatting.format_temperatures([61, -4, 7.5], unit),
+                             [formatting.format_temperature(value, unit) for value in [61, -4, 7.5]])
+            self.assertEqual(formatting.format_winds([0, 14], ["North", "WSW"], unit),
+                             [formatting.format_wind(0, "North", unit),
+                              formatting.format_wind(14, "WSW", unit)])
+
+        for time_format in TimeFormats.to_array():
+            self.assertEqual(formatting.format_hours(POINTS, time_format),
+                             [formatting.format_hour(point, time_format) for point in POINTS])
+
+        for date_format in DateFormats.to_array():
+            for records in (POINTS, DAYS):
+                self.assertEqual(formatting.format_dates(records, date_format),
+                                 [formatting.format_date(record, date_format) for record in records])
+
+    def test_numpy_conversion(self):
+        if formatting.get_numpy() is None:
+            self.skipTest("numpy isn't installed")
+        values = list(range(-60, 120))
+        python = [formatting._round((value - 32) * 5.0 / 9) for value in values]
+        self.assertEqual(formatting.fahrenheit_to_celsius(values), python)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import tempfile
+import shutil
+import time
+import os
+
+import weatherpy.weather as weather
+from weatherpy import history
+from weatherpy.records import HourlyPoint
+from weather_mock import MockIO
+
+NOW = int(time.time()) // 3600 * 3600
+
+
+def make_data(epoch, temp_f, hourly=()):
+    return {
+        'response': {},
+        'current_observation': {
+            'display_location': {'full': 'Ann Arbor, MI'},
+            'observation_epoch': str(epoch), 'temp_f': temp_f, 'temp_c': 16.3,
+            'weather': 'Clear', 'wind_string': 'Calm', 'wind_mph': 0,
+            'relative_humidity': '59%',
+        },
+        'hourly': [HourlyPoint(hour_epoch, "May", 9, 19, 0, "7:00 PM", temp, None, pop, "Clear")
+                   for hour_epoch, temp, pop in hourly],
+    }
+
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = history.HistoryStore(self.directory)
+        self.location = self.store.location("wunderground:48104")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_query_range(self):
+        for day in range(10):
+            self.store.record("wunderground:48104", make_data(NOW - day * 86400, 50 + day))
+
+        rows = self.location.query(NOW - 3 * 86400, NOW + 1)
+        self.assertEqual(rows, [(NOW - 3 * 86400, 53), (NOW - 2 * 86400, 52),
+                                (NOW - 86400, 51), (NOW, 50)])
+        self.assertEqual(self.location.query(NOW + 1, NOW + 86400), [])
+        self.assertEqual(self.location.query(NOW, NOW + 1, ['temp_c', 'humidity'])[0][2], 59)
+
+    def test_hourly_latest_wins(self):
+        self.store.record("wunderground:48104", make_data(NOW, 60, [(NOW + 3600, 61, 10),
+                                                                    (NOW + 7200, 62, 20)]))
+        self.store.record("wunderground:48104", make_data(NOW + 3600, 61, [(NOW + 7200, 65, 30)]))
+
+        rows = self.location.query(NOW, NOW + 86400, ['temp_f', 'temp_c', 'pop'], history.HOURLY)
+        self.assertEqual([row[:2] for row in rows], [(NOW + 3600, 61), (NOW + 7200, 65)])
+        self.assertEqual(rows[1][2:], (18, 30))
+
+    def test_same_response_stored_once(self):
+        data = make_data(NOW, 60, [(NOW + 3600, 61, 10)])
+        self.store.record("wunderground:48104", data)
+        self.store.record("wunderground:48104", data)
+        self.assertEqual(len(self.location.blocks()), 1)
+
+    def test_torn_write_ignored(self):
+        """
+        Test that rows and index bytes past the last complete block are
+        dropped by the next append
+        """
+        self.store.record("wunderground:48104", make_data(NOW - 60, 50))
+        with open(os.path.join(self.location.directory, "epoch"), 'ab') as column:
+            column.write(b"\x01\x02\x03")
+        with open(os.path.join(self.location.directory, "blocks.idx"), 'ab') as index:
+            index.write(b"\x01")
+
+        self.store.record("wunderground:48104", make_data(NOW, 51))
+        self.assertEqual(self.location.query(0, NOW + 1), [(NOW - 60, 50), (NOW, 51)])
+
+    def test_run_and_subcommand(self):
+        settings = weather.Settings().copy()
+        settings.settings.update(history=True, history_dir=self.directory)
+        weather.record_history(settings, weather.get_provider(settings), "48104",
+                               make_data(NOW - 60, 61.3))
+
+        out = MockIO()
+        history.main(['--field', 'temp_f', '--field', 'humidity', '48104'], out, settings)
+        output = "".join(out.captured_out)
+        self.assertTrue("temp_f" in output and "humidity" in output)
+        self.assertTrue(time.strftime("%Y-%m-%d %H:%M", time.localtime(NOW - 60)) in output)
+        self.assertTrue("61.3" in output)
+
+        out = MockIO()
+        history.main(['60601'], out, settings)
+        self.assertEqual("".join(out.captured_out), "No history for 60601\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
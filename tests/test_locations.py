@@ -0,0 +1,94 @@
+import unittest
+import tempfile
+import shutil
+import json
+import os
+
+import weatherpy.weather as weather
+from weatherpy import locations
+from weatherpy.providers import Wunderground
+from weather_mock import MockIO, MockSession
+
+AMBIGUOUS = {'response': {'results': [
+    {'name': 'Springfield', 'state': 'IL', 'country_name': 'USA', 'zmw': '62701.1.99999'},
+    {'name': 'Springfield', 'state': 'MA', 'country_name': 'USA', 'zmw': '01101.1.99999'},
+]}}
+
+CONDITIONS = {
+    'response': {},
+    'current_observation': {
+        'display_location': {'full': 'Springfield, MA', 'zip': '01101', 'magic': '1', 'wmo': '99999'},
+        'temp_f': 61.3, 'temp_c': 16.3, 'weather': 'Clear',
+        'wind_string': 'Calm', 'relative_humidity': '59%',
+    },
+}
+
+
+class TestLocations(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "locations.json")
+        self.provider = Wunderground()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_location_key(self):
+        self.assertEqual(locations.location_key(self.provider, "MI/Ann Arbor"),
+                         locations.location_key(self.provider, "mi/ann_arbor"))
+        self.assertEqual(locations.location_key(self.provider, None), "wunderground:autoip")
+
+    def test_learn_and_resolve(self):
+        index = locations.LocationIndex(self.path)
+        self.assertEqual(locations.resolve(self.provider, index, "01101"), ("01101", False))
+
+        locations.learn(self.provider, index, "01101", CONDITIONS)
+        index = locations.LocationIndex(self.path)
+        self.assertEqual(locations.resolve(self.provider, index, "01101"),
+                         ("zmw:01101.1.99999", True))
+
+    def test_autoip_expires(self):
+        index = locations.LocationIndex(self.path, autoip_ttl=60)
+        locations.learn(self.provider, index, None, CONDITIONS)
+        self.assertEqual(locations.resolve(self.provider, index, None)[1], True)
+
+        index.entries["wunderground:autoip"]['resolved_at'] -= 120
+        self.assertEqual(locations.resolve(self.provider, index, None), (None, False))
+
+    def test_pick(self):
+        index = locations.LocationIndex(self.path)
+        key = locations.location_key(self.provider, "Springfield")
+        self.assertRaises(locations.LocationError, index.pick, key, 1)
+
+        locations.learn(self.provider, index, "Springfield", AMBIGUOUS)
+        self.assertRaises(locations.LocationError, index.pick, key, 3)
+        self.assertEqual(index.pick(key, 2), "zmw:01101.1.99999")
+        # The matches stay around to pick another one
+        self.assertEqual(index.pick(key, 1), "zmw:62701.1.99999")
+        self.assertEqual(index.lookup(key), "zmw:62701.1.99999")
+
+    def test_run(self):
+        """
+        Test that an ambiguous query is numbered, picked from without a
+        lookup, and then requested by its canonical id
+        """
+        settings = weather.Settings().copy()
+        settings.settings.update(cache_dir=self.directory, location_index=self.path)
+        session = MockSession(lambda url: json.dumps(
+            CONDITIONS if "zmw:" in url else AMBIGUOUS).encode('utf-8'))
+        out = MockIO()
+
+        weather.run(weather.parse_args(['-n', '--no-cache', 'Springfield']), settings, out, session=session)
+        self.assertTrue("2: Springfield, MA USA\n" in "".join(out.captured_out))
+
+        weather.run(weather.parse_args(['-n', '--no-cache', '--pick', '2', 'Springfield']),
+                    settings, out, session=session)
+        weather.run(weather.parse_args(['-n', '--no-cache', 'Springfield']), settings, out, session=session)
+        self.assertEqual(len(session.urls), 3)
+        self.assertTrue(session.urls[0].endswith("/q/Springfield.json"))
+        self.assertTrue(session.urls[1].endswith("/q/zmw:01101.1.99999.json"))
+        self.assertEqual(session.urls[2], session.urls[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
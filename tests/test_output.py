@@ -0,0 +1,64 @@
+import unittest
+import json
+import csv
+
+import weatherpy.weather as weather
+from weatherpy import output, mockserver
+from weatherpy.records import normalize_response
+from weather_mock import MockIO
+
+
+class TestOutput(unittest.TestCase):
+    def setUp(self):
+        fixtures = mockserver.load_fixtures()
+        body = mockserver.merge_features(fixtures, ('conditions', 'alerts', 'hourly', 'forecast'))
+        self.data = normalize_response(json.loads(body.decode('utf-8')))
+        self.settings = weather.Settings(weather.parse_args(['-u', 'english']))
+
+    def _render(self, output_format, argv=('-anof',)):
+        args = weather.parse_args(list(argv) + ['--format', output_format, '48104'])
+        out = MockIO()
+        weather.render_weather_data(self.data, args, self.settings, out)
+        return "".join(out.captured_out)
+
+    def test_jsonl(self):
+        records = [json.loads(line) for line in self._render("jsonl").splitlines()]
+        self.assertEqual([record['type'] for record in records[:2]], ["alert", "conditions"])
+        self.assertEqual(len(records), 2 + 36 + 4)
+        self.assertTrue(all(record['location'] == "48104" for record in records))
+
+        hourly = records[2]
+        point = self.data['hourly'][0]
+        self.assertEqual(list(hourly.keys()), ["type", "location", "epoch", "month", "day", "hour",
+                                               "minute", "temp_f", "temp_c", "pop", "condition"])
+        self.assertEqual((hourly['temp_f'], hourly['temp_c']), (point.temp_f, point.temp_c))
+
+    def test_json(self):
+        records = json.loads(self._render("json"))
+        self.assertEqual(len(records), 42)
+        self.assertEqual(records[-1]['type'], "forecast")
+
+        self.data = {'response': {'error': {'description': "No such location"}}}
+        self.assertEqual(json.loads(self._render("json")),
+                         [{"type": "error", "location": "48104", "message": "No such location"}])
+
+    def test_csv(self):
+        rows = list(csv.reader(self._render("csv", ['-f']).splitlines()))
+        self.assertEqual(rows[0], output.FIELDS)
+        self.assertEqual(len(rows), 1 + 4)
+        day = dict(zip(rows[0], rows[1]))
+        self.assertEqual(day['type'], "forecast")
+        self.assertEqual(day['high_f'], str(self.data['forecast'][0].high_f))
+        self.assertEqual(day['temp_f'], "")
+
+    def test_converts_missing_units(self):
+        """
+        Test that records have both units when the provider sent one
+        """
+        self.data['hourly'] = [point._replace(temp_c=None) for point in self.data['hourly']]
+        records = [json.loads(line) for line in self._render("jsonl", ['-o']).splitlines()]
+        self.assertEqual(records[0]['temp_c'], int(round((records[0]['temp_f'] - 32) * 5 / 9.0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import tempfile
+import shutil
+import json
+import os
+
+import weatherpy.weather as weather
+from weatherpy import packing
+from weatherpy.cache import ResponseCache
+from weatherpy.decoding import loads
+from weatherpy.mockserver import load_fixtures, merge_features
+from weatherpy.providers import Wunderground, OpenMeteo
+from weatherpy.records import HourlyPoint
+
+URL = "http://api.wunderground.com/api/1234/hourly/q/48104.json"
+
+
+class TestPacking(unittest.TestCase):
+    def setUp(self):
+        self.fixtures = load_fixtures()
+
+    def test_round_trip(self):
+        body = merge_features(self.fixtures, ["conditions", "alerts", "hourly", "forecast10day"])
+        data = Wunderground().normalize(loads(body))
+        unpacked = packing.unpack_response(packing.pack_response(data))
+        self.assertEqual(unpacked, data)
+        self.assertEqual(type(unpacked['hourly'][0]), type(data['hourly'][0]))
+
+        data = OpenMeteo().normalize(json.loads(json.dumps(self.fixtures['openmeteo'])))
+        self.assertEqual(packing.unpack_response(packing.pack_response(data)), data)
+
+    def test_values_keep_their_type(self):
+        data = {'response': {}, 'forecast': [], 'hourly': [
+            HourlyPoint(1, "May", 1, 1.0, True, "1:00 AM", None, "-9999", 0, "Clear")]}
+        point = packing.unpack_response(packing.pack_response(data))['hourly'][0]
+        self.assertEqual([type(value) for value in point],
+                         [type(value) for value in data['hourly'][0]])
+        self.assertEqual(packing.unpack_response(packing.pack_response({'response': {}})),
+                         {'response': {}})
+
+    def test_strings_interned(self):
+        data = Wunderground().normalize(loads(merge_features(self.fixtures, ["hourly"])))
+        first = packing.unpack_response(packing.pack_response(data))['hourly'][0]
+        second = packing.unpack_response(packing.pack_response(data))['hourly'][0]
+        self.assertIs(first.condition, second.condition)
+
+    def test_not_packed(self):
+        self.assertRaises(ValueError, packing.unpack_response, b"")
+        self.assertRaises(ValueError, packing.unpack_response, b"{}" * 20)
+        packed = packing.pack_response(
+            Wunderground().normalize(loads(merge_features(self.fixtures, ["hourly"]))))
+        self.assertRaises(ValueError, packing.unpack_response, packed[:-10])
+
+    def test_compress(self):
+        body = merge_features(self.fixtures, ["hourly"])
+        self.assertEqual(packing.decompress(packing.compress(body)), body)
+
+
+class TestCompressedCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.directory)
+        self.body = merge_features(load_fixtures(), ["hourly"])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_stored_compressed_with_records(self):
+        records = weather.pack_records(Wunderground(), self.body)
+        self.cache.put(URL, self.body, records)
+        self.assertLess(os.path.getsize(self.cache.path_for(URL)), len(self.body) // 4)
+
+        entry = self.cache.lookup(URL)
+        self.assertEqual(entry.body, self.body)
+        self.assertEqual(entry.records, records)
+        self.assertEqual(weather.decode_entry(entry, Wunderground()),
+                         Wunderground().normalize(loads(self.body)))
+
+    def test_records_only_for_forecasts(self):
+        body = merge_features(load_fixtures(), ["conditions"])
+        self.assertIs(weather.pack_records(Wunderground(), body), None)
+        self.assertIs(weather.pack_records(Wunderground(), b"[]"), None)
+
+    def test_other_formats(self):
+        """
+        Test that entries written before bodies were compressed are still
+        read, and ones with another dictionary are misses
+        """
+        path = self.cache.path_for(URL)
+        with open(path, 'wb') as entry_file:
+            entry_file.write(json.dumps({'url': URL, 'stored_at': 1}).encode('utf-8') + b"\n")
+            entry_file.write(self.body)
+        self.assertEqual(self.cache.lookup(URL).body, self.body)
+
+        with open(path, 'wb') as entry_file:
+            entry_file.write(json.dumps({'url': URL, 'encoding': "deflate-0"}).encode('utf-8') +
+                             b"\n" + packing.compress(self.body))
+        self.assertIs(self.cache.lookup(URL), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import tempfile
+import shutil
+import os
+
+from weatherpy import prefetch
+from weatherpy.locations import LocationIndex
+from weather_mock import MockIO, MockSettings, MockSession
+
+
+class TestPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.directory, "locations.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_watch_list_urls(self):
+        settings = MockSettings(cache_dir=self.directory, location_index=self.index_path, watch=[
+            "48104",
+            {"location": "MI/Detroit", "features": ["now", "hourly"], "split": True},
+        ])
+        scheduler = prefetch.PrefetchScheduler(settings)
+        urls = sorted(job.api_url for _, _, job in scheduler.queue)
+        self.assertEqual(urls, [
+            "http://api.wunderground.com/api/1234/alerts/q/MI/Detroit.json",
+            "http://api.wunderground.com/api/1234/conditions/alerts/q/48104.json",
+            "http://api.wunderground.com/api/1234/conditions/q/MI/Detroit.json",
+            "http://api.wunderground.com/api/1234/hourly/q/MI/Detroit.json",
+        ])
+
+    def test_refresh(self):
+        """
+        Test that refreshed responses land in the cache and the next
+        refresh happens shortly before they expire
+        """
+        settings = MockSettings(cache_dir=self.directory, location_index=self.index_path, watch=["48104"])
+        session = MockSession(b'{"response": {}}')
+        scheduler = prefetch.PrefetchScheduler(settings, session)
+        job = scheduler.queue[0][2]
+
+        delay = scheduler.refresh(job)
+        self.assertTrue(job.ttl * 0.85 <= delay < job.ttl)
+        self.assertEqual(session.urls, [job.api_url])
+        self.assertEqual(scheduler.cache.get(job.api_url), b'{"response": {}}')
+
+    def test_resolved_locations(self):
+        """
+        Test that jobs warm the urls of learned locations, the ones regular
+        calls read, and pick up locations learned after they were made
+        """
+        LocationIndex(self.index_path).remember("wunderground:48104", "zmw:48104.1.99999")
+        settings = MockSettings(cache_dir=self.directory, location_index=self.index_path,
+                                watch=["48104", "MI/Detroit"])
+        session = MockSession(b'{"response": {}}')
+        scheduler = prefetch.PrefetchScheduler(settings, session)
+        jobs = dict((job.location, job) for _, _, job in scheduler.queue)
+        self.assertEqual(jobs["48104"].api_url,
+                         "http://api.wunderground.com/api/1234/conditions/alerts/q/zmw:48104.1.99999.json")
+
+        LocationIndex(self.index_path).remember("wunderground:mi/detroit", "zmw:48201.1.99999")
+        scheduler.refresh(jobs["MI/Detroit"])
+        self.assertEqual(session.urls, [
+            "http://api.wunderground.com/api/1234/conditions/alerts/q/zmw:48201.1.99999.json"])
+
+    def test_backoff(self):
+        settings = MockSettings(cache_dir=self.directory, location_index=self.index_path, watch=["48104"])
+        scheduler = prefetch.PrefetchScheduler(settings, MockSession(error=IOError("timed out")),
+                                               out=MockIO())
+        job = scheduler.queue[0][2]
+
+        delays = [scheduler.refresh(job) for _ in range(3)]
+        self.assertEqual(job.failures, 3)
+        self.assertTrue(delays[0] <= prefetch.MIN_BACKOFF)
+        self.assertTrue(delays[2] >= 2 * prefetch.MIN_BACKOFF)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ import sys
 import os
 
 from weather_mock import MockArgs, MockIO
+from weatherpy.records import HourlyPoint, ForecastDay
 
 class TestPrinterFunctions(unittest.TestCase):
     def setUp(self):
@@ -98,10 +99,33 @@ class TestPrinterFunctions(unittest.TestCase):
                  'weather': weather, 'wind_string': wind, 'relative_humidity': humidity }
 
     def test_print_forecast(self):
-        pass
+        printer = weather.ResultPrinter(self.spy, settings=weather.Settings(MockArgs(units="english")))
+        printer.print_forecast([
+            ForecastDay(1431216000, "May", 9, "Sat", "Partly Cloudy", 20, 79, 26, 53, 12, 0, 0, "North", 82),
+            ForecastDay(1431302400, "May", 10, "Sun", "Chance of a Thunderstorm", 40, 70, 21, 47, 8, 14, 22, "West", 57),
+        ])
+        self.assertEqual("".join(self.spy.captured_out).splitlines(), [
+            "Weather Forecast:",
+            u"Date                     Condition  Chance of Rain   Temp (Hi/Lo)        Wind  Humidity",
+            "-" * 94,
+            u"May 9                Partly Cloudy             20%  79 \xb0F / 53 \xb0F  ~0 mph N         82%",
+            u"May 10    Chance of a Thunderstorm             40%  70 \xb0F / 47 \xb0F  ~14mph W         57%",
+        ])
 
     def test_print_hourly(self):
-        pass
+        printer = weather.ResultPrinter(self.spy, settings=weather.Settings(MockArgs(units="metric")))
+        printer.settings.settings['time'] = "military"
+        printer.print_hourly([
+            HourlyPoint(1431212400, "May", 9, 19, 0, "7:00 PM", 61, 16, 20, "Clear"),
+            HourlyPoint(1431216000, "May", 9, 20, 0, "8:00 PM", 58, 14, 100, "Rain"),
+        ])
+        self.assertEqual("".join(self.spy.captured_out).splitlines(), [
+            "36 Hour Hourly Forecast:",
+            "Date       Hour  Temperature  Chance of Rain  Weather",
+            "-" * 59,
+            u"May 9     19:00        16 \xb0C             20%    Clear",
+            u"May 9     20:00        14 \xb0C            100%     Rain",
+        ])
 
     def test_print_weather_data(self):
         pass
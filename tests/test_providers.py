@@ -0,0 +1,87 @@
+import unittest
+import tempfile
+import shutil
+import json
+
+import weatherpy.weather as weather
+from weatherpy import providers, mockserver
+from weather_mock import MockIO, MockArgs, MockSettings
+
+
+class TestProviders(unittest.TestCase):
+    def setUp(self):
+        self.fixtures = mockserver.load_fixtures()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_provider(self):
+        self.assertTrue(isinstance(providers.get_provider(MockSettings()), providers.Wunderground))
+        self.assertTrue(isinstance(providers.get_provider(MockSettings(provider="open-meteo")),
+                                   providers.OpenMeteo))
+        self.assertRaises(providers.ProviderError, providers.get_provider,
+                          MockSettings(provider="nope"))
+
+    def test_open_meteo_url(self):
+        settings = MockSettings(provider="open-meteo")
+        url = weather.make_api_url(MockArgs(location=["42.27,", "-83.73"], hourly=True), settings)
+        self.assertTrue(url.startswith("https://api.open-meteo.com/v1/forecast?latitude=42.27&longitude=-83.73&"))
+        self.assertTrue("&hourly=" in url and "&forecast_hours=36" in url)
+        self.assertFalse("&current=" in url or "&daily=" in url)
+
+        self.assertRaises(providers.ProviderError, weather.make_api_url, MockArgs(), settings)
+        self.assertRaises(providers.ProviderError, weather.make_api_url,
+                          MockArgs(location=["Ann Arbor"]), settings)
+
+    def test_open_meteo_normalize(self):
+        query = "latitude=42.27&longitude=-83.73&current=x&hourly=x&forecast_hours=36"
+        status, body = mockserver.open_meteo_body(self.fixtures['openmeteo'], query)
+        self.assertEqual(status, 200)
+
+        data = providers.OpenMeteo().normalize(json.loads(body.decode('utf-8')))
+        self.assertEqual(sorted(data.keys()), ['alerts', 'current_observation', 'hourly', 'response'])
+        self.assertEqual(data['current_observation']['temp_c'], 16.3)
+        self.assertEqual(data['current_observation']['wind_string'], "From the NW at 4 MPH")
+        self.assertEqual(len(data['hourly']), 36)
+        # 8 PM UTC is 4 PM in the fixture's time zone
+        self.assertEqual(data['hourly'][0][:6], (1431201600, "May", 9, 16, 0, "4:00 PM"))
+
+        status, body = mockserver.open_meteo_body(self.fixtures['openmeteo'], "")
+        self.assertEqual(status, 400)
+        data = providers.OpenMeteo().normalize(json.loads(body.decode('utf-8')))
+        self.assertTrue(data['response']['error']['description'])
+
+    def test_compass_point(self):
+        self.assertEqual(providers.compass_point(0), "North")
+        self.assertEqual(providers.compass_point(350), "North")
+        self.assertEqual(providers.compass_point(200), "SSW")
+        self.assertEqual(providers.compass_point(None), "Variable")
+
+    def test_mock_server(self):
+        """
+        Test that both providers print the weather from the mock server
+        """
+        server = mockserver.MockServer(latency=0.01, fixtures=self.fixtures).start()
+        try:
+            for name, location in (("wunderground", "48104"), ("open-meteo", "42.27,-83.73")):
+                settings = weather.Settings().copy()
+                settings.settings.update(provider=name, cache_dir=self.directory,
+                                         location_index=self.directory + "/locations.json",
+                                         api_root=server.api_root_for(providers.PROVIDERS[name]))
+                args = weather.parse_args(['-anoe', '-u', 'english', '--no-daemon', location])
+                out = MockIO()
+                weather.run(args, settings, out)
+
+                printed = "".join(out.captured_out)
+                self.assertTrue("Weather for" in printed, name)
+                self.assertTrue("36 Hour Hourly Forecast:" in printed, name)
+                self.assertTrue("Weather Forecast:" in printed, name)
+            self.assertEqual(server.requests, 2)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import unittest
+import tempfile
+import shutil
+import os
+
+import weatherpy.weather as weather
+from weatherpy import quota
+from weatherpy.cache import ResponseCache
+from weatherpy.providers import Wunderground, OpenMeteo
+from weather_mock import MockIO, MockSettings, MockSession
+
+URL = "http://api.wunderground.com/api/1234/conditions/q/48104.json"
+
+
+class TestQuota(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, quota.QUOTA_FILE)
+        self.now = [1000000.0]
+        self.sleeps = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_quota(self, budgets, selection="least-used", wait=0):
+        return quota.Quota(self.path, "wunderground", budgets, selection, wait,
+                           clock=lambda: self.now[0], sleep=self.sleeps.append)
+
+    def test_token_bucket(self):
+        limiter = self.make_quota([quota.KeyBudget("a", 2, 100)])
+        self.assertEqual(limiter.take().key, "a")
+        self.assertEqual(limiter.take().key, "a")
+        self.assertEqual(limiter.take(), None)
+        self.assertEqual(limiter.wait_time(), 30)
+
+        self.now[0] += 30
+        self.assertEqual(limiter.wait_time(), 0)
+        self.assertEqual(limiter.take().key, "a")
+
+    def test_shared_between_processes(self):
+        """
+        Test that requests spent by one Quota count against another
+        reading the same state file
+        """
+        self.make_quota([quota.KeyBudget("a", 1, 100)]).take()
+        self.assertEqual(self.make_quota([quota.KeyBudget("a", 1, 100)]).take(), None)
+
+    def test_per_day(self):
+        limiter = self.make_quota([quota.KeyBudget("a", 10, 2)])
+        limiter.take()
+        limiter.take()
+        self.now[0] += 600
+        self.assertEqual(limiter.take(), None)
+        self.assertTrue(limiter.wait_time() > 600)
+
+        self.now[0] += limiter.wait_time()
+        self.assertNotEqual(limiter.take(), None)
+
+    def test_selection(self):
+        budgets = [quota.KeyBudget("a", 10, 100), quota.KeyBudget("b", 10, 100)]
+        limiter = self.make_quota(budgets, "round-robin")
+        self.assertEqual([limiter.take().key for _ in range(3)], ["a", "b", "a"])
+
+        limiter = self.make_quota(budgets, "least-used")
+        self.assertEqual(limiter.take().key, "b")
+
+    def test_refund(self):
+        limiter = self.make_quota([quota.KeyBudget("a", 1, 100)])
+        limiter.refund(limiter.take())
+        self.assertEqual(limiter.usage()[0][1]['total'], 0)
+        self.assertNotEqual(limiter.take(), None)
+
+    def test_keyless_budget(self):
+        """
+        Test that a provider without an API key still gets its requests
+        """
+        limiter = quota.Quota.from_settings(MockSettings(cache_dir=self.directory, quota={}),
+                                            OpenMeteo())
+        self.assertEqual(limiter.take().key, None)
+
+    def test_acquire_waits(self):
+        limiter = self.make_quota([quota.KeyBudget("a", 1, 100)], wait=120)
+        limiter.take()
+        self.assertRaises(quota.QuotaError, self.make_quota(
+            [quota.KeyBudget("a", 1, 100)], wait=30).acquire)
+
+        def sleep(seconds):
+            self.sleeps.append(seconds)
+            self.now[0] += seconds
+        limiter.sleep = sleep
+        self.assertEqual(limiter.acquire().key, "a")
+        self.assertEqual(self.sleeps, [60])
+
+    def test_from_settings(self):
+        settings = MockSettings(cache_dir=self.directory, api_key="1234",
+                                quota={'per_day': 50, 'selection': "round-robin"},
+                                api_keys=["a", {'key': "b", 'per_minute': 5}])
+        limiter = quota.Quota.from_settings(settings, Wunderground())
+        self.assertEqual([(budget.key, budget.per_minute, budget.per_day)
+                          for budget in limiter.budgets], [("a", 10, 50), ("b", 5, 50)])
+        self.assertEqual(limiter.selection, "round-robin")
+
+        # Requests aren't limited unless asked to
+        settings = MockSettings(cache_dir=self.directory, api_key="1234")
+        self.assertEqual(quota.Quota.from_settings(settings, Wunderground()), None)
+        settings.settings['quota'] = {}
+        self.assertEqual([(budget.key, budget.per_minute, budget.per_day) for budget in
+                          quota.Quota.from_settings(settings, Wunderground()).budgets],
+                         [("1234", 10, 500)])
+
+        # Another server, like the mock server, isn't the provider's API
+        settings = MockSettings(api_root="http://127.0.0.1:8080/api/")
+        self.assertEqual(quota.Quota.from_settings(settings, Wunderground()), None)
+
+    def test_report(self):
+        settings = MockSettings(cache_dir=self.directory, api_key="abcdef123456", quota={})
+        quota.Quota.from_settings(settings, Wunderground()).take()
+        out = MockIO()
+        quota.print_report(settings, out)
+        output = "".join(out.captured_out)
+        self.assertTrue("abcd********" in output)
+        self.assertTrue("abcdef123456" not in output)
+
+
+class TestFetchWithQuota(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = MockSettings(cache_dir=self.directory, api_key="1234",
+                                     api_keys=["1234", "5678"],
+                                     quota={'per_minute': 1, 'wait': 0})
+        self.args = weather.parse_args([])
+        self.session = MockSession()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_keys_rotate(self):
+        self.args.no_cache = True
+        weather.fetch_response(URL, self.args, self.settings, self.session)
+        weather.fetch_response(URL, self.args, self.settings, self.session)
+        self.assertEqual(self.session.urls, [URL, URL.replace("1234", "5678")])
+        # Both keys are spent now, and --no-cache won't take a stale response
+        self.assertRaises(quota.QuotaError, weather.fetch_response, URL, self.args,
+                          self.settings, self.session)
+
+    def test_stale_when_used_up(self):
+        ResponseCache(self.directory).put(URL, b'{"old": true}')
+        self.args.max_age = -1
+        limiter = quota.Quota.from_settings(self.settings, Wunderground())
+        limiter.take()
+        limiter.take()
+
+        entry = weather.fetch_response(URL, self.args, self.settings, self.session)
+        self.assertEqual(entry.body, b'{"old": true}')
+        self.assertTrue(entry.meta['stale'])
+        self.assertEqual(self.session.urls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
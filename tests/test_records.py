@@ -0,0 +1,52 @@
+import unittest
+
+from weatherpy import records
+
+
+class TestRecords(unittest.TestCase):
+    def test_to_number(self):
+        self.assertEqual(records.to_number("45"), 45)
+        self.assertEqual(records.to_number("-3"), -3)
+        self.assertEqual(records.to_number("61.3"), 61.3)
+        self.assertEqual(records.to_number(20), 20)
+        self.assertEqual(records.to_number(""), "")
+        self.assertEqual(records.to_number("N/A"), "N/A")
+
+    def test_normalize_response(self):
+        """
+        Test that the forecast subtrees are replaced by records with
+        numeric fields
+        """
+        data = {
+            'response': {},
+            'hourly_forecast': [{
+                'FCTTIME': {'epoch': '1431212400', 'mon_abbrev': 'May', 'mday': '9',
+                            'hour_padded': '07', 'min': '00', 'civil': '7:00 AM'},
+                'temp': {'english': '61', 'metric': '16'},
+                'pop': '20', 'condition': 'Clear',
+            }],
+            'forecast': {
+                'txt_forecast': {},
+                'simpleforecast': {'forecastday': [{
+                    'date': {'epoch': '1431216000', 'monthname': 'May', 'day': 9,
+                             'weekday_short': 'Sat'},
+                    'conditions': 'Partly Cloudy', 'pop': 20,
+                    'high': {'fahrenheit': '79', 'celsius': '26'},
+                    'low': {'fahrenheit': '53', 'celsius': '12'},
+                    'avewind': {'mph': 5, 'kph': 8, 'dir': 'NW'},
+                    'avehumidity': 82,
+                }]},
+            },
+        }
+
+        normalized = records.normalize_response(data)
+        self.assertEqual(sorted(normalized.keys()), ['forecast', 'hourly', 'response'])
+        self.assertEqual(normalized['hourly'], [records.HourlyPoint(
+            1431212400, 'May', 9, 7, 0, '7:00 AM', 61, 16, 20, 'Clear')])
+        self.assertEqual(normalized['hourly'][0].weekday, None)
+        self.assertEqual(normalized['forecast'], [records.ForecastDay(
+            1431216000, 'May', 9, 'Sat', 'Partly Cloudy', 20, 79, 26, 53, 12, 5, 8, 'NW', 82)])
+
+
+if __name__ == "__main__":
+    unittest.main()
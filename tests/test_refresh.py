@@ -0,0 +1,169 @@
+import unittest
+import tempfile
+import shutil
+import time
+import json
+import os
+
+import weatherpy.weather as weather
+from weatherpy import refresh
+from weatherpy.cache import ResponseCache
+from weatherpy.transport import HTTPError
+from weather_mock import MockIO, MockSettings, MockSession
+
+URL = "http://api.wunderground.com/api/1234/conditions/alerts/q/48104.json"
+BODY = b'{"new": true}'
+
+
+class TestStaleResponses(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = MockSettings(cache_dir=self.directory, api_key="1234")
+        self.cache = ResponseCache(self.directory)
+        self.args = weather.parse_args([])
+        self.err = MockIO()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def store_old(self, age=600):
+        """
+        Stores a response fetched age seconds ago
+        """
+        self.cache.put(URL, b'{"old": true}')
+        path = self.cache.path_for(URL)
+        with open(path, 'rb') as entry_file:
+            header, body = entry_file.read().split(b"\n", 1)
+        meta = json.loads(header.decode('utf-8'))
+        meta['stored_at'] -= age
+        with open(path, 'wb') as entry_file:
+            entry_file.write(json.dumps(meta).encode('utf-8') + b"\n" + body)
+
+    def fetch(self, session, **kwargs):
+        return weather.fetch_response(URL, self.args, self.settings, session, self.err, **kwargs)
+
+    def test_stale_while_revalidate(self):
+        self.store_old(600)
+        self.settings.settings['stale_window'] = 3600
+        refreshed = []
+        session = MockSession(BODY)
+
+        entry = self.fetch(session, revalidate=refreshed.append)
+        self.assertEqual(entry.body, b'{"old": true}')
+        self.assertTrue(entry.meta['stale'])
+        self.assertEqual(refreshed, [URL])
+        self.assertEqual(session.urls, [])
+        self.assertEqual("".join(self.err.captured_out),
+                         "weatherpy: refreshing it in the background, "
+                         "showing weather from 10 minutes ago\n")
+
+        # Past the window the call waits for the API again
+        entry = self.fetch(session, revalidate=refreshed.append, stale_window=60)
+        self.assertEqual(entry.body, BODY)
+
+    def test_offline_fallback(self):
+        self.store_old(7200)
+        entry = self.fetch(MockSession(error=IOError("Network is unreachable")))
+        self.assertEqual(entry.body, b'{"old": true}')
+        self.assertTrue(entry.meta['stale'])
+        self.assertTrue("could not reach the API (Network is unreachable)" in
+                        "".join(self.err.captured_out))
+        self.assertTrue("2 hours ago" in "".join(self.err.captured_out))
+
+        self.args.no_cache = True
+        self.assertRaises(IOError, self.fetch, MockSession(error=IOError("down")))
+
+    def test_server_errors_not_served(self):
+        """
+        Test that a server error or a body that isn't JSON is neither
+        cached nor handed to the printer
+        """
+        self.assertRaises(HTTPError, self.fetch, MockSession(b'{"busy": true}', 503))
+        self.assertRaises(HTTPError, self.fetch, MockSession(b'<html>Log in</html>'))
+        self.assertEqual(self.cache.lookup(URL), None)
+
+        self.store_old()
+        entry = self.fetch(MockSession(b'<html>Log in</html>'))
+        self.assertEqual(entry.body, b'{"old": true}')
+
+        # API errors below 500 are described in JSON and printed
+        self.args.no_cache = True
+        entry = self.fetch(MockSession(b'{"error": true, "reason": "bad"}', 400))
+        self.assertEqual(entry.body, b'{"error": true, "reason": "bad"}')
+
+    def test_refresh_process(self):
+        """
+        Test the refresh a stale run starts, which leaves urls refreshed
+        in the meantime alone
+        """
+        self.store_old()
+        session = MockSession(BODY)
+        refresh.main([URL, URL], settings=self.settings, session=session)
+        self.assertEqual(session.urls, [URL])
+        self.assertEqual(self.cache.lookup(URL).body, BODY)
+
+    def test_one_refresh_per_url(self):
+        """
+        Test that stale hits while a refresh is pending don't start
+        another one, and that the urls, api key and all, go over stdin
+        """
+        import io
+        import subprocess
+
+        class FakePopen(object):
+            started = []
+
+            def __init__(self, command, stdin=None, **kwargs):
+                self.stdin = io.BytesIO()
+                self.stdin.close = lambda: None
+                FakePopen.started.append((command, self.stdin))
+
+        self.store_old(600)
+        self.settings.settings['stale_window'] = 3600
+        popen, subprocess.Popen = subprocess.Popen, FakePopen
+        try:
+            for _ in range(2):
+                self.assertTrue(self.fetch(MockSession(BODY)).meta['stale'])
+        finally:
+            subprocess.Popen = popen
+
+        self.assertEqual(len(FakePopen.started), 1)
+        command, stdin = FakePopen.started[0]
+        self.assertFalse(any("1234" in part for part in command))
+        self.assertEqual(stdin.getvalue(), (URL + "\n").encode('utf-8'))
+
+    def test_describe_age(self):
+        self.assertEqual(weather.describe_age(30), "less than a minute ago")
+        self.assertEqual(weather.describe_age(61), "1 minute ago")
+        self.assertEqual(weather.describe_age(3 * 3600), "3 hours ago")
+
+
+class TestDaemonStale(unittest.TestCase):
+    def setUp(self):
+        from weatherpy import daemon
+
+        self.directory = tempfile.mkdtemp()
+        settings = weather.Settings().copy()
+        settings.settings.update(cache_dir=self.directory, history=False, stale_window=3600,
+                                 location_index=os.path.join(self.directory, "locations.json"))
+        self.daemon = daemon.WeatherDaemon(settings=settings)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_served_while_refreshed(self):
+        args = weather.parse_args(['-n'])
+        api_url = weather.make_api_url(args, self.daemon.settings)
+        self.daemon.responses[api_url] = (time.time() - 900, {'old': True})
+        refreshed = []
+        self.daemon.revalidate = lambda url, settings: refreshed.append(url)
+
+        err = MockIO()
+        self.assertEqual(self.daemon.get_decoded(api_url, args, self.daemon.settings, err),
+                         {'old': True})
+        self.assertEqual(refreshed, [api_url])
+        self.assertTrue("15 minutes ago" in "".join(err.captured_out))
+
+
+if __name__ == "__main__":
+    unittest.main()
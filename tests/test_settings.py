@@ -3,6 +3,8 @@ import weatherpy.weather as weather
 import os
 import shutil
 import json
+from weatherpy import settings
+from weatherpy.settings import get_overrides
 from weather_mock import MockArgs
 
 class TestSettingsFunctions(unittest.TestCase):
@@ -74,6 +76,25 @@ class TestSettingsFunctions(unittest.TestCase):
         self.assertEqual(s.units, "english")
         self.assertEqual(s.api_key, "12341234")
 
+    def test_settings_cache(self):
+        """
+        Test that the conf file is parsed once per change, and that
+        instances don't share their overrides
+        """
+        self._write_conf("12341234", "metric")
+        first = weather.Settings(MockArgs(units="english"))
+        second = weather.Settings()
+        self.assertEqual(first.units, "english")
+        self.assertEqual(second.units, "metric")
+        self.assertEqual(settings._loaded[self.conf_path][1], second.settings)
+
+        self._write_conf("1234", "english")
+        self.assertEqual(weather.Settings().api_key, "1234")
+
+    def test_get_overrides(self):
+        self.assertEqual(get_overrides(MockArgs(units="metric")), {'units': "metric"})
+        self.assertEqual(get_overrides({'time': "military", 'units': None}),
+                         {'time': "military"})
 
 
 if __name__ == "__main__":
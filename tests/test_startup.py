@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+from weatherpy.cache import ResponseCache
+from weatherpy.mockserver import load_fixtures, merge_features
+
+# Modules the weatherpy command must not pay for on every run, they're
+# only imported by the code paths that need them
+LAZY_MODULES = ['argparse', 'socket', 'http.client', 'tempfile', 'hashlib', 'threading',
+                'concurrent.futures', 'requests', 'numpy', 'orjson']
+
+# The wall-clock budgets below depend on the machine, so they're only
+# checked when this is set in the environment, e.g. on a quiet benchmark box
+TIMING_TESTS = bool(os.environ.get("WEATHERPY_TIMING_TESTS"))
+
+# Microseconds importing weatherpy.weather may take, generous enough for
+# slow machines while still catching an eagerly imported dependency
+IMPORT_BUDGET = 150000
+
+# Seconds a whole weatherpy -n run answered from the cache may take,
+# interpreter startup included
+CACHE_HIT_BUDGET = 0.5
+
+# Nothing listens on the discard port, a run that misses the cache fails
+API_ROOT = "http://127.0.0.1:9/api/"
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_import_times(output):
+    """
+    Returns {module name: cumulative import time in us} from the output
+    of python -X importtime
+    """
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:
+            continue
+    return times
+
+
+def import_times(module):
+    """
+    Returns the import times of a fresh interpreter importing module
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    output = subprocess.check_output(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        stderr=subprocess.STDOUT, env=env).decode('utf-8')
+    return parse_import_times(output)
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "-X importtime needs python 3.7")
+class TestStartup(unittest.TestCase):
+    def test_no_eager_imports(self):
+        times = import_times("weatherpy.weather")
+        self.assertIn("weatherpy.weather", times)
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, times)
+
+    @unittest.skipUnless(TIMING_TESTS, "set WEATHERPY_TIMING_TESTS to check timings")
+    def test_import_budget(self):
+        times = import_times("weatherpy.weather")
+        self.assertLess(times["weatherpy"], IMPORT_BUDGET)
+
+    def test_cache_hit_run(self):
+        """
+        Test a whole weatherpy -n run answered from the cache, as a status
+        bar makes it: it never loads the HTTP client, and stays within budget
+        when timings are checked
+        """
+        home = tempfile.mkdtemp()
+        try:
+            cache_dir = os.path.join(home, "cache")
+            with open(os.path.join(home, ".weatherrc"), "w") as weatherrc:
+                json.dump({'api_key': "1234", 'api_root': API_ROOT, 'units': "english",
+                           'cache_dir': cache_dir,
+                           'location_index': os.path.join(cache_dir, "locations.json")},
+                          weatherrc)
+            # The first run learns the station id, which later runs ask for
+            body = merge_features(load_fixtures(), ["conditions", "alerts"])
+            for location in ("48104", "zmw:48104.1.99999"):
+                ResponseCache(cache_dir).put(
+                    API_ROOT + "1234/conditions/alerts/q/%s.json" % location, body)
+
+            env = dict(os.environ, PYTHONPATH=ROOT_DIR, HOME=home,
+                       XDG_CACHE_HOME=os.path.join(home, ".cache"))
+            command = [sys.executable, "-m", "weatherpy", "-n", "--no-daemon", "48104"]
+            started = time.time()
+            output = subprocess.check_output(command, env=env).decode('utf-8')
+            elapsed = time.time() - started
+            self.assertTrue(output.startswith("Weather for Ann Arbor, MI"))
+            if TIMING_TESTS:
+                self.assertLess(elapsed, CACHE_HIT_BUDGET)
+
+            times = parse_import_times(subprocess.check_output(
+                [sys.executable, "-X", "importtime"] + command[1:],
+                stderr=subprocess.STDOUT, env=env).decode('utf-8'))
+            for module in ('socket', 'http.client', 'threading', 'tempfile'):
+                self.assertNotIn(module, times)
+        finally:
+            shutil.rmtree(home)
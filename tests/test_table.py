@@ -0,0 +1,62 @@
+# -*- encoding: utf-8 -*-
+import unittest
+
+from weatherpy import table
+from weather_mock import MockIO
+
+TABLE = [
+    ["Date", "Condition", "Chance of Rain"],
+    ["May 9", "Partly Cloudy", "20%"],
+    ["May 10", "Chance of a Thunderstorm", "40%"],
+]
+
+RENDERED = (
+    "Date                    Condition  Chance of Rain\n"
+    "-----------------------------------------------------\n"
+    "May 9               Partly Cloudy             20%\n"
+    "May 10   Chance of a Thunderstorm             40%\n"
+)
+
+
+class TestTable(unittest.TestCase):
+    def test_display_width(self):
+        self.assertEqual(table.display_width("Clear"), 5)
+        self.assertEqual(table.display_width(u"61 \xb0F"), 5)
+        self.assertEqual(table.display_width(u"晴れ"), 4)
+        self.assertEqual(table.display_width(u"Café"), 4)
+
+    def test_render_table(self):
+        rows = [list(row) for row in TABLE]
+        self.assertEqual(table.render_table(rows), RENDERED)
+        # The caller's table is left alone
+        self.assertEqual(rows, TABLE)
+
+    def test_wide_characters_align(self):
+        lines = table.render_table([["Date", "Weather"],
+                                    ["May 9", u"晴れ"],
+                                    ["May 10", "Clear"]]).splitlines()
+        self.assertEqual(lines[2], u"May 9       晴れ")
+        self.assertEqual(lines[3], u"May 10     Clear")
+
+    def test_stream_table(self):
+        """
+        Test that streaming writes the same table one chunk at a time
+        """
+        spy = MockIO()
+        table.stream_table(spy, TABLE[0], iter(TABLE[1:]), widths=[6, 24, 14], chunk_rows=1)
+        self.assertEqual(len(spy.captured_out), 3)
+        self.assertEqual("".join(spy.captured_out), RENDERED)
+
+    def test_stream_table_overflow(self):
+        """
+        Test that rows wider than the widths fixed by the first chunk
+        overflow instead of realigning the table
+        """
+        spy = MockIO()
+        table.stream_table(spy, TABLE[0], iter(TABLE[1:]), chunk_rows=1)
+        self.assertEqual("".join(spy.captured_out).splitlines()[3],
+                         "May 10Chance of a Thunderstorm             40%")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import tempfile
+import shutil
+import json
+import os
+
+import weatherpy.weather as weather
+from weatherpy import trace
+from weatherpy.mockserver import load_fixtures, merge_features
+from weather_mock import MockIO
+
+
+class TestTrace(unittest.TestCase):
+    def tearDown(self):
+        trace.stop()
+
+    def test_off_by_default(self):
+        self.assertIs(trace.current(), None)
+        self.assertIs(trace.span("decode"), trace.span("print.table"))
+
+    def test_spans_of_a_render(self):
+        """
+        Test that decoding, normalizing and every printed section is timed
+        """
+        tracer = trace.start()
+        args = weather.parse_args(['-anoe', '-u', 'english'])
+        settings = weather.Settings(args)
+        body = merge_features(load_fixtures(), ["conditions", "alerts", "hourly", "forecast10day"])
+        weather.print_weather_data(body, args, settings, MockIO())
+
+        counters = tracer.snapshot()
+        for name in ("settings.load", "decode", "normalize", "print.alerts",
+                     "print.conditions", "print.hourly", "print.forecast"):
+            self.assertIn(name, counters)
+        self.assertEqual(counters["print.table"][0], 2)
+
+    def test_chrome_trace(self):
+        directory = tempfile.mkdtemp()
+        try:
+            tracer = trace.start()
+            with trace.span("http.connect", host="example.com"):
+                pass
+            path = os.path.join(directory, "trace.json")
+            trace.finish(False, path, None)
+            self.assertIs(trace.current(), None)
+
+            with open(path) as trace_file:
+                events = json.load(trace_file)['traceEvents']
+            self.assertEqual(len(events), 1)
+            self.assertEqual((events[0]['name'], events[0]['cat'], events[0]['ph']),
+                             ("http.connect", "http", "X"))
+            self.assertEqual(events[0]['args'], {'host': "example.com"})
+        finally:
+            shutil.rmtree(directory)
+
+    def test_counters_only(self):
+        tracer = trace.start(keep_events=False)
+        for _ in range(3):
+            with trace.span("fetch"):
+                pass
+        self.assertEqual(tracer.events, [])
+        self.assertEqual(tracer.snapshot()["fetch"][0], 3)
+
+        out = MockIO()
+        trace.print_summary(tracer.snapshot(), out)
+        output = "".join(out.captured_out)
+        self.assertTrue(output.startswith("Timings:"))
+        self.assertTrue("fetch" in output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import socket
+import threading
+import tempfile
+import shutil
+import gzip
+import io
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+import weatherpy.weather as weather
+from weatherpy import transport
+from weatherpy.cache import ResponseCache
+from weather_mock import MockArgs, MockSettings
+
+BODY = b'{"response": {"version": "0.1"}}'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers.items())))
+        if server.failures:
+            server.failures -= 1
+            self._reply(503, b"")
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self._reply(304, b"")
+            return
+
+        body = BODY
+        headers = {"ETag": '"v1"'}
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            buf = io.BytesIO()
+            with gzip.GzipFile(fileobj=buf, mode="wb") as gz:
+                gz.write(body)
+            body = buf.getvalue()
+            headers["Content-Encoding"] = "gzip"
+        self._reply(200, body, headers)
+
+    def _reply(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestTransport(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.server.requests = []
+        self.server.failures = 0
+        self.url = "http://127.0.0.1:%d/api/1234/conditions/q/48104.json" % self.server.server_address[1]
+        thread = threading.Thread(target=self.server.serve_forever, args=(0.01,))
+        thread.daemon = True
+        thread.start()
+        self.directory = tempfile.mkdtemp()
+        self.transport = transport.Transport(sleep=lambda seconds: None)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def test_split_url(self):
+        self.assertEqual(transport.split_url("http://example.com/api/x.json?a=1"),
+                         ("http", "example.com", 80, "/api/x.json?a=1"))
+        self.assertEqual(transport.split_url("https://example.com:8443"),
+                         ("https", "example.com", 8443, "/"))
+
+    def test_gzip_and_keep_alive(self):
+        """
+        Test that gzipped bodies are decoded and the connection is reused
+        """
+        for _ in range(3):
+            response = self.transport.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, BODY)
+            self.assertEqual(response.headers['etag'], '"v1"')
+
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(self.transport._idle[("http", "127.0.0.1", self.server.server_address[1])]), 1)
+
+    def test_retries(self):
+        delays = []
+        self.transport.sleep = delays.append
+        self.server.failures = 2
+        self.assertEqual(self.transport.get(self.url).status_code, 200)
+        self.assertEqual(delays, [transport.BACKOFF_FACTOR, 2 * transport.BACKOFF_FACTOR])
+
+        self.server.failures = 5
+        self.assertEqual(self.transport.get(self.url).status_code, 503)
+
+    def test_connection_errors(self):
+        # A port nothing listens on
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        self.assertRaises(IOError, self.transport.get, "http://127.0.0.1:%d/" % port)
+
+    def test_conditional_request(self):
+        """
+        Test that a stale response is revalidated instead of downloaded again
+        """
+        settings = MockSettings(cache_dir=self.directory)
+        args = MockArgs()
+        args.no_cache = False
+        args.max_age = None
+        entry = weather.fetch_response(self.url, args, settings, self.transport)
+        self.assertEqual(entry.body, BODY)
+
+        args.max_age = -1
+        entry = weather.fetch_response(self.url, args, settings, self.transport)
+        self.assertEqual(entry.body, BODY)
+        self.assertEqual(self.server.requests[-1][1].get("If-None-Match"), '"v1"')
+        self.assertEqual(ResponseCache(self.directory).lookup(self.url).meta['etag'], '"v1"')
+
+
+if __name__ == "__main__":
+    unittest.main()
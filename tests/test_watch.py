@@ -0,0 +1,75 @@
+import unittest
+import tempfile
+import shutil
+import os
+
+import weatherpy.weather as weather
+from weatherpy import watch
+from weatherpy.mockserver import FIXTURE_DIR
+from weather_mock import MockSession
+
+
+class TestScreen(unittest.TestCase):
+    def test_redraws_changed_lines(self):
+        screen = watch.Screen()
+        self.assertEqual(screen.update(["a", "b", "c"]), watch.HOME_AND_CLEAR + "a\nb\nc\n")
+        self.assertEqual(screen.update(["a", "b", "c"]), "")
+        self.assertEqual(screen.update(["a", "x", "c"]),
+                         "\x1b[2;1Hx" + watch.CLEAR_LINE + "\x1b[4;1H")
+        self.assertEqual(screen.update(["a", "x", "c", "d"]),
+                         "\x1b[4;1Hd" + watch.CLEAR_LINE + "\x1b[5;1H")
+        self.assertEqual(screen.update(["a"]), "\x1b[2;1H" + watch.CLEAR_BELOW)
+
+    def test_width(self):
+        screen = watch.Screen(width=3)
+        screen.update(["abcdef"])
+        self.assertEqual(screen.lines, ["abc"])
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = weather.Settings().copy()
+        self.settings.settings.update(cache_dir=self.directory,
+                                      location_index=os.path.join(self.directory, "locations.json"))
+        with open(os.path.join(FIXTURE_DIR, "conditions.json"), 'rb') as fixture:
+            self.session = MockSession(fixture.read())
+        self.out = watch.Frame()
+        self.sleeps = []
+        args = weather.parse_args(['-n', '-u', 'english', '--watch', '30', '48104'])
+        self.watcher = watch.Watcher(args, self.settings, self.session, self.out,
+                                     sleep=self.sleeps.append, clock=lambda: 100)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_unchanged_frame_not_redrawn(self):
+        """
+        Test that later ticks come from the cache and write nothing when
+        the weather is the same
+        """
+        self.watcher.run(ticks=3)
+        output = "".join(self.out.parts)
+        self.assertEqual(output.count(watch.HOME_AND_CLEAR), 1)
+        self.assertTrue("Ann Arbor, MI" in output)
+        self.assertTrue(output.endswith("\n" + watch.SHOW_CURSOR))
+        # The second tick asks for the station id the first one learned
+        self.assertEqual(self.session.requests, 2)
+        self.assertEqual(self.sleeps, [30, 30])
+
+    def test_error_keeps_frame(self):
+        self.watcher.tick()
+        lines = list(self.watcher.screen.lines)
+
+        self.settings.settings['cache_dir'] = os.path.join(self.directory, "empty")
+        self.session.error = IOError("network is down")
+        self.watcher.tick()
+        self.assertEqual(self.watcher.screen.lines, lines + ["Could not refresh: network is down"])
+
+    def test_parse_args(self):
+        self.assertRaises(SystemExit, weather.parse_args, ['--watch', '0'])
+        self.assertRaises(SystemExit, weather.parse_args, ['--watch', '5', '--format', 'json'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,11 +12,70 @@ class MockIO(object):
         self.captured_out = []
 
 class MockArgs(object):
-    def __init__(self, units=False, api_key="1234"):
+    def __init__(self, units=False, api_key="1234", location=(), now=False,
+                 forecast=False, extended=False, hourly=False, alerts=False):
         self.units = units
         self.api_key = api_key
+        self.location = list(location)
+        self.now = now
+        self.forecast = forecast
+        self.extended = extended
+        self.hourly = hourly
+        self.alerts = alerts
 
     def __iter__(self):
         yield "api_key"
         yield "units"
 
+
+class MockSettings(object):
+    """
+    Settings made of the keyword arguments, api_key is also an attribute
+    like on Settings
+    """
+    def __init__(self, **settings):
+        self.settings = settings
+        self.api_key = settings.get('api_key', "1234")
+
+    def get(self, key, default=None):
+        return self.settings.get(key, default)
+
+class MockResponse(object):
+    def __init__(self, content=b'{"fetched": true}', status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+def url_location(url):
+    """
+    Returns the location queried by a Wunderground api url
+    """
+    return url.rsplit("/q/", 1)[-1][:-len(".json")]
+
+class MockSession(object):
+    """
+    Answers every request with content and status_code, or raises error.
+    content can also be a function of the url, returning the body or
+    raising. Requested urls are logged in urls, and a request for a
+    location in delays waits that many seconds first.
+    """
+    def __init__(self, content=b'{"fetched": true}', status_code=200, error=None, delays=None):
+        self.content = content
+        self.status_code = status_code
+        self.error = error
+        self.delays = delays or {}
+        self.urls = []
+
+    @property
+    def requests(self):
+        return len(self.urls)
+
+    def get(self, url, headers=None):
+        import time
+
+        self.urls.append(url)
+        time.sleep(self.delays.get(url_location(url), 0))
+        if self.error:
+            raise self.error
+        content = self.content(url) if callable(self.content) else self.content
+        return MockResponse(content, self.status_code)
@@ -0,0 +1,4 @@
+# -*- encoding: utf-8 -*-
+from weatherpy.weather import main
+
+main()
@@ -0,0 +1,171 @@
+"""
+Tracks the weather alerts of each location between runs, for
+--alerts-since-last and the alert_command setting.
+
+Every alert is fingerprinted by its type, a hash of its message and when
+it expires, and the fingerprints seen last are kept per location in a
+small JSON index under the cache directory. Comparing a response's
+alerts against it tells which are new, which changed (same type and
+issue time, different message or expiry) and which expired since the
+last run, so only those get printed or handed to the alert command:
+
+    {
+        "alert_command": ["notify-send", "Weather alert"]
+    }
+
+The command, a list of arguments or a string run by the shell, is
+started for every new or changed alert without waiting for it, with
+the alert in WEATHERPY_ALERT_* environment variables.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import hashlib
+from collections import namedtuple
+
+from .cache import WEATHER_CACHE_DIR, FetchLock, load_json_state, save_json_state
+
+ALERTS_FILE = "alerts.json"
+
+NEW = "new"
+CHANGED = "changed"
+EXPIRED = "expired"
+
+# Seconds the index lock is waited for before updating it unlocked
+_LOCK_TIMEOUT = 5
+
+# kind is NEW, CHANGED or EXPIRED. An expired alert only has the type,
+# description and expires it was stored with.
+AlertChange = namedtuple("AlertChange", ["kind", "alert"])
+
+
+def _message_hash(alert):
+    return hashlib.sha1(alert.get('message', "").strip().encode('utf-8')).hexdigest()[:16]
+
+
+def fingerprint(alert):
+    """
+    Returns what identifies an alert's contents: its type, the hash of
+    its message and when it expires
+    """
+    return "{0}:{1}:{2}".format(alert.get('type', ""), _message_hash(alert),
+                                alert.get('expires_epoch') or alert.get('expires', ""))
+
+
+def alert_keys(alerts):
+    """
+    Returns the key each alert is tracked under: its type and when it was
+    issued, which stay the same when the alert is updated or others come
+    and go. Alerts without an issue time are told apart by their message.
+    """
+    keys = []
+    for alert in alerts:
+        identity = "{0}@{1}".format(alert.get('type') or alert.get('description', ""),
+                                    alert.get('date_epoch') or alert.get('date') or
+                                    _message_hash(alert))
+        key, number = identity, 1
+        while key in keys:
+            # The same alert twice in one response
+            number += 1
+            key = "{0}#{1}".format(identity, number)
+        keys.append(key)
+    return keys
+
+
+def location_name(data):
+    return data['current_observation']['display_location']['full']
+
+
+class AlertTracker(object):
+    """
+    The alerts last seen at every location, shared by every weatherpy
+    process on the machine
+    """
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def from_settings(cls, settings):
+        directory = os.path.expanduser(settings.get('cache_dir') or WEATHER_CACHE_DIR)
+        return cls(os.path.join(directory, ALERTS_FILE))
+
+    def update(self, location, alerts):
+        """
+        Remembers the current alerts of a location and returns the
+        AlertChanges since they were last looked at, in the order of
+        alerts with the expired ones last
+        """
+        with FetchLock(self.path + ".lock", _LOCK_TIMEOUT):
+            index = self._load()
+            seen = index.get(location, {})
+            current = {}
+            changes = []
+            for key, alert in zip(alert_keys(alerts), alerts):
+                current[key] = {'fingerprint': fingerprint(alert),
+                                'type': alert.get('type', ""),
+                                'description': alert.get('description', ""),
+                                'expires': alert.get('expires', "")}
+                if key not in seen:
+                    changes.append(AlertChange(NEW, alert))
+                elif seen[key]['fingerprint'] != current[key]['fingerprint']:
+                    changes.append(AlertChange(CHANGED, alert))
+            for key in sorted(set(seen) - set(current)):
+                changes.append(AlertChange(EXPIRED, dict(
+                    (field, seen[key][field]) for field in ('type', 'description', 'expires'))))
+
+            if changes:
+                # Locations without alerts are left out, which keeps the index small
+                if current:
+                    index[location] = current
+                else:
+                    index.pop(location, None)
+                self._save(index)
+            return changes
+
+    def _load(self):
+        return load_json_state(self.path)
+
+    def _save(self, index):
+        # On failure the same alerts get reported once more on the next run
+        save_json_state(self.path, index)
+
+
+def run_command(command, name, change):
+    """
+    Starts the alert command for a new or changed alert without waiting
+    for it to finish
+    """
+    import subprocess
+
+    alert = change.alert
+    env = dict(os.environ,
+               WEATHERPY_ALERT_CHANGE=change.kind,
+               WEATHERPY_ALERT_LOCATION=name,
+               WEATHERPY_ALERT_TYPE=alert.get('type', ""),
+               WEATHERPY_ALERT_DESCRIPTION=alert.get('description', ""),
+               WEATHERPY_ALERT_EXPIRES=alert.get('expires', ""),
+               WEATHERPY_ALERT_MESSAGE=alert.get('message', "").strip())
+    try:
+        with open(os.devnull, 'r+b') as devnull:
+            subprocess.Popen(command, shell=not isinstance(command, list), env=env,
+                             stdin=devnull, stdout=devnull, close_fds=True)
+    except (IOError, OSError) as e:
+        print("weatherpy: could not run the alert_command: {0}".format(e), file=sys.stderr)
+
+
+def track(settings, provider, data):
+    """
+    Returns the AlertChanges of a normalized response's location since it
+    was last tracked, and runs the alert_command for the new and changed ones
+    """
+    name = location_name(data)
+    location = "{0}:{1}".format(provider.name, provider.location_id(data) or name)
+    changes = AlertTracker.from_settings(settings).update(location, data['alerts'])
+
+    command = settings.get('alert_command')
+    if command:
+        for change in changes:
+            if change.kind != EXPIRED:
+                run_command(command, name, change)
+    return changes
@@ -0,0 +1,49 @@
+DEFAULT_WORKERS = 8
+
+
+class FetchError(object):
+    """
+    Stands in for the response of a location that couldn't be fetched
+    """
+    def __init__(self, exception):
+        self.exception = exception
+
+    def __str__(self):
+        return str(self.exception) or self.exception.__class__.__name__
+
+
+def read_locations(path):
+    """
+    Returns the locations listed in a file, one per line. Blank lines
+    and lines starting with '#' are skipped.
+    """
+    locations = []
+    with open(path) as locations_file:
+        for line in locations_file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                locations.append(line)
+    return locations
+
+
+def fetch_all(urls, fetch, workers=DEFAULT_WORKERS):
+    """
+    Calls fetch(url) for every url on a bounded thread pool and yields
+    the results in the order of urls, as soon as each one (and every url
+    before it) is done. A url whose fetch raised yields a FetchError so
+    one bad location doesn't stop the batch.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def guarded_fetch(url):
+        try:
+            return fetch(url)
+        except Exception as e:
+            return FetchError(e)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for result in executor.map(guarded_fetch, urls):
+            yield result
+    finally:
+        executor.shutdown(wait=False)
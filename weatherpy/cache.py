@@ -0,0 +1,399 @@
+import os
+import json
+import time
+import zlib
+import errno
+
+WEATHER_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", "~/.cache"),
+                                 "weatherpy")
+
+# Seconds a response stays fresh, by weather underground feature. A url
+# that combines several features expires with the shortest of them.
+DEFAULT_TTLS = {
+    'conditions': 5 * 60,
+    'alerts': 5 * 60,
+    'hourly': 30 * 60,
+    'forecast': 60 * 60,
+    'forecast10day': 60 * 60,
+}
+
+# Where a running daemon listens, kept here so clients can check for it
+# without importing the daemon's dependencies
+DAEMON_SOCKET = os.path.join(WEATHER_CACHE_DIR, "daemon.sock")
+
+# Upper bound for the whole cache directory, in bytes
+DEFAULT_MAX_SIZE = 8 * 1024 * 1024
+
+# Seconds a process waits for another one fetching the same url before
+# it fetches the url itself
+DEFAULT_LOCK_TIMEOUT = 30
+_LOCK_POLL = 0.05
+
+_ENTRY_SUFFIX = ".entry"
+# Every entry has its own fetch lock file next to it
+_LOCK_SUFFIX = ".lock"
+
+# os.replace is atomic on every platform, os.rename only on posix
+_replace = getattr(os, 'replace', os.rename)
+
+
+def load_json_state(path):
+    """
+    Returns the JSON state file at path, or an empty dict when it's
+    missing or damaged
+    """
+    try:
+        with open(path) as state_file:
+            return json.load(state_file)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def save_json_state(path, state):
+    """
+    Writes a JSON state file that other processes read while it's being
+    replaced: the state goes to a temporary file renamed over path.
+    Returns False when it couldn't be written.
+    """
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(tmp_path, "w") as state_file:
+            json.dump(state, state_file)
+        _replace(tmp_path, path)
+        return True
+    except (IOError, OSError):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+class CacheEntry(object):
+    """
+    A cached API response and the metadata stored with it, and the
+    normalized response packed by packing.pack_response when the cache
+    has it.
+    """
+    def __init__(self, body, meta, records=None):
+        self.body = body
+        self.meta = meta
+        self.records = records
+
+    @property
+    def stored_at(self):
+        return self.meta.get('stored_at', 0)
+
+    @property
+    def age(self):
+        return max(0, time.time() - self.stored_at)
+
+
+class FetchLock(object):
+    """
+    Exclusive lock across processes, held while fetching a url so that
+    concurrent weatherpy calls for it make one request between them: the
+    others wait for the lock and then find the response in the cache.
+
+    Waiting gives up after timeout seconds, and locking is skipped where
+    there's no flock, in both cases the url is simply fetched again.
+    """
+    def __init__(self, path, timeout=DEFAULT_LOCK_TIMEOUT, sleep=time.sleep):
+        self.path = path
+        self.timeout = timeout
+        self.sleep = sleep
+        self.lock_file = None
+
+    def __enter__(self):
+        try:
+            import fcntl
+        except ImportError:
+            return self
+        try:
+            directory = os.path.dirname(self.path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            self.lock_file = open(self.path, 'a')
+        except (IOError, OSError):
+            return self
+
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                # A lock file in use isn't left over, see ResponseCache.evict
+                os.utime(self.path, None)
+                return self
+            except (IOError, OSError) as e:
+                if e.errno not in (errno.EAGAIN, errno.EACCES) or time.time() >= deadline:
+                    break
+            self.sleep(_LOCK_POLL)
+
+        self.lock_file.close()
+        self.lock_file = None
+        return self
+
+    @property
+    def locked(self):
+        return self.lock_file is not None
+
+    def __exit__(self, *exc_info):
+        if self.lock_file is not None:
+            # Closing the file releases the lock
+            self.lock_file.close()
+            self.lock_file = None
+
+
+class ResponseCache(object):
+    """
+    Persistent, size bounded cache of API responses keyed by request url.
+
+    Each response lives in its own file so concurrent weatherpy processes
+    never see a partially written entry: writes go to a temporary file
+    in the cache directory that is then renamed over the entry. A file's
+    mtime is its last use, which is what the LRU eviction sorts on.
+    """
+    def __init__(self, directory=None, ttls=None, max_size=None, lock_timeout=None):
+        self.directory = os.path.expanduser(directory or WEATHER_CACHE_DIR)
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_size = DEFAULT_MAX_SIZE if max_size is None else max_size
+        self.lock_timeout = DEFAULT_LOCK_TIMEOUT if lock_timeout is None else lock_timeout
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+        Builds a cache from the optional cache_* keys of the weatherrc file
+        """
+        return cls(directory=settings.get('cache_dir'),
+                   ttls=settings.get('cache_ttl'),
+                   max_size=settings.get('cache_size'),
+                   lock_timeout=settings.get('cache_lock_timeout'))
+
+    def path_for(self, url):
+        # Entries record their url, so a checksum collision only costs a miss
+        key = url.encode('utf-8')
+        digest = "%08x%08x" % (zlib.crc32(key) & 0xffffffff,
+                               zlib.adler32(key) & 0xffffffff)
+        return os.path.join(self.directory, digest + _ENTRY_SUFFIX)
+
+    def fetch_lock(self, url):
+        """
+        Returns the FetchLock to hold while fetching url, its lock file
+        sits next to the url's entry and goes away with it
+        """
+        return FetchLock(self.path_for(url) + _LOCK_SUFFIX, self.lock_timeout)
+
+    def claim_refresh(self, url):
+        """
+        Returns True when url may be refreshed in the background: it isn't
+        being fetched, and wasn't claimed within the lock timeout. The
+        claim is the time written in the url's lock file.
+        """
+        path = self.path_for(url) + _LOCK_SUFFIX
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None
+        try:
+            self._ensure_directory()
+            with open(path, 'a+') as lock_file:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except (IOError, OSError):
+                        # Being fetched right now
+                        return False
+                lock_file.seek(0)
+                try:
+                    claimed_at = float(lock_file.read() or 0)
+                except ValueError:
+                    claimed_at = 0
+                if abs(time.time() - claimed_at) < self.lock_timeout:
+                    return False
+                lock_file.truncate(0)
+                lock_file.write(repr(time.time()))
+                return True
+        except (IOError, OSError):
+            return True
+
+    def ttl_for(self, url):
+        """
+        Returns how long the response for the url stays fresh, which is
+        the shortest TTL of the features found in its path.
+        """
+        ttls = [self.ttls[part] for part in url.split("/") if part in self.ttls]
+        if not ttls:
+            return min(self.ttls.values())
+        return min(ttls)
+
+    def lookup(self, url):
+        """
+        Returns the CacheEntry stored for url regardless of its age,
+        or None if there isn't one.
+        """
+        from . import packing
+
+        path = self.path_for(url)
+        try:
+            with open(path, 'rb') as entry_file:
+                header = entry_file.readline()
+                data = entry_file.read()
+            meta = json.loads(header.decode('utf-8'))
+        except (IOError, OSError, ValueError):
+            return None
+
+        if meta.get('url') != url:
+            return None
+
+        records = None
+        if 'encoding' in meta:
+            # Stored by another version of weatherpy, with another dictionary
+            if meta['encoding'] != packing.ENCODING:
+                return None
+            body_size = meta.get('body_size', len(data))
+            try:
+                body = packing.decompress(data[:body_size])
+            except zlib.error:
+                return None
+            records = data[body_size:] or None
+        else:
+            body = data
+
+        try:
+            # Mark the entry as recently used for the eviction pass
+            os.utime(path, None)
+        except OSError:
+            pass
+        return CacheEntry(body, meta, records)
+
+    def get(self, url, max_age=None):
+        """
+        Returns the cached body for url if it is younger than max_age
+        (defaults to the url's TTL), otherwise None.
+        """
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+
+        if max_age is None:
+            max_age = self.ttl_for(url)
+        if entry.age > max_age:
+            return None
+        return entry.body
+
+    def put(self, url, body, records=None, **meta):
+        """
+        Atomically stores body as the response for url, compressed, along
+        with its packed records if given, then evicts the least recently
+        used entries if the cache grew past max_size.
+        """
+        import tempfile
+        from . import packing
+
+        compressed = packing.compress(body)
+        meta['url'] = url
+        meta['stored_at'] = time.time()
+        meta['encoding'] = packing.ENCODING
+        meta['body_size'] = len(compressed)
+
+        try:
+            self._ensure_directory()
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except (IOError, OSError):
+            # An unwritable cache shouldn't stop the weather from printing
+            return
+
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(json.dumps(meta).encode('utf-8') + b"\n")
+                tmp_file.write(compressed)
+                if records:
+                    tmp_file.write(records)
+            _replace(tmp_path, self.path_for(url))
+        except (IOError, OSError):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits
+        in max_size bytes, and the lock files of entries that are gone.
+        """
+        entries = []
+        total = 0
+        for name in self._entry_names():
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+        self._remove_stale_locks()
+
+    def _remove_stale_locks(self):
+        """
+        Removes the lock files whose entry has been evicted, or was never
+        stored because its fetch failed. A lock file younger than the lock
+        timeout may belong to a fetch in progress and is kept; removing one
+        in use at worst lets a later call fetch the url again.
+        """
+        now = time.time()
+        for name in self._lock_names():
+            path = os.path.join(self.directory, name)
+            try:
+                if (os.path.exists(path[:-len(_LOCK_SUFFIX)]) or
+                        now - os.path.getmtime(path) < self.lock_timeout):
+                    continue
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        for name in self._entry_names() + self._lock_names():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _entry_names(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [name for name in names if name.endswith(_ENTRY_SUFFIX)]
+
+    def _lock_names(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [name for name in names if name.endswith(_ENTRY_SUFFIX + _LOCK_SUFFIX)]
+
+    def _ensure_directory(self):
+        try:
+            os.makedirs(self.directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
@@ -0,0 +1,328 @@
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import errno
+import socket
+import threading
+
+from .cache import DAEMON_SOCKET
+from . import trace
+
+# Number of connections the daemon's warm session keeps open per host
+DAEMON_WORKERS = 16
+
+
+def socket_path():
+    return os.path.expanduser(DAEMON_SOCKET)
+
+
+def forward(args, path=None):
+    """
+    Hands the parsed program arguments to a running daemon and prints
+    the output it rendered, exiting with the daemon's status when the
+    request failed. Returns False when no daemon is listening, in which
+    case the caller should do the work itself.
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        return False
+
+    request = dict(vars(args))
+    if request.get('locations_file'):
+        # The daemon doesn't share our working directory
+        request['locations_file'] = os.path.abspath(request['locations_file'])
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path or socket_path())
+        client.sendall(json.dumps(request).encode('utf-8') + b"\n")
+        client.shutdown(socket.SHUT_WR)
+        response = _read_all(client)
+    except socket.error:
+        return False
+    finally:
+        client.close()
+
+    if not response:
+        return False
+
+    response = json.loads(response.decode('utf-8'))
+    sys.stdout.write(response['out'])
+    sys.stderr.write(response['err'])
+    if response.get('status'):
+        sys.exit(response['status'])
+    return True
+
+
+def _read_all(sock):
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+class WeatherDaemon(object):
+    """
+    Renders weather for other weatherpy processes, keeping the settings,
+    a warm HTTP session and the decoded API responses in memory between
+    requests.
+    """
+    def __init__(self, settings=None, workers=DAEMON_WORKERS):
+        from .settings import Settings
+
+        # Settings given here are used as they are, otherwise every request
+        # picks up the changes made to the weatherrc file since the last one
+        self.reload_settings = settings is None
+        self.workers = workers
+        self.settings = settings or Settings()
+        # url -> (stored_at, decoded and normalized response)
+        self.responses = {}
+        # urls being refreshed in the background
+        self.refreshing = set()
+        self.lock = threading.Lock()
+        self.prefetcher = None
+        self.prefetching = False
+        self.configure(self.settings)
+
+    def configure(self, settings):
+        """
+        Builds the session, cache and location index for settings
+        """
+        from .cache import ResponseCache
+        from .locations import LocationIndex
+        from .transport import Transport
+
+        self.settings = settings
+        self.session = Transport.from_settings(settings, self.workers)
+        self.cache = ResponseCache.from_settings(settings)
+        self.locations = LocationIndex.from_settings(settings)
+        # Decoded with the old key, provider or api_root
+        self.responses.clear()
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.prefetcher = None
+        if self.prefetching:
+            self.start_prefetch()
+
+    def settings_for(self, args):
+        """
+        Returns the settings for a request's arguments, reconfiguring the
+        daemon when the weatherrc file changed since the last request
+        """
+        from .settings import Settings
+
+        if not self.reload_settings:
+            return self.settings.copy(args)
+        # Only reads the file again when its mtime, size or inode changed
+        settings = Settings()
+        with self.lock:
+            if settings.settings != self.settings.settings:
+                self.configure(settings)
+        return settings.copy(args)
+
+    def start_prefetch(self):
+        """
+        Keeps the watch list from the settings warm in the background
+        """
+        from .prefetch import PrefetchScheduler
+
+        self.prefetching = True
+        if self.settings.get('watch'):
+            self.prefetcher = PrefetchScheduler(self.settings, self.session)
+            self.prefetcher.start()
+
+    def handle(self, request):
+        """
+        Runs the program arguments in request and returns the rendered
+        output as a dict with 'out' and 'err' strings, and the 'status'
+        the client exits with.
+        """
+        import argparse
+        from io import StringIO
+        from . import weather
+        from .locations import (resolve as resolve_location, learn as learn_location,
+                                LocationError)
+        from .providers import get_provider, ProviderError
+        from .quota import QuotaError
+
+        args = argparse.Namespace(**request)
+        settings = self.settings_for(args)
+        out = StringIO()
+        err = StringIO()
+        status = 0
+        try:
+            if weather.get_batch_locations(args) is not None or args.split:
+                weather.run(args, settings, out, err, self.session)
+            else:
+                provider = get_provider(settings)
+                query = " ".join(args.location) or None
+                with self.lock:
+                    location, known = resolve_location(provider, self.locations, query, args.pick)
+                api_url = weather.make_api_url(args, settings, location)
+                data = self.get_decoded(api_url, args, settings, err)
+                weather.render_weather_data(data, args, settings, out)
+                if not known:
+                    with self.lock:
+                        learn_location(provider, self.locations, query, data)
+                weather.record_history(settings, provider, query, data)
+        except (ProviderError, LocationError, QuotaError, IOError) as e:
+            # Reported as weather.main reports them without the daemon
+            print(e, file=err)
+            status = 1
+        except Exception as e:
+            print("weatherpy daemon: {0}".format(e), file=err)
+            status = 1
+
+        tracer = trace.current()
+        if getattr(args, 'profile', False) and tracer is not None:
+            trace.print_summary(tracer.snapshot(), err,
+                                "Timings of every request since the daemon started")
+        return {'out': out.getvalue(), 'err': err.getvalue(), 'status': status}
+
+    def get_decoded(self, api_url, args, settings, err=None, stale_window=None):
+        """
+        Returns the normalized API response for api_url, from memory when
+        it is still fresh, or expired less than stale_window seconds ago
+        (the stale_window setting by default) while it's refreshed in the
+        background. See weather.fetch_response.
+        """
+        from . import weather
+        from .providers import get_provider
+
+        max_age = self.cache.ttl_for(api_url) if args.max_age is None else args.max_age
+        if stale_window is None:
+            stale_window = settings.get('stale_window') or 0
+        with self.lock:
+            cached = self.responses.get(api_url)
+        if cached is not None and not args.no_cache:
+            age = time.time() - cached[0]
+            if age <= max_age:
+                return cached[1]
+            if age <= max_age + stale_window:
+                self.revalidate(api_url, settings)
+                weather.note_stale(age, "refreshing it in the background", err)
+                return cached[1]
+
+        entry = weather.fetch_response(api_url, args, settings, self.session, err,
+                                       lambda url: self.revalidate(url, settings),
+                                       stale_window)
+        # Decoded whole as other requests for this url may print other sections
+        data = weather.decode_entry(entry, get_provider(settings))
+        with self.lock:
+            self._prune()
+            self.responses[api_url] = (entry.stored_at, data)
+        return data
+
+    def revalidate(self, api_url, settings):
+        """
+        Refreshes the response for api_url on a background thread, unless
+        it's already being refreshed
+        """
+        import argparse
+
+        with self.lock:
+            if api_url in self.refreshing:
+                return
+            self.refreshing.add(api_url)
+
+        def refresh():
+            try:
+                self.get_decoded(api_url, argparse.Namespace(max_age=None, no_cache=False),
+                                 settings, stale_window=0)
+            except Exception:
+                # The stale response is served until a refresh works
+                pass
+            finally:
+                with self.lock:
+                    self.refreshing.discard(api_url)
+
+        thread = threading.Thread(target=refresh)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _prune(self):
+        """
+        Drops responses that are too old to be served without --max-age
+        """
+        now = time.time()
+        longest_ttl = max(self.cache.ttls.values()) + (self.settings.get('stale_window') or 0)
+        for url, (stored_at, _) in list(self.responses.items()):
+            if now - stored_at > longest_ttl:
+                del self.responses[url]
+
+
+def serve(path=None, daemon=None):
+    """
+    Serves requests from weatherpy clients on a unix domain socket
+    until interrupted.
+    """
+    try:
+        import socketserver
+    except ImportError:
+        import SocketServer as socketserver
+
+    path = path or socket_path()
+    # Running totals of every span, which --profile requests are sent
+    if trace.current() is None:
+        trace.start(keep_events=False)
+    if daemon is None:
+        daemon = WeatherDaemon()
+        daemon.start_prefetch()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            request = json.loads(self.rfile.readline().decode('utf-8'))
+            response = daemon.handle(request)
+            self.wfile.write(json.dumps(response).encode('utf-8'))
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    _prepare_socket_path(path)
+    # Only our own user may talk to the daemon
+    old_umask = os.umask(0o077)
+    try:
+        server = Server(path, Handler)
+    finally:
+        os.umask(old_umask)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _prepare_socket_path(path):
+    """
+    Creates the socket's directory, and removes a socket left behind by
+    a daemon that is no longer running.
+    """
+    try:
+        os.makedirs(os.path.dirname(path))
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+    if not os.path.exists(path):
+        return
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except socket.error:
+        os.remove(path)
+    else:
+        raise RuntimeError("A weatherpy daemon is already listening on " + path)
+    finally:
+        probe.close()
@@ -0,0 +1,85 @@
+import sys
+import json
+
+from . import trace
+
+# orjson parses straight from bytes and is several times faster than the
+# standard library, but takes longer to import than small responses take
+# to decode. It's used for bodies of at least this many bytes.
+ORJSON_MIN_SIZE = 16 * 1024
+
+_orjson = []
+
+
+def get_orjson():
+    """
+    Returns orjson, or None if it isn't installed. Only imported when needed.
+    """
+    if not _orjson:
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+        _orjson.append(orjson)
+    return _orjson[0]
+
+
+def loads(data):
+    """
+    Decodes a JSON API response body without first copying it into a
+    decoded str where the JSON implementation allows it.
+    """
+    orjson = get_orjson() if len(data) >= ORJSON_MIN_SIZE else None
+    if orjson is not None:
+        return orjson.loads(data)
+    if sys.version_info >= (3, 6) or not isinstance(data, bytes):
+        return json.loads(data)
+    return json.loads(data.decode('utf-8'))
+
+
+def make_spec(paths):
+    """
+    Turns a list of key paths such as ('forecast', 'simpleforecast')
+    into a nested dict, where True marks a subtree that is kept whole.
+    """
+    spec = {}
+    for path in paths:
+        node = spec
+        for key in path[:-1]:
+            child = node.get(key)
+            if child is True:
+                break
+            if child is None:
+                child = node[key] = {}
+            node = child
+        else:
+            node[path[-1]] = True
+    return spec
+
+
+def prune(data, spec):
+    """
+    Returns a copy of data with only the subtrees in spec, so the rest of
+    the decoded response can be freed before anything is rendered.
+    """
+    pruned = {}
+    for key, child_spec in spec.items():
+        if key not in data:
+            continue
+        if child_spec is True or not isinstance(data[key], dict):
+            pruned[key] = data[key]
+        else:
+            pruned[key] = prune(data[key], child_spec)
+    return pruned
+
+
+def decode_response(data, paths=None):
+    """
+    Decodes an API response body, keeping only the subtrees at paths
+    when they are given.
+    """
+    with trace.span("decode", bytes=len(data)):
+        decoded = loads(data)
+        if paths is None:
+            return decoded
+        return prune(decoded, make_spec(paths))
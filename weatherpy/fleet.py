@@ -0,0 +1,178 @@
+"""
+Polls long lists of locations with a pool of processes.
+
+    weatherpy fleet --locations-file stations.txt --processes 4 -n
+
+The locations are cut into shards that worker processes take in turn.
+Each worker has its own connection pool and fetches the locations of a
+shard a few at a time like batch mode does, then decodes and normalizes
+them, which is the part a single process can't spread over more cores.
+A worker sends back each normalized response packed (see packing), not
+printed, and the parent unpacks and prints them in the order the
+locations were given, as the only process writing to the output and to
+the location index.
+"""
+from __future__ import print_function
+
+import sys
+
+# Most locations in a shard, smaller shards keep the output flowing
+# when a few locations are slow
+SHARD_SIZE = 32
+
+# What a worker process fetches with, set up once by _start_worker
+_worker = {}
+
+
+def parse_args(argv=None):
+    import argparse
+    from . import batch
+    from .weather import add_report_arguments
+
+    parser = argparse.ArgumentParser(prog="weatherpy fleet",
+                                     description="Fetch the weather of many locations "
+                                                 "with a pool of processes")
+    parser.add_argument('location', nargs='*', help='Locations to query')
+    parser.add_argument('--locations-file', metavar='FILE',
+                        help='Query every location listed in FILE, one per line')
+    parser.add_argument('-p', '--processes', type=int, metavar='N',
+                        help='Number of worker processes (default is one per core)')
+    parser.add_argument('--workers', type=int, default=batch.DEFAULT_WORKERS,
+                        help='Number of locations each process fetches at once')
+    add_report_arguments(parser, default_format="jsonl")
+    args = parser.parse_args(argv)
+    if args.alerts_since_last:
+        args.alerts = True
+    if args.processes is not None and args.processes < 1:
+        parser.error("--processes needs at least 1 process")
+    return args
+
+
+def make_shards(locations, processes):
+    """
+    Returns the locations cut into shards of at most SHARD_SIZE, enough
+    of them for every process to get one
+    """
+    size = max(1, min(SHARD_SIZE, -(-len(locations) // processes)))
+    return [locations[start:start + size] for start in range(0, len(locations), size)]
+
+
+def _start_worker(args, settings, session=None):
+    from .transport import Transport
+
+    _worker.clear()
+    _worker.update(args=args, settings=settings,
+                   session=session or Transport.from_settings(settings, args.workers))
+
+
+def fetch_shard(locations):
+    """
+    Fetches and normalizes the weather of a shard's locations in a worker.
+    Returns (location, whether it was resolved locally, packed response,
+    error message) for each, the response being None when it failed.
+    """
+    from . import weather, batch
+    from .locations import LocationIndex, resolve
+    from .packing import pack_response
+
+    args, settings, session = _worker['args'], _worker['settings'], _worker['session']
+    provider = weather.get_provider(settings)
+    paths = provider.response_paths(args)
+    index = LocationIndex.from_settings(settings)
+    resolved = [resolve(provider, index, location) for location in locations]
+
+    def fetch(url):
+        return weather.fetch_response(url, args, settings, session)
+
+    urls = [weather.make_api_url(args, settings, location) for location, _ in resolved]
+    results = []
+    for location, (_, known), entry in zip(locations, resolved,
+                                           batch.fetch_all(urls, fetch, args.workers)):
+        if isinstance(entry, batch.FetchError):
+            results.append((location, known, None,
+                            "Could not fetch {0}: {1}".format(location, entry)))
+            continue
+        try:
+            data = weather.decode_entry(entry, provider, paths)
+            packed = pack_response(data)
+        except (ValueError, KeyError, TypeError) as e:
+            results.append((location, known, None,
+                            "Could not print {0}: {1}".format(location, e)))
+            continue
+        weather.record_history(settings, provider, location, data)
+        results.append((location, known, packed, None))
+    return results
+
+
+def run(locations, args, settings, out=None, err=None, session=None):
+    """
+    Fetches the weather of every location on args.processes processes and
+    prints it in order. With a single process the shards are fetched in
+    this one, with session if it's given.
+    """
+    import multiprocessing
+    from . import weather
+    from .locations import LocationIndex, learn
+    from .packing import unpack_response
+
+    if err is None:
+        err = sys.stderr
+    processes = args.processes or multiprocessing.cpu_count()
+    # Sets the default section before the workers get a copy of args
+    weather.make_features(args)
+    shards = make_shards(locations, processes)
+
+    pool = None
+    if processes > 1 and len(shards) > 1:
+        pool = multiprocessing.Pool(min(processes, len(shards)), _start_worker,
+                                    (args, settings))
+        # Shards come back in order, each as soon as it and the ones before it are done
+        results = pool.imap(fetch_shard, shards)
+    else:
+        _start_worker(args, settings, session)
+        results = (fetch_shard(shard) for shard in shards)
+
+    provider = weather.get_provider(settings)
+    index = LocationIndex.from_settings(settings)
+    printer = weather.make_printer(args, settings, out)
+    try:
+        for shard_results in results:
+            for location, known, packed, error in shard_results:
+                if packed is None:
+                    print(error, file=err)
+                    continue
+                data = unpack_response(packed)
+                printer.start_location(location)
+                weather.render_weather_data(data, args, settings, out, printer)
+                if not known:
+                    learn(provider, index, location, data)
+    finally:
+        printer.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+def main(argv=None, out=None, err=None):
+    """
+    Entry point of the weatherpy fleet subcommand
+    """
+    from . import batch
+    from .settings import Settings
+    from .quota import QuotaError
+    from .providers import ProviderError
+
+    args = parse_args(argv)
+    try:
+        locations = list(args.location)
+        if args.locations_file:
+            locations = batch.read_locations(args.locations_file) + locations
+        if not locations:
+            print("weatherpy fleet needs locations, or a --locations-file", file=err or sys.stderr)
+            sys.exit(2)
+        run(locations, args, Settings(args), out, err)
+    except (ProviderError, QuotaError, IOError) as e:
+        print(e, file=err or sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
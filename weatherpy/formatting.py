@@ -0,0 +1,231 @@
+# -*- encoding: utf-8 -*-
+from .types import Units, TimeFormats, DateFormats, Direction
+
+# Columns shorter than this are converted in pure python, where numpy's
+# array setup (and import) costs more than it saves
+NUMPY_MIN_LENGTH = 64
+
+_numpy = []
+
+
+def get_numpy():
+    """
+    Returns numpy, which speeds up converting long columns but isn't
+    required, or None if it isn't installed. Only imported when needed.
+    """
+    if not _numpy:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy.append(numpy)
+    return _numpy[0]
+
+
+FORMAT_STRINGS = {
+    'windspeed': "~{0:2}{1} {2:3}",
+    'date': "{0} {1:3}",
+    'temp': u"{0:3}\u00B0{1:1}",
+    'military': u"{0}:{1}",
+}
+
+
+def format_temperature(temp, unit):
+    """
+    Returns a formatted temperature string ex: "62 °F", "25 °C"
+    """
+    symbol = "C" if unit == Units.METRIC else "F"
+
+    # For whatever reason, weather underground returns temps
+    # as both strings and ints
+    return FORMAT_STRINGS['temp'].format(str(temp), symbol)
+
+
+def format_degree(temp_dict, unit):
+    """
+    Takes a dictionary from the Weather underground api
+    and returns a formatted temperature string ex: "62 °F", "25 °C"
+    """
+    temp = temp_dict.get('fahrenheit') or temp_dict.get('english')
+    if unit == Units.METRIC:
+        temp = temp_dict.get('celsius') or temp_dict.get('metric')
+    return format_temperature(temp, unit)
+
+
+def format_wind(speed, direction, unit):
+    """
+    Returns a formatted windspeed, '~2 mph NW' for example
+    """
+    idx = 'kph' if unit == Units.METRIC else 'mph'
+    return FORMAT_STRINGS['windspeed'].format(str(speed), idx,
+                                              Direction.shorthand(direction))
+
+
+def format_windspeed(windspeed_dict, unit):
+    """
+    Returns a formatted windspeed, for example,
+    >>>format_windspeed({
+            'kph': 04,
+            'mph': 02,
+            'dir': NW,
+       }, Units.ENGLISH)
+    >>>'~02mph NW
+    """
+    idx = 'kph' if unit == Units.METRIC else 'mph'
+    return format_wind(windspeed_dict[idx], windspeed_dict['dir'], unit)
+
+
+def format_hour(point, time_format):
+    """
+    Returns the hour of an HourlyPoint, '5:00 PM' or '17:00'
+    """
+    if time_format == TimeFormats.MILITARY:
+        return FORMAT_STRINGS['military'].format("%02d" % point.hour,
+                                                 "%02d" % point.minute)
+    else:
+        return point.civil
+
+
+def format_date(record, date_format):
+    """
+    Returns the date of an HourlyPoint or ForecastDay, 'April 2' for example
+    """
+    if date_format == DateFormats.DATE or not record.weekday:
+        return FORMAT_STRINGS['date'].format(str(record.month), str(record.day))
+    else:
+        return record.weekday
+
+
+# printf style equivalents of FORMAT_STRINGS for formatting whole columns,
+# they stringify their arguments themselves and skip the per cell lookup
+_COLUMN_FORMATS = {
+    'windspeed': "~%-2s%s %-3s",
+    'date': "%s %-3s",
+    'temp': u"%-3s°",
+    'military': u"%02d:%02d",
+}
+
+
+def _round(value):
+    """
+    Rounds half away from zero like the API does, rather than to even
+    """
+    return int(value + 0.5) if value >= 0 else -int(-value + 0.5)
+
+
+def _convert(values, scale, offset_in, offset_out):
+    """
+    Returns [(value + offset_in) * scale + offset_out] rounded to ints,
+    values that aren't numbers are returned unchanged.
+    """
+    numpy = get_numpy() if len(values) >= NUMPY_MIN_LENGTH else None
+    if numpy is not None and all(isinstance(value, (int, float)) for value in values):
+        converted = (numpy.asarray(values, dtype=float) + offset_in) * scale + offset_out
+        rounded = numpy.sign(converted) * numpy.floor(numpy.abs(converted) + 0.5)
+        return rounded.astype(int).tolist()
+
+    return [_round((value + offset_in) * scale + offset_out)
+            if isinstance(value, (int, float)) else value
+            for value in values]
+
+
+def fahrenheit_to_celsius(values):
+    return _convert(values, 5.0 / 9, -32, 0)
+
+
+def celsius_to_fahrenheit(values):
+    return _convert(values, 9.0 / 5, 0, 32)
+
+
+def mph_to_kph(values):
+    return _convert(values, 1.609344, 0, 0)
+
+
+def kph_to_mph(values):
+    return _convert(values, 1 / 1.609344, 0, 0)
+
+
+def _unit_column(records, english_field, metric_field, unit, to_metric, to_english):
+    """
+    Returns the records' values in unit, converting the other unit's
+    values locally where the API left the wanted ones out.
+    """
+    if unit == Units.METRIC:
+        wanted, other, convert = metric_field, english_field, to_metric
+    else:
+        wanted, other, convert = english_field, metric_field, to_english
+
+    column = [getattr(record, wanted) for record in records]
+    missing = [index for index, value in enumerate(column)
+               if not isinstance(value, (int, float))]
+    if missing:
+        converted = convert([getattr(records[index], other) for index in missing])
+        for index, value in zip(missing, converted):
+            if isinstance(value, (int, float)):
+                column[index] = value
+    return column
+
+
+def temperature_column(records, english_field, metric_field, unit):
+    """
+    Returns a column of temperatures in unit, ex:
+    temperature_column(days, 'high_f', 'high_c', Units.METRIC)
+    """
+    return _unit_column(records, english_field, metric_field, unit,
+                        fahrenheit_to_celsius, celsius_to_fahrenheit)
+
+
+def windspeed_column(records, unit):
+    """
+    Returns the average wind speeds of ForecastDays in unit
+    """
+    return _unit_column(records, 'wind_mph', 'wind_kph', unit,
+                        mph_to_kph, kph_to_mph)
+
+
+def format_temperatures(values, unit):
+    """
+    Formats a column of temperatures like format_temperature
+    """
+    template = _COLUMN_FORMATS['temp'] + ("C" if unit == Units.METRIC else "F")
+    return [template % (value,) for value in values]
+
+
+def format_winds(speeds, directions, unit):
+    """
+    Formats a column of wind speeds like format_wind
+    """
+    template = _COLUMN_FORMATS['windspeed']
+    idx = 'kph' if unit == Units.METRIC else 'mph'
+    shorthands = {}
+    column = []
+    for speed, direction in zip(speeds, directions):
+        if direction not in shorthands:
+            shorthands[direction] = Direction.shorthand(direction)
+        column.append(template % (speed, idx, shorthands[direction]))
+    return column
+
+
+def format_hours(points, time_format):
+    """
+    Formats the hours of a column of HourlyPoints like format_hour
+    """
+    if time_format == TimeFormats.MILITARY:
+        template = _COLUMN_FORMATS['military']
+        return [template % (point.hour, point.minute) for point in points]
+    return [point.civil for point in points]
+
+
+def format_dates(records, date_format):
+    """
+    Formats the dates of a column of records like format_date
+    """
+    template = _COLUMN_FORMATS['date']
+    if date_format == DateFormats.DATE:
+        return [template % (record.month, record.day) for record in records]
+    return [record.weekday or template % (record.month, record.day)
+            for record in records]
+
+
+def format_percents(values):
+    return ["%s%%" % (value,) for value in values]
@@ -0,0 +1,328 @@
+"""
+An optional local history of the weather weatherpy has fetched, for
+trend graphs and for looking back at past hours without the API.
+
+Every location gets a directory of append-only column files, one per
+field in COLUMNS, holding fixed-width little-endian values that can be
+memory mapped straight into arrays. Each fetch appends one block of
+rows sorted by time; the block index, a column file of its own, records
+every block's first row, row count and time range. A query only reads
+the blocks whose time range overlaps it, and binary searches the epoch
+column of those instead of reading whole files.
+
+    weatherpy history --days 7 --field temp_f 48104
+"""
+from __future__ import print_function
+
+import os
+import sys
+import time
+import zlib
+import array
+import struct
+
+from .records import to_number
+from .formatting import temperature_column
+from .types import Units
+
+HISTORY_DIR = os.path.join(os.environ.get("XDG_DATA_HOME", "~/.local/share"),
+                           "weatherpy", "history")
+
+# Kinds of rows: measured conditions, and hourly forecast points
+OBSERVATION = 0
+HOURLY = 1
+KINDS = {'observation': OBSERVATION, 'hourly': HOURLY}
+
+# Column name and array typecode, q is a 64 bit int, B a byte and f a
+# 32 bit float. Missing values are NaN.
+COLUMNS = [
+    ('epoch', 'q'),
+    ('kind', 'B'),
+    ('temp_f', 'f'),
+    ('temp_c', 'f'),
+    ('pop', 'f'),
+    ('humidity', 'f'),
+    ('wind_mph', 'f'),
+]
+FIELDS = [name for name, typecode in COLUMNS if typecode == 'f']
+
+# One row per block: first row, row count, first and last epoch
+_INDEX_FILE = "blocks.idx"
+_INDEX_ROW = struct.Struct("<qqqq")
+_EPOCH = struct.Struct("<q")
+
+NAN = float('nan')
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class LocationHistory(object):
+    """
+    The column files of one location
+    """
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def blocks(self):
+        """
+        Returns the block index as (first row, count, first epoch, last epoch)
+        tuples, in the order the blocks were written
+        """
+        try:
+            with open(self._path(_INDEX_FILE), 'rb') as index_file:
+                data = index_file.read()
+        except (IOError, OSError):
+            return []
+        # A torn write leaves a partial row at the end, which isn't a block yet
+        usable = len(data) - len(data) % _INDEX_ROW.size
+        return [_INDEX_ROW.unpack_from(data, offset)
+                for offset in range(0, usable, _INDEX_ROW.size)]
+
+    def append(self, rows):
+        """
+        Appends rows, dicts with an epoch, a kind and the FIELDS they
+        have, as one block. Rows are written before the block index, so
+        a crash never leaves an indexed block half written.
+        """
+        rows = sorted(rows, key=lambda row: row['epoch'])
+        if not rows:
+            return
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        lock = _lock(self._path("lock"))
+        try:
+            blocks = self.blocks()
+            if blocks and self._read_block(blocks[-1]) == [_row_values(row) for row in rows]:
+                # Served from the cache again, nothing new to keep
+                return
+            first_row = blocks[-1][0] + blocks[-1][1] if blocks else 0
+
+            for name, typecode in COLUMNS:
+                values = _little_endian(array.array(typecode, [
+                    row.get(name, NAN) if typecode == 'f' else row[name] for row in rows]))
+                with open(self._path(name), 'ab') as column:
+                    # Drop rows a crash left past the last indexed block
+                    column.truncate(first_row * values.itemsize)
+                    column.write(values.tobytes() if hasattr(values, 'tobytes')
+                                 else values.tostring())
+
+            with open(self._path(_INDEX_FILE), 'ab') as index_file:
+                index_file.truncate(len(blocks) * _INDEX_ROW.size)
+                index_file.write(_INDEX_ROW.pack(first_row, len(rows),
+                                                 rows[0]['epoch'], rows[-1]['epoch']))
+        finally:
+            _unlock(lock)
+
+    def query(self, start, end, fields=('temp_f',), kind=OBSERVATION):
+        """
+        Returns [(epoch, value, ...)] of the rows of kind from start up to
+        end, in time order. When an epoch was stored more than once the
+        latest value wins, newer hourly forecasts replace older ones.
+        """
+        blocks = [block for block in self.blocks() if block[2] < end and block[3] >= start]
+        if not blocks:
+            return []
+
+        import mmap
+
+        latest = {}
+        with open(self._path('epoch'), 'rb') as epoch_file:
+            epochs = mmap.mmap(epoch_file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for first_row, count, _, _ in blocks:
+                    low = _bisect(epochs, first_row, first_row + count, start)
+                    high = _bisect(epochs, low, first_row + count, end)
+                    if low == high:
+                        continue
+                    columns = [self._read_column('epoch', low, high),
+                               self._read_column('kind', low, high)]
+                    columns += [self._read_column(field, low, high) for field in fields]
+                    for row in zip(*columns):
+                        if row[1] == kind:
+                            latest[row[0]] = (row[0],) + row[2:]
+            finally:
+                epochs.close()
+        return [latest[epoch] for epoch in sorted(latest)]
+
+    def _read_column(self, name, start_row, end_row):
+        typecode = dict(COLUMNS)[name]
+        values = array.array(typecode)
+        with open(self._path(name), 'rb') as column:
+            column.seek(start_row * values.itemsize)
+            values.fromfile(column, end_row - start_row)
+        return _little_endian(values)
+
+    def _read_block(self, block):
+        first_row, count, _, _ = block
+        try:
+            columns = [self._read_column(name, first_row, first_row + count)
+                       for name, _ in COLUMNS]
+        except (IOError, OSError, EOFError):
+            return None
+        return [_comparable(row) for row in zip(*columns)]
+
+
+def _row_values(row):
+    """
+    Returns a row as _read_block does, floats rounded to 32 bits
+    """
+    values = [row['epoch'], row['kind']]
+    values += array.array('f', [row.get(field, NAN) for field in FIELDS]).tolist()
+    return _comparable(values)
+
+
+def _comparable(values):
+    # NaN isn't equal to itself
+    return tuple(None if value != value else value for value in values)
+
+
+def _bisect(epochs, low, high, epoch):
+    """
+    Returns the first row from low up to high whose epoch is at least epoch
+    """
+    while low < high:
+        middle = (low + high) // 2
+        if _EPOCH.unpack_from(epochs, middle * _EPOCH.size)[0] < epoch:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _lock(path):
+    try:
+        import fcntl
+    except ImportError:
+        return None
+    lock_file = open(path, 'a')
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    return lock_file
+
+
+def _unlock(lock_file):
+    if lock_file is not None:
+        # Closing the file releases the lock
+        lock_file.close()
+
+
+class HistoryStore(object):
+    """
+    The histories of every location, one directory each
+    """
+    def __init__(self, directory=None):
+        self.directory = os.path.expanduser(directory or HISTORY_DIR)
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+        Returns the store named by the history_dir setting, or None when
+        the history setting doesn't turn it on
+        """
+        if not settings.get('history'):
+            return None
+        return cls(settings.get('history_dir'))
+
+    def location(self, key):
+        """
+        Returns the LocationHistory of a location key, see locations.location_key
+        """
+        safe = "".join(char if char.isalnum() else "_" for char in key)
+        checksum = zlib.crc32(key.encode('utf-8')) & 0xffffffff
+        return LocationHistory(os.path.join(self.directory, "%s-%08x" % (safe[:64], checksum)))
+
+    def record(self, key, data):
+        """
+        Appends the conditions and hourly forecast of a normalized response
+        """
+        self.location(key).append(make_rows(data))
+
+
+def make_rows(data):
+    """
+    Returns the history rows of a normalized response
+    """
+    rows = []
+    current = data.get('current_observation')
+    if current:
+        epoch = to_number(current.get('observation_epoch'))
+        humidity = to_number(str(current.get('relative_humidity', "")).rstrip("%"))
+        rows.append(_clean({
+            'epoch': epoch if isinstance(epoch, int) else int(time.time()),
+            'kind': OBSERVATION,
+            'temp_f': to_number(current.get('temp_f')),
+            'temp_c': to_number(current.get('temp_c')),
+            'humidity': humidity,
+            'wind_mph': to_number(current.get('wind_mph')),
+        }))
+
+    points = data.get('hourly') or []
+    temps_f = temperature_column(points, 'temp_f', 'temp_c', Units.ENGLISH)
+    temps_c = temperature_column(points, 'temp_f', 'temp_c', Units.METRIC)
+    for point, temp_f, temp_c in zip(points, temps_f, temps_c):
+        rows.append(_clean({'epoch': point.epoch, 'kind': HOURLY, 'temp_f': temp_f,
+                            'temp_c': temp_c, 'pop': point.pop}))
+    return rows
+
+
+def _clean(row):
+    """
+    Drops the fields of a row that aren't numbers, they're stored as NaN
+    """
+    return dict((key, value) for key, value in row.items()
+                if key in ('epoch', 'kind') or isinstance(value, (int, float)))
+
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="weatherpy history",
+                                     description="Print the stored weather history of a location")
+    parser.add_argument('-d', '--days', type=float, default=7,
+                        help='How many days back to print (default 7)')
+    parser.add_argument('--field', choices=FIELDS, action='append', dest='fields',
+                        help='Field to print, may be given more than once (default temp_f)')
+    parser.add_argument('--kind', choices=sorted(KINDS), default='observation',
+                        help='Print observed conditions (default) or hourly forecasts')
+    parser.add_argument('--provider', help='Provider the history was fetched from')
+    parser.add_argument('location', nargs='*', default=[],
+                        help='Location as it was queried, autoip when left out')
+    args = parser.parse_args(argv)
+    args.fields = args.fields or ['temp_f']
+    return args
+
+
+def main(argv=None, out=None, settings=None):
+    """
+    Entry point of the weatherpy history subcommand
+    """
+    from .settings import Settings
+    from .providers import get_provider
+    from .locations import location_key
+    from .table import stream_table
+
+    args = parse_args(argv)
+    settings = settings or Settings(args)
+    out = out or sys.stdout
+    store = HistoryStore(settings.get('history_dir'))
+
+    key = location_key(get_provider(settings), " ".join(args.location) or None)
+    end = time.time()
+    rows = store.location(key).query(end - args.days * 86400, end + 1 if args.kind == 'observation'
+                                     else end + 30 * 86400, args.fields, KINDS[args.kind])
+    if not rows:
+        print("No history for {0}".format(key.split(":", 1)[1]), file=out)
+        return
+
+    # A long history is written a chunk of rows at a time
+    stream_table(out, ["Time"] + args.fields, (
+        [time.strftime("%Y-%m-%d %H:%M", time.localtime(row[0]))] +
+        ["" if value != value else "%g" % value for value in row[1:]]
+        for row in rows))
@@ -0,0 +1,146 @@
+import os
+import time
+
+from .cache import WEATHER_CACHE_DIR, load_json_state, save_json_state
+
+LOCATIONS_FILE = os.path.join(WEATHER_CACHE_DIR, "locations.json")
+
+# Seconds an autoip resolution is trusted, the machine may have moved
+AUTOIP_TTL = 60 * 60
+
+# Queries remembered, the least recently resolved are dropped first
+MAX_ENTRIES = 512
+
+AUTOIP = "autoip"
+
+
+class LocationError(ValueError):
+    """
+    Raised when a picked match doesn't exist
+    """
+
+
+def location_key(provider, location):
+    """
+    Returns the index key of a location query, queries that only differ
+    in case or in spaces and underscores share a key
+    """
+    query = (location or AUTOIP).strip().lower().replace(" ", "_")
+    return "%s:%s" % (provider.name, query)
+
+
+class LocationIndex(object):
+    """
+    Remembers what location queries resolved to, so later runs query the
+    provider's canonical id for them directly. Also keeps the matches of
+    ambiguous queries, which the user can then pick from by number.
+
+    The index is a JSON file; it isn't safe to share one LocationIndex
+    between threads without a lock.
+    """
+    def __init__(self, path=None, autoip_ttl=AUTOIP_TTL):
+        self.path = os.path.expanduser(path or LOCATIONS_FILE)
+        self.autoip_ttl = autoip_ttl
+        self._entries = None
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+        Builds an index from the optional location_index and autoip_ttl
+        keys of the weatherrc file
+        """
+        return cls(path=settings.get('location_index'),
+                   autoip_ttl=settings.get('autoip_ttl', AUTOIP_TTL))
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            self._entries = load_json_state(self.path)
+        return self._entries
+
+    def lookup(self, key):
+        """
+        Returns the canonical location the query resolved to, or None
+        """
+        entry = self.entries.get(key)
+        if entry is None or not entry.get('location'):
+            return None
+        if key.endswith(":" + AUTOIP) and time.time() - entry['resolved_at'] > self.autoip_ttl:
+            return None
+        return entry['location']
+
+    def matches(self, key):
+        """
+        Returns the matches kept for an ambiguous query, as dicts with a
+        location and a name
+        """
+        entry = self.entries.get(key)
+        return entry.get('matches', []) if entry else []
+
+    def pick(self, key, number):
+        """
+        Returns the location of the numbered match of an earlier ambiguous
+        query, counting from 1, and remembers it as what the query means
+        """
+        matches = self.matches(key)
+        if not matches:
+            raise LocationError("No earlier matches to pick from for {0}".format(
+                key.split(":", 1)[1]))
+        if not 1 <= number <= len(matches):
+            raise LocationError("Pick a match from 1 to {0}".format(len(matches)))
+        location = matches[number - 1]['location']
+        self.remember(key, location)
+        return location
+
+    def remember(self, key, location):
+        entry = self.entries.get(key, {})
+        if entry.get('location') == location and self.lookup(key) is not None:
+            return
+        # Matches are kept so a different one can be picked later
+        self.entries[key] = dict(entry, location=location, resolved_at=time.time())
+        self.save()
+
+    def remember_matches(self, key, matches):
+        self.entries[key] = {'matches': matches, 'resolved_at': time.time()}
+        self.save()
+
+    def save(self):
+        entries = self.entries
+        if len(entries) > MAX_ENTRIES:
+            oldest = sorted(entries, key=lambda key: entries[key]['resolved_at'])
+            for key in oldest[:len(entries) - MAX_ENTRIES]:
+                del entries[key]
+
+        # Forgetting a location only costs a lookup later
+        save_json_state(self.path, entries)
+
+
+def resolve(provider, index, location, pick=None):
+    """
+    Returns the location to request for a location query (None for
+    autoip) and whether it was resolved locally: the match picked by
+    number, or what the query resolved to earlier. A query that wasn't
+    is returned unchanged, and its response should be passed to learn.
+    """
+    key = location_key(provider, location)
+    if pick:
+        return index.pick(key, pick), True
+    resolved = index.lookup(key)
+    if resolved is not None:
+        return resolved, True
+    return location, False
+
+
+def learn(provider, index, location, data):
+    """
+    Remembers what a location query resolved to, or its matches if it
+    was ambiguous, from the provider's normalized response
+    """
+    key = location_key(provider, location)
+    matches = provider.location_matches(data)
+    if matches:
+        index.remember_matches(key, matches)
+        return
+    location_id = provider.location_id(data)
+    if location_id:
+        index.remember(key, location_id)
@@ -0,0 +1,178 @@
+"""
+A local stand-in for the weather APIs serving recorded responses, for
+running weatherpy, its tests and its benchmarks offline.
+
+Weather underground requests, /api/<key>/<feature>/.../q/<location>.json,
+get the fixtures of every feature in the path merged into one response
+like the real API. Open-meteo requests, /v1/forecast?..., get the blocks
+their query asks for. Point weatherpy at it with the api_root setting:
+
+    python -m weatherpy.mockserver --port 8080 --latency 0.2
+"""
+from __future__ import print_function
+
+import os
+import json
+import time
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlsplit, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlsplit, parse_qs
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Fixture with the open-meteo response, every other one is a weather
+# underground feature
+OPEN_METEO_FIXTURE = "openmeteo"
+
+
+def load_fixtures(directory=FIXTURE_DIR):
+    fixtures = {}
+    for name in os.listdir(directory):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name)) as fixture:
+                fixtures[name[:-len(".json")]] = json.load(fixture)
+    return fixtures
+
+
+def merge_features(fixtures, features):
+    """
+    Returns the response body weather underground sends for a list of features
+    """
+    merged = {"response": {"version": "0.1", "features": {}}}
+    for feature in features:
+        data = fixtures[feature]
+        merged.update((key, value) for key, value in data.items() if key != "response")
+        merged["response"]["features"].update(data["response"]["features"])
+    return json.dumps(merged).encode('utf-8')
+
+
+def open_meteo_body(fixture, query):
+    """
+    Returns the status and body open-meteo sends for a forecast query
+    """
+    params = parse_qs(query)
+    if "latitude" not in params or "longitude" not in params:
+        return 400, json.dumps({"error": True, "reason": "Parameter 'latitude' and "
+                                "'longitude' must have the same number of elements"}).encode('utf-8')
+
+    data = dict((key, value) for key, value in fixture.items()
+                if key not in ("current", "hourly", "daily") and not key.endswith("_units"))
+    if "current" in params:
+        data["current_units"] = fixture["current_units"]
+        data["current"] = fixture["current"]
+    for block, count in (("hourly", "forecast_hours"), ("daily", "forecast_days")):
+        if block in params:
+            limit = int(params.get(count, ["0"])[0]) or None
+            data[block + "_units"] = fixture[block + "_units"]
+            data[block] = dict((key, values[:limit]) for key, values in fixture[block].items())
+    return 200, json.dumps(data).encode('utf-8')
+
+
+class MockServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0, fixtures=None, host="127.0.0.1"):
+        HTTPServer.__init__(self, (host, port), MockHandler)
+        self.latency = latency
+        self.fixtures = fixtures or load_fixtures()
+        self.bodies = {}
+        self.requests = 0
+
+    @property
+    def url(self):
+        return "http://%s:%d/" % self.server_address[:2]
+
+    @property
+    def api_root(self):
+        """
+        The weather underground api_root setting for this server
+        """
+        return self.url + "api/"
+
+    def api_root_for(self, provider):
+        """
+        Returns the api_root setting that points a provider at this server
+        """
+        return self.url + urlsplit(provider.API_ROOT).path.lstrip("/")
+
+    def body_for(self, path):
+        """
+        Returns the status and body for a request path, or None if it isn't
+        one either API would answer
+        """
+        path, _, query = path.partition("?")
+        parts = path.split("/")
+        if path == "/v1/forecast" and OPEN_METEO_FIXTURE in self.fixtures:
+            return open_meteo_body(self.fixtures[OPEN_METEO_FIXTURE], query)
+
+        if len(parts) < 5 or parts[1] != "api" or "q" not in parts:
+            return None
+        features = tuple(parts[3:parts.index("q")])
+        if not features or any(feature not in self.fixtures for feature in features):
+            return None
+        if features not in self.bodies:
+            self.bodies[features] = merge_features(self.fixtures, features)
+        return 200, self.bodies[features]
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        response = self.server.body_for(self.path)
+        if response is None:
+            self.send_error(404)
+            return
+        status, body = response
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(argv=None):
+    import argparse
+    from .providers import PROVIDERS
+
+    parser = argparse.ArgumentParser(prog="python -m weatherpy.mockserver",
+                                     description="Serve recorded weather API responses")
+    parser.add_argument('--host', default="127.0.0.1", help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on (default 8080)')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Seconds to wait before answering each request')
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, metavar='DIR',
+                        help='Directory of recorded responses to serve')
+    args = parser.parse_args(argv)
+
+    server = MockServer(args.port, args.latency, load_fixtures(args.fixtures), args.host)
+    for name, provider in sorted(PROVIDERS.items()):
+        print('{0} api_root: "{1}"'.format(name, server.api_root_for(provider)))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Machine readable output: the normalized conditions, alerts, hourly and
+forecast records written one at a time as JSON Lines, a JSON array or
+CSV, for feeding weatherpy into other programs.
+
+The record printers take the place of ResultPrinter. Each record is
+written to out as soon as it's built, so a batch run over any number
+of locations uses the memory of one location's response.
+"""
+import json
+from collections import OrderedDict
+
+from .types import Units
+from .records import to_number
+from .formatting import temperature_column, windspeed_column
+
+FORMATS = ["text", "json", "jsonl", "csv"]
+
+# Every field a record can have, the columns of the CSV output
+FIELDS = [
+    "type", "location", "name", "epoch", "month", "day", "weekday", "hour",
+    "minute", "temp_f", "temp_c", "high_f", "high_c", "low_f", "low_c", "pop",
+    "condition", "wind", "wind_mph", "wind_kph", "wind_dir", "humidity",
+    "message", "expires",
+]
+
+
+class RecordPrinter(object):
+    """
+    Turns the sections of a normalized response into records, flat
+    OrderedDicts with the fields in FIELDS order. Both units of every
+    measurement are included, whatever the units setting.
+    """
+    def __init__(self, out, location=None):
+        self.out = out
+        # The location the next records are for, as it was queried
+        self.location = location
+
+    def print_errors(self, data):
+        response = data.get('response', {})
+        if 'error' in response:
+            self._record("error", message=response['error']['description'])
+            return True
+        if 'results' in response:
+            self._record("error", message="More than 1 city matched your query")
+            return True
+        return False
+
+    def print_alerts(self, data):
+        name = data['current_observation']['display_location']['full']
+        for alert in data['alerts']:
+            self._record("alert", name=name, message=alert['message'].strip(),
+                         expires=alert['expires'])
+
+    def print_alert_changes(self, data, changes):
+        name = data['current_observation']['display_location']['full']
+        for kind, alert in changes:
+            self._record(kind + "_alert", name=name, message=alert.get('message', "").strip(),
+                         expires=alert['expires'])
+
+    def print_conditions(self, data):
+        self._record("conditions", name=data['display_location']['full'],
+                     temp_f=data['temp_f'], temp_c=data['temp_c'],
+                     condition=data['weather'], wind=data['wind_string'],
+                     humidity=to_number(data['relative_humidity'].rstrip("%")))
+
+    def print_hourly(self, data):
+        temps_f = temperature_column(data, 'temp_f', 'temp_c', Units.ENGLISH)
+        temps_c = temperature_column(data, 'temp_f', 'temp_c', Units.METRIC)
+        for point, temp_f, temp_c in zip(data, temps_f, temps_c):
+            self._record("hourly", epoch=point.epoch, month=point.month, day=point.day,
+                         hour=point.hour, minute=point.minute, temp_f=temp_f, temp_c=temp_c,
+                         pop=point.pop, condition=point.condition)
+
+    def print_forecast(self, data):
+        columns = zip(data,
+                      temperature_column(data, 'high_f', 'high_c', Units.ENGLISH),
+                      temperature_column(data, 'high_f', 'high_c', Units.METRIC),
+                      temperature_column(data, 'low_f', 'low_c', Units.ENGLISH),
+                      temperature_column(data, 'low_f', 'low_c', Units.METRIC),
+                      windspeed_column(data, Units.ENGLISH),
+                      windspeed_column(data, Units.METRIC))
+        for day, high_f, high_c, low_f, low_c, wind_mph, wind_kph in columns:
+            self._record("forecast", epoch=day.epoch, month=day.month, day=day.day,
+                         weekday=day.weekday, condition=day.conditions, pop=day.pop,
+                         high_f=high_f, high_c=high_c, low_f=low_f, low_c=low_c,
+                         wind_mph=wind_mph, wind_kph=wind_kph, wind_dir=day.wind_dir,
+                         humidity=day.humidity)
+
+    def start_location(self, location):
+        self.location = location
+
+    def end_section(self):
+        pass
+
+    def close(self):
+        pass
+
+    def _record(self, record_type, **fields):
+        record = OrderedDict([("type", record_type), ("location", self.location or "autoip")])
+        for field in FIELDS:
+            if field in fields:
+                record[field] = fields[field]
+        self.write(record)
+
+    def write(self, record):
+        raise NotImplementedError
+
+
+class JSONLinesPrinter(RecordPrinter):
+    """
+    Writes one JSON object per line
+    """
+    def write(self, record):
+        self.out.write(json.dumps(record) + "\n")
+
+
+class JSONPrinter(RecordPrinter):
+    """
+    Writes one JSON array of every record, which is only complete once
+    the printer is closed
+    """
+    def __init__(self, out, location=None):
+        RecordPrinter.__init__(self, out, location)
+        self.started = False
+
+    def write(self, record):
+        self.out.write((",\n" if self.started else "[\n") + json.dumps(record))
+        self.started = True
+
+    def close(self):
+        self.out.write("\n]\n" if self.started else "[]\n")
+
+
+class CSVPrinter(RecordPrinter):
+    """
+    Writes CSV with a header row of FIELDS, fields a record doesn't have
+    are left empty
+    """
+    def __init__(self, out, location=None):
+        import csv
+
+        RecordPrinter.__init__(self, out, location)
+        self.writer = csv.writer(out, lineterminator="\n")
+        self.writer.writerow(FIELDS)
+
+    def write(self, record):
+        # csv writes None as an empty field
+        self.writer.writerow([record.get(field) for field in FIELDS])
+
+
+PRINTERS = {
+    "json": JSONPrinter,
+    "jsonl": JSONLinesPrinter,
+    "csv": CSVPrinter,
+}
+
+
+def make_record_printer(output_format, out, location=None):
+    return PRINTERS[output_format](out, location)
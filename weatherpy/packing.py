@@ -0,0 +1,200 @@
+"""
+Compact encodings of cached responses.
+
+Response bodies are stored deflated with a preset dictionary of the keys
+and values API responses repeat (FCTTIME's sub-fields, condition names,
+wind directions), which gets small bodies much smaller than deflate on
+its own does.
+
+Next to the body the cache keeps the normalized response, packed: every
+distinct value of the hourly and forecast records goes into one table,
+and each record is a row of fixed-width indexes into it. Unpacking loads
+the small table, interns its strings and builds the records straight
+from the rows, skipping json.loads of the whole body and normalizing it.
+The rest of the normalized response is kept as JSON.
+"""
+import sys
+import json
+import zlib
+import struct
+
+from .records import HourlyPoint, ForecastDay
+
+# Keys and values that API responses are made of, the most common last as
+# deflate reaches back to them with the shortest distances
+_ZDICT_TOKENS = [
+    # open-meteo
+    '"latitude": ', '"longitude": ', '"generationtime_ms": ', '"utc_offset_seconds": ',
+    '"timezone": "', '"timezone_abbreviation": "', '"elevation": ', '"current_units": {',
+    '"hourly_units": {', '"daily_units": {', '"interval": ', '"temperature_2m": ',
+    '"relative_humidity_2m": ', '"weather_code": ', '"wind_speed_10m": ',
+    '"wind_direction_10m": ', '"precipitation_probability": ', '"temperature_2m_max": ',
+    '"temperature_2m_min": ', '"precipitation_probability_max": ', '"wind_speed_10m_max": ',
+    '"wind_direction_10m_dominant": ', '"relative_humidity_2m_mean": ', '"unixtime"',
+    '"\\u00b0F"', '"mp/h"', '"time": [',
+    # weather underground conditions and alerts
+    '"response": {"version": "0.1", "termsofService": '
+    '"http://www.wunderground.com/weather/api/d/terms.html", "features": {',
+    '"current_observation": {', '"image": {"url": "http://icons.wxug.com/graphics/wu2/'
+    'logo_130x80.png", "title": "Weather Underground", "link": "http://www.wunderground.com"}',
+    '"display_location": {"full": "', '"city": "', '"state": "', '"state_name": "',
+    '"country": "US", "country_iso3166": "US", "zip": "', '"magic": "', '"wmo": "',
+    '"observation_location": {', '"estimated": {}', '"station_id": "', '"observation_time": '
+    '"Last Updated on ', '"observation_time_rfc822": "', '"observation_epoch": "',
+    '"local_time_rfc822": "', '"local_epoch": "', '"local_tz_short": "', '"local_tz_long": "',
+    '"local_tz_offset": "', '"weather": "', '"temperature_string": "', '"temp_f": ',
+    '"temp_c": ', '"relative_humidity": "', '"wind_string": "', '"wind_dir": "',
+    '"wind_degrees": ', '"wind_mph": ', '"wind_gust_mph": ', '"wind_kph": ', '"wind_gust_kph": ',
+    '"pressure_mb": "', '"pressure_in": "', '"pressure_trend": "', '"dewpoint_string": "',
+    '"dewpoint_f": ', '"dewpoint_c": ', '"heat_index_string": "NA", "heat_index_f": "NA", '
+    '"heat_index_c": "NA"', '"windchill_string": "NA", "windchill_f": "NA", "windchill_c": "NA"',
+    '"feelslike_string": "', '"feelslike_f": "', '"feelslike_c": "', '"visibility_mi": "',
+    '"visibility_km": "', '"solarradiation": "', '"UV": "', '"precip_1hr_string": "',
+    '"precip_1hr_in": "', '"precip_1hr_metric": "', '"precip_today_string": "',
+    '"precip_today_in": "', '"precip_today_metric": "', '"icon_url": "http://icons.wxug.com/i/c/k/',
+    '"forecast_url": "http://www.wunderground.com/US/', '"history_url": "http://www.wunderground.com/'
+    'weatherstation/WXDailyHistory.asp?ID=', '"ob_url": "http://www.wunderground.com/cgi-bin/'
+    'findweather/getForecast?query=', '"alerts": [', '"type": "', '"description": "', '"date": "',
+    '"date_epoch": "', '"expires": "', '"expires_epoch": "', '"message": "', '"phenomena": "',
+    '"significance": "',
+    # weather underground forecasts
+    '"forecast": {"txt_forecast": {', '"simpleforecast": {"forecastday": [', '"fcttext": "',
+    '"fcttext_metric": "', '"title": "', '"period": ', '"date": {"epoch": "', '"pretty": "',
+    '"monthname": "', '"monthname_short": "', '"weekday_short": "', '"weekday": "',
+    '"tz_short": "', '"tz_long": "America/', '"high": {"fahrenheit": "', '"low": {"fahrenheit": "',
+    '"celsius": "', '"conditions": "', '"skyicon": "', '"qpf_allday": {"in": ', '"qpf_day": {"in": ',
+    '"qpf_night": {"in": ', '"snow_allday": {"in": ', '"snow_day": {"in": ',
+    '"snow_night": {"in": ', '"mm": ', '"cm": ', '"maxwind": {"mph": ', '"avewind": {"mph": ',
+    '"kph": ', '"dir": "', '"degrees": ', '"avehumidity": ', '"maxhumidity": ',
+    '"minhumidity": ', '"hourly_forecast": [',
+    '"FCTTIME": {"hour": "', '"hour_padded": "', '"min": "00", "min_unpadded": "0", "sec": "0"',
+    '"year": "', '"mon": "', '"mon_padded": "', '"mon_abbrev": "', '"mday": "', '"mday_padded": "',
+    '"yday": "', '"isdst": "', '"epoch": "', '"civil": "', '"month_name": "',
+    '"month_name_abbrev": "', '"weekday_name": "', '"weekday_name_night": "',
+    '"weekday_name_abbrev": "', '"weekday_name_unlang": "', '"weekday_name_night_unlang": "',
+    '"ampm": "', '"tz": "", "age": "", "UTCDATE": ""', '"temp": {"english": "',
+    '"dewpoint": {"english": "', '"condition": "', '"icon": "', '"fctcode": "', '"sky": "',
+    '"wspd": {"english": "', '"wdir": {"dir": "', '"wx": "', '"uvi": "', '"humidity": "',
+    '"windchill": {"english": "-9999", "metric": "-9999"}',
+    '"heatindex": {"english": "-9999", "metric": "-9999"}', '"feelslike": {"english": "',
+    '"qpf": {"english": "', '"snow": {"english": "', '"pop": "', '"mslp": {"english": "',
+    '"metric": "',
+    # Values
+    'January', 'February', 'March', 'April', 'June', 'July', 'August', 'September',
+    'October', 'November', 'December', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
+    'Saturday', 'Sunday', ' Night', 'North', 'South', 'East', 'West', 'Variable', 'NNE', 'ENE',
+    'ESE', 'SSE', 'SSW', 'WSW', 'WNW', 'NNW', '"Calm"', 'From the ', ' at ', ' MPH', ' EDT on ',
+    ' EST on ', ' CDT on ', ' PDT on ', ':00 AM', ':00 PM', 'Fog', 'Haze', 'Snow', 'Sleet',
+    'Flurries', 'Freezing Rain', 'Chance of Snow', 'Chance of Rain', 'Chance of Flurries',
+    'Chance of Sleet', 'Chance of a Thunderstorm', 'Thunderstorm', 'Rain', 'Overcast',
+    'Mostly Sunny', 'Partly Sunny', 'Sunny', 'Mostly Cloudy', 'Partly Cloudy', 'Clear',
+    'clear', 'cloudy', 'mostlycloudy', 'partlycloudy', 'chancetstorms', 'chancerain',
+    'http://icons.wxug.com/i/c/k/', '.gif"',
+]
+ZDICT = "".join(_ZDICT_TOKENS).encode('utf-8')
+
+# Names how bodies are stored, bodies stored another way are read as misses
+if sys.version_info >= (3, 3):
+    ENCODING = "deflate-%08x" % (zlib.crc32(ZDICT) & 0xffffffff)
+else:
+    # Preset dictionaries need python 3.3
+    ENCODING = "deflate"
+
+_MAGIC = b"WPR1"
+# Magic, index width, then the bytes of the value table and of the rest
+# of the response, and the number of hourly and forecast records, or
+# _ABSENT when the response has none
+_HEADER = struct.Struct("<4sBIIII")
+_ABSENT = 0xffffffff
+_RECORDS = [('hourly', HourlyPoint), ('forecast', ForecastDay)]
+
+_intern = getattr(sys, 'intern', None)
+
+
+def compress(body):
+    if ENCODING == "deflate":
+        return zlib.compress(body)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS, 9, zlib.Z_DEFAULT_STRATEGY,
+                                  ZDICT)
+    return compressor.compress(body) + compressor.flush()
+
+
+def decompress(data):
+    """
+    Returns a body stored with compress, raises zlib.error when it's damaged
+    """
+    if ENCODING == "deflate":
+        return zlib.decompress(data)
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS, ZDICT)
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def pack_response(data):
+    """
+    Returns a normalized response packed into bytes
+    """
+    table = []
+    # (type, value) keys, as 1, 1.0 and True are equal
+    positions = {}
+    counts = []
+    columns = []
+    for key, record_type in _RECORDS:
+        records = data.get(key)
+        if records is None:
+            counts.append(_ABSENT)
+            continue
+        counts.append(len(records))
+        for record in records:
+            for value in record:
+                position = positions.get((type(value), value))
+                if position is None:
+                    position = positions[(type(value), value)] = len(table)
+                    table.append(value)
+                columns.append(position)
+
+    rest = dict((key, value) for key, value in data.items()
+                if key not in ('hourly', 'forecast'))
+    table_bytes = json.dumps(table, separators=(',', ':')).encode('utf-8')
+    rest_bytes = json.dumps(rest, separators=(',', ':')).encode('utf-8')
+    width = 2 if len(table) <= 0xffff else 4
+    index_format = "<%d%s" % (len(columns), "H" if width == 2 else "I")
+    return (_HEADER.pack(_MAGIC, width, len(table_bytes), len(rest_bytes), *counts) +
+            table_bytes + rest_bytes + struct.pack(index_format, *columns))
+
+
+def unpack_response(packed):
+    """
+    Returns the normalized response in bytes made by pack_response,
+    raises ValueError when they aren't
+    """
+    try:
+        magic, width, table_size, rest_size, hourly, forecast = _HEADER.unpack_from(packed)
+    except struct.error:
+        raise ValueError("Not a packed response")
+    if magic != _MAGIC:
+        raise ValueError("Not a packed response")
+
+    offset = _HEADER.size
+    table = json.loads(packed[offset:offset + table_size].decode('utf-8'))
+    offset += table_size
+    data = json.loads(packed[offset:offset + rest_size].decode('utf-8'))
+    offset += rest_size
+    if _intern is not None:
+        # Records of every response share their condition names and months
+        table = [_intern(value) if isinstance(value, str) else value for value in table]
+
+    for (key, record_type), count in zip(_RECORDS, (hourly, forecast)):
+        if count == _ABSENT:
+            continue
+        fields = len(record_type._fields)
+        size = count * fields
+        try:
+            indexes = struct.unpack_from("<%d%s" % (size, "H" if width == 2 else "I"),
+                                         packed, offset)
+            values = [table[index] for index in indexes]
+        except (struct.error, IndexError):
+            raise ValueError("Truncated packed response")
+        offset += size * width
+        data[key] = [record_type._make(values[start:start + fields])
+                     for start in range(0, size, fields)]
+    return data
@@ -0,0 +1,189 @@
+from __future__ import print_function
+
+import sys
+import time
+import heapq
+import random
+import argparse
+import threading
+
+# Refresh this fraction of a response's TTL before it expires
+REFRESH_LEAD = 0.1
+
+# Backoff after failed refreshes, in seconds
+MIN_BACKOFF = 30
+MAX_BACKOFF = 30 * 60
+
+_FEATURE_FLAGS = ("now", "alerts", "hourly", "forecast", "extended")
+
+
+class WatchJob(object):
+    """
+    A url from the watch list and when it should next be refreshed. With
+    split, args asks for one url per feature and part is which one.
+    """
+    def __init__(self, location, api_url, ttl, args=None, part=None):
+        self.location = location
+        self.api_url = api_url
+        self.ttl = ttl
+        self.args = args
+        self.part = part
+        self.failures = 0
+
+    def url_for(self, settings, location):
+        """
+        Returns the job's url for a resolved location
+        """
+        from . import weather
+
+        if self.part is not None:
+            return weather.make_feature_urls(self.args, settings, location)[self.part]
+        return weather.make_api_url(self.args, settings, location)
+
+    def refresh_delay(self):
+        """
+        Seconds from a successful refresh until the next one
+        """
+        lead = self.ttl * REFRESH_LEAD
+        return self.ttl - lead + random.uniform(-lead / 2, lead / 2)
+
+    def backoff_delay(self):
+        """
+        Seconds to wait after the refresh failed, doubling on every
+        consecutive failure
+        """
+        delay = min(MAX_BACKOFF, MIN_BACKOFF * 2 ** (self.failures - 1))
+        return delay * random.uniform(0.5, 1)
+
+
+def make_watch_args(entry):
+    """
+    Returns program arguments equivalent to a watch list entry, which is
+    either a location string or a dict such as
+    {"location": "48104", "features": ["now", "hourly"], "split": false}
+    """
+    if not isinstance(entry, dict):
+        entry = {'location': entry}
+
+    features = entry.get('features') or ["now"]
+    args = argparse.Namespace(location=[], split=entry.get('split', False),
+                              no_cache=True, max_age=None)
+    for flag in _FEATURE_FLAGS:
+        setattr(args, flag, flag in features)
+    return entry.get('location'), args
+
+
+def make_jobs(settings, cache, index=None):
+    """
+    Returns a WatchJob for every url the watch list in settings needs.
+    Locations are resolved through the location index, so the urls are
+    the ones regular calls read from the cache.
+    """
+    from . import weather
+    from .locations import LocationIndex, resolve
+
+    provider = weather.get_provider(settings)
+    index = index or LocationIndex.from_settings(settings)
+    jobs = []
+    for entry in settings.get('watch', []):
+        location, args = make_watch_args(entry)
+        resolved, _ = resolve(provider, index, location)
+        if args.split:
+            parts = list(enumerate(weather.make_feature_urls(args, settings, resolved)))
+        else:
+            parts = [(None, weather.make_api_url(args, settings, resolved))]
+        for part, api_url in parts:
+            jobs.append(WatchJob(location, api_url, cache.ttl_for(api_url), args, part))
+    return jobs
+
+
+class PrefetchScheduler(object):
+    """
+    Keeps the responses for every location on the watch list warm in
+    the response cache by refreshing them shortly before they expire.
+
+    Refreshes are spread out with random jitter, wait for the API key
+    quota shared with every other weatherpy process (see quota) and back
+    off exponentially while a url keeps failing.
+    """
+    def __init__(self, settings, session=None, out=None):
+        from .cache import ResponseCache
+        from .providers import get_provider
+        from .quota import Quota
+        from .transport import Transport
+
+        self.settings = settings
+        self.session = session or Transport.from_settings(settings)
+        self.out = out or sys.stderr
+        self.cache = ResponseCache.from_settings(settings)
+        self.quota = Quota.from_settings(settings, get_provider(settings))
+        self.stopped = threading.Event()
+        self.queue = []
+
+        now = time.time()
+        for index, job in enumerate(make_jobs(settings, self.cache)):
+            entry = self.cache.lookup(job.api_url)
+            if entry is not None and entry.age < job.ttl:
+                due = entry.stored_at + job.refresh_delay()
+            else:
+                due = now + random.uniform(0, job.ttl * REFRESH_LEAD)
+            # The index breaks ties so jobs are never compared
+            heapq.heappush(self.queue, (due, index, job))
+
+    def run(self):
+        """
+        Refreshes urls as they come due until stop() is called
+        """
+        while self.queue and not self.stopped.is_set():
+            due, index, job = self.queue[0]
+            delay = due - time.time()
+            if self.quota is not None:
+                delay = max(delay, self.quota.wait_time())
+            if delay > 0:
+                self.stopped.wait(delay)
+                continue
+
+            heapq.heappop(self.queue)
+            due = time.time() + self.refresh(job)
+            heapq.heappush(self.queue, (due, index, job))
+
+    def refresh(self, job):
+        """
+        Fetches a fresh response for the job, returns the seconds until
+        it should run again
+        """
+        from . import weather
+        from .locations import LocationIndex, resolve, learn
+
+        # Regular calls may have learned the location since the last refresh
+        provider = weather.get_provider(self.settings)
+        index = LocationIndex.from_settings(self.settings)
+        resolved, known = resolve(provider, index, job.location)
+        job.api_url = job.url_for(self.settings, resolved)
+
+        args = argparse.Namespace(no_cache=True, max_age=None)
+        try:
+            entry = weather.fetch_response(job.api_url, args, self.settings, self.session)
+            if not known:
+                data = weather.decode_entry(entry, provider, provider.response_paths(job.args))
+                learn(provider, index, job.location, data)
+        except Exception as e:
+            job.failures += 1
+            print("weatherpy prefetch: {0} failed: {1}".format(job.location, e),
+                  file=self.out)
+            return job.backoff_delay()
+
+        job.failures = 0
+        return job.refresh_delay()
+
+    def start(self):
+        """
+        Runs the scheduler on a background thread
+        """
+        thread = threading.Thread(target=self.run)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.stopped.set()
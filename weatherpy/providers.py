@@ -0,0 +1,314 @@
+# -*- encoding: utf-8 -*-
+"""
+Weather services weatherpy can fetch from.
+
+A provider turns the features and location asked for into an API url,
+and a decoded API response into the normalized model the printer reads:
+
+    'response'             errors, {'error': {'description': ...}}, or
+                           ambiguous matches, {'results': [...]}
+    'current_observation'  dict of display_location.full, temp_f, temp_c,
+                           weather, wind_string and relative_humidity
+    'alerts'               list of dicts with a message and its expires time
+    'hourly'               list of HourlyPoints
+    'forecast'             list of ForecastDays
+
+Features are named after the weather underground ones: conditions,
+alerts, hourly, forecast and forecast10day.
+"""
+import time
+
+from .records import HourlyPoint, ForecastDay, normalize_response
+
+DEFAULT_PROVIDER = "wunderground"
+
+
+class ProviderError(ValueError):
+    """
+    Raised when a provider can't serve the request, such as a location
+    it doesn't understand
+    """
+
+
+class Provider(object):
+    name = None
+    # Where the API lives, the api_root setting overrides it
+    API_ROOT = None
+    # Requests per minute and per day of the free plan, see quota
+    QUOTA = None
+
+    def api_root(self, settings):
+        return settings.get('api_root') or self.API_ROOT
+
+    def make_api_url(self, settings, location, features):
+        """
+        Returns the url of the response with features for location, a
+        string, or for the default location when it's None
+        """
+        raise NotImplementedError
+
+    def request_url(self, settings, url, api_key):
+        """
+        Returns url, made with the api_key setting, with api_key in its
+        place. Responses are cached under the url made with api_key.
+        """
+        return url
+
+    def response_paths(self, args):
+        """
+        Returns the paths of the subtrees of a response that the sections
+        asked for by the program arguments need, see decoding.prune
+        """
+        raise NotImplementedError
+
+    def normalize(self, data):
+        """
+        Returns the normalized model of a decoded response
+        """
+        raise NotImplementedError
+
+    def location_id(self, data):
+        """
+        Returns the canonical location of a normalized response, which
+        can be requested in place of the query that got it, or None
+        """
+        return None
+
+    def location_matches(self, data):
+        """
+        Returns the locations an ambiguous query matched in a normalized
+        response, as dicts with a location and a name
+        """
+        return []
+
+
+class Wunderground(Provider):
+    """
+    The weather underground API, which weatherpy was written against
+    """
+    name = "wunderground"
+    API_ROOT = "http://api.wunderground.com/api/"
+    QUOTA = (10, 500)
+
+    @staticmethod
+    def query_path(features):
+        return "".join(feature + "/" for feature in features)
+
+    def make_api_url(self, settings, location, features):
+        base_url = self.api_root(settings) + "%s/" % settings.api_key
+
+        # Create a location string, or use autoip
+        query = "q/%s.json"
+        if location:
+            query = query % location.replace(" ", "_")
+        else:
+            query = query % "autoip"
+        return base_url + self.query_path(features) + query
+
+    def request_url(self, settings, url, api_key):
+        prefix = self.api_root(settings) + "%s/" % settings.get('api_key')
+        if api_key is None or not url.startswith(prefix):
+            return url
+        return self.api_root(settings) + "%s/" % api_key + url[len(prefix):]
+
+    def response_paths(self, args):
+        paths = [('response',)]
+        if args.alerts:
+            paths += [('alerts',), ('current_observation', 'display_location')]
+        if args.now:
+            paths.append(('current_observation',))
+        if args.hourly:
+            paths.append(('hourly_forecast',))
+        if args.forecast or args.extended:
+            paths.append(('forecast', 'simpleforecast', 'forecastday'))
+        return paths
+
+    def normalize(self, data):
+        return normalize_response(data)
+
+    def location_id(self, data):
+        location = data.get('current_observation', {}).get('display_location', {})
+        if not all(location.get(key) for key in ('zip', 'magic', 'wmo')):
+            return None
+        return "zmw:{0}.{1}.{2}".format(location['zip'], location['magic'], location['wmo'])
+
+    def location_matches(self, data):
+        return [{'location': "zmw:" + result['zmw'],
+                 'name': "{0}, {1} {2}".format(result['name'], result['state'],
+                                               result['country_name'])}
+                for result in data.get('response', {}).get('results', [])
+                if result.get('zmw')]
+
+
+# Descriptions of the WMO weather interpretation codes open-meteo reports
+WMO_CODES = {
+    0: "Clear", 1: "Mostly Clear", 2: "Partly Cloudy", 3: "Overcast",
+    45: "Fog", 48: "Freezing Fog",
+    51: "Light Drizzle", 53: "Drizzle", 55: "Heavy Drizzle",
+    56: "Freezing Drizzle", 57: "Freezing Drizzle",
+    61: "Light Rain", 63: "Rain", 65: "Heavy Rain",
+    66: "Freezing Rain", 67: "Freezing Rain",
+    71: "Light Snow", 73: "Snow", 75: "Heavy Snow", 77: "Snow Grains",
+    80: "Rain Showers", 81: "Rain Showers", 82: "Heavy Rain Showers",
+    85: "Snow Showers", 86: "Heavy Snow Showers",
+    95: "Thunderstorm", 96: "Thunderstorm with Hail", 99: "Thunderstorm with Hail",
+}
+
+COMPASS_POINTS = ["North", "NNE", "NE", "ENE", "East", "ESE", "SE", "SSE",
+                  "South", "SSW", "SW", "WSW", "West", "WNW", "NW", "NNW"]
+
+OPEN_METEO_CURRENT = "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m,wind_direction_10m"
+OPEN_METEO_HOURLY = "temperature_2m,precipitation_probability,weather_code"
+OPEN_METEO_DAILY = ("weather_code,temperature_2m_max,temperature_2m_min,"
+                    "precipitation_probability_max,wind_speed_10m_max,"
+                    "wind_direction_10m_dominant,relative_humidity_2m_mean")
+
+# Hours in weather underground's hourly forecast
+HOURLY_HOURS = 36
+
+
+class OpenMeteo(Provider):
+    """
+    open-meteo.com, which needs no API key but only takes locations as
+    coordinates, 'latitude,longitude'. It has no weather alerts.
+    """
+    name = "open-meteo"
+    API_ROOT = "https://api.open-meteo.com/v1/"
+    QUOTA = (600, 10000)
+
+    def make_api_url(self, settings, location, features):
+        if not location:
+            raise ProviderError("open-meteo needs a location given as latitude,longitude")
+        try:
+            latitude, longitude = [float(part) for part in location.replace(",", " ").split()]
+        except ValueError:
+            raise ProviderError("open-meteo needs a location given as latitude,longitude, "
+                                "not {0}".format(location))
+
+        params = [("latitude", "%g" % latitude), ("longitude", "%g" % longitude)]
+        if "conditions" in features or "alerts" in features:
+            params.append(("current", OPEN_METEO_CURRENT))
+        if "hourly" in features:
+            params += [("hourly", OPEN_METEO_HOURLY), ("forecast_hours", str(HOURLY_HOURS))]
+        if "forecast" in features or "forecast10day" in features:
+            days = 10 if "forecast10day" in features else 4
+            params += [("daily", OPEN_METEO_DAILY), ("forecast_days", str(days))]
+        params += [("temperature_unit", "fahrenheit"), ("wind_speed_unit", "mph"),
+                   ("timeformat", "unixtime"), ("timezone", "auto")]
+
+        return (self.api_root(settings) + "forecast?" +
+                "&".join("%s=%s" % param for param in params))
+
+    def response_paths(self, args):
+        paths = [('error',), ('reason',), ('latitude',), ('longitude',),
+                 ('utc_offset_seconds',)]
+        if args.alerts or args.now:
+            paths.append(('current',))
+        if args.hourly:
+            paths.append(('hourly',))
+        if args.forecast or args.extended:
+            paths.append(('daily',))
+        return paths
+
+    def normalize(self, data):
+        if data.get('error'):
+            return {'response': {'error': {'description': data.get('reason', "open-meteo error")}}}
+
+        normalized = {'response': {}}
+        offset = data.get('utc_offset_seconds', 0)
+        if 'current' in data:
+            normalized['current_observation'] = self._normalize_current(data)
+            normalized['alerts'] = []
+        if 'hourly' in data:
+            normalized['hourly'] = self._normalize_hourly(data['hourly'], offset)
+        if 'daily' in data:
+            normalized['forecast'] = self._normalize_daily(data['daily'], offset)
+        return normalized
+
+    def _normalize_current(self, data):
+        current = data['current']
+        temp_f = current['temperature_2m']
+        speed = current['wind_speed_10m']
+        if _whole(speed) == 0:
+            wind = "Calm"
+        else:
+            wind = "From the {0} at {1} MPH".format(
+                compass_point(current['wind_direction_10m']), _whole(speed))
+        return {
+            'display_location': {'full': "{0}, {1}".format(data['latitude'], data['longitude'])},
+            'temp_f': temp_f,
+            'temp_c': round((temp_f - 32) * 5.0 / 9, 1),
+            'weather': WMO_CODES.get(current['weather_code'], "Unknown"),
+            'wind_string': wind,
+            'relative_humidity': "{0}%".format(current['relative_humidity_2m']),
+            'observation_epoch': current.get('time'),
+            'wind_mph': speed,
+        }
+
+    def _normalize_hourly(self, hourly, offset):
+        points = []
+        for epoch, temp, pop, code in zip(hourly['time'], hourly['temperature_2m'],
+                                          hourly['precipitation_probability'],
+                                          hourly['weather_code']):
+            local = time.gmtime(epoch + offset)
+            civil = "{0}:{1:02d} {2}".format(local.tm_hour % 12 or 12, local.tm_min,
+                                             "AM" if local.tm_hour < 12 else "PM")
+            points.append(HourlyPoint(
+                epoch, time.strftime("%b", local), local.tm_mday, local.tm_hour,
+                local.tm_min, civil, _whole(temp), None, pop,
+                WMO_CODES.get(code, "Unknown"),
+            ))
+        return points
+
+    def _normalize_daily(self, daily, offset):
+        days = []
+        for values in zip(daily['time'], daily['weather_code'], daily['temperature_2m_max'],
+                          daily['temperature_2m_min'], daily['precipitation_probability_max'],
+                          daily['wind_speed_10m_max'], daily['wind_direction_10m_dominant'],
+                          daily['relative_humidity_2m_mean']):
+            epoch, code, high, low, pop, wind, direction, humidity = values
+            local = time.gmtime(epoch + offset)
+            days.append(ForecastDay(
+                epoch, time.strftime("%B", local), local.tm_mday, time.strftime("%a", local),
+                WMO_CODES.get(code, "Unknown"), pop, _whole(high), None, _whole(low), None,
+                _whole(wind), None, compass_point(direction), _whole(humidity),
+            ))
+        return days
+
+
+def compass_point(degrees):
+    """
+    Returns the name of the nearest of 16 compass points, the way weather
+    underground names wind directions
+    """
+    if degrees is None:
+        return "Variable"
+    return COMPASS_POINTS[int((degrees % 360) / 22.5 + 0.5) % 16]
+
+
+def _whole(value):
+    """
+    Rounds a measurement half away from zero, values that aren't numbers
+    are returned unchanged
+    """
+    if not isinstance(value, (int, float)):
+        return value
+    return int(value + 0.5) if value >= 0 else -int(-value + 0.5)
+
+
+PROVIDERS = {
+    Wunderground.name: Wunderground,
+    OpenMeteo.name: OpenMeteo,
+}
+
+
+def get_provider(settings):
+    """
+    Returns the provider named by the provider setting
+    """
+    name = settings.get('provider') or DEFAULT_PROVIDER
+    try:
+        return PROVIDERS[name]()
+    except KeyError:
+        raise ProviderError("Unknown provider {0}, choose one of {1}".format(
+            name, ", ".join(sorted(PROVIDERS))))
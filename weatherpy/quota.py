@@ -0,0 +1,249 @@
+"""
+Request quotas of API keys, shared by every weatherpy process on the
+machine.
+
+Each key has a token bucket refilled at its per-minute budget and a
+count of the requests it made today (UTC), both kept in a JSON state
+file under the cache directory and only changed while holding a lock on
+it. Keys and budgets come from .weatherrc:
+
+    {
+        "api_keys": ["key-one", {"key": "key-two", "per_minute": 5, "per_day": 200}],
+        "quota": {"per_minute": 10, "per_day": 500, "selection": "round-robin", "wait": 60}
+    }
+
+Requests are only limited when quota or api_keys is set. api_keys
+defaults to api_key, and budgets left out default to the provider's
+free plan, so "quota": {} alone limits api_key to it. selection is
+"least-used" (default) or "round-robin". A server set with api_root,
+such as weatherpy.mockserver, isn't the provider's API and has no quota
+unless quota is set.
+"""
+from __future__ import print_function
+
+import os
+import time
+import zlib
+
+from .cache import WEATHER_CACHE_DIR, FetchLock, load_json_state, save_json_state
+
+QUOTA_FILE = "quota.json"
+
+SELECTIONS = ("least-used", "round-robin")
+
+# Seconds a request waits for the quota to allow it before giving up,
+# when there's no stale response to show instead
+DEFAULT_WAIT = 60
+
+# Seconds the state file lock is waited for, a crashed process can't
+# hold it but a stuck one shouldn't stop every other
+_LOCK_TIMEOUT = 5
+
+class QuotaError(ValueError):
+    """
+    Raised when no API key may make a request soon enough
+    """
+
+
+class KeyBudget(object):
+    """
+    An API key and the requests it may make per minute and per day
+    """
+    def __init__(self, key, per_minute, per_day):
+        self.key = key
+        self.per_minute = float(per_minute)
+        self.per_day = per_day
+
+    @property
+    def key_id(self):
+        # The state file identifies keys without storing them
+        return "%08x" % (zlib.crc32((self.key or "").encode('utf-8')) & 0xffffffff)
+
+    @property
+    def masked(self):
+        if not self.key:
+            return "(no key)"
+        return self.key[:4] + "*" * max(0, min(len(self.key), 12) - 4)
+
+
+def _today(now):
+    return time.strftime("%Y-%m-%d", time.gmtime(now))
+
+
+def _seconds_to_tomorrow(now):
+    return 86400 - now % 86400
+
+
+class Quota(object):
+    """
+    The budgets of one provider's API keys
+    """
+    def __init__(self, path, provider_name, budgets, selection="least-used",
+                 wait=DEFAULT_WAIT, clock=time.time, sleep=time.sleep):
+        if selection not in SELECTIONS:
+            raise QuotaError("Unknown quota selection {0}, choose one of {1}".format(
+                selection, ", ".join(SELECTIONS)))
+        self.path = path
+        self.provider_name = provider_name
+        self.budgets = budgets
+        self.selection = selection
+        self.wait = wait
+        self.clock = clock
+        self.sleep = sleep
+
+    @classmethod
+    def from_settings(cls, settings, provider):
+        """
+        Builds the quota of a provider from the api_keys and quota keys of
+        the weatherrc file, returns None when requests aren't limited
+        """
+        if settings.get('quota') is None and (settings.get('api_root') or
+                                              not settings.get('api_keys')):
+            return None
+        options = settings.get('quota') or {}
+        per_minute = options.get('per_minute', provider.QUOTA[0])
+        per_day = options.get('per_day', provider.QUOTA[1])
+
+        budgets = []
+        for entry in settings.get('api_keys') or [settings.get('api_key')]:
+            if not isinstance(entry, dict):
+                entry = {'key': entry}
+            budgets.append(KeyBudget(entry.get('key'), entry.get('per_minute', per_minute),
+                                     entry.get('per_day', per_day)))
+
+        directory = os.path.expanduser(settings.get('cache_dir') or WEATHER_CACHE_DIR)
+        return cls(os.path.join(directory, QUOTA_FILE), provider.name, budgets,
+                   options.get('selection', "least-used"), options.get('wait', DEFAULT_WAIT))
+
+    def take(self):
+        """
+        Spends one request of a key that has one left and returns its
+        KeyBudget, or returns None when every key is out of requests for now
+        """
+        with FetchLock(self.path + ".lock", _LOCK_TIMEOUT):
+            state = self._load()
+            now = self.clock()
+            keys = state.setdefault(self.provider_name, {})
+            usable = [index for index, budget in enumerate(self.budgets)
+                      if self._refill(budget, keys, now)['tokens'] >= 1
+                      and keys[budget.key_id]['today'] < budget.per_day]
+            if not usable:
+                return None
+
+            if self.selection == "round-robin":
+                start = state.get('next', {}).get(self.provider_name, 0)
+                chosen = min(usable, key=lambda index: (index - start) % len(self.budgets))
+                state.setdefault('next', {})[self.provider_name] = chosen + 1
+            else:
+                chosen = min(usable, key=lambda index: keys[self.budgets[index].key_id]['today'])
+
+            budget = self.budgets[chosen]
+            usage = keys[budget.key_id]
+            usage['tokens'] -= 1
+            usage['today'] += 1
+            usage['total'] = usage.get('total', 0) + 1
+            usage['last_used'] = now
+            self._save(state)
+            return budget
+
+    def acquire(self):
+        """
+        Returns the KeyBudget of a key to make a request with, waiting up
+        to the wait setting for one to have a request left
+        """
+        deadline = self.clock() + self.wait
+        while True:
+            budget = self.take()
+            if budget is not None:
+                return budget
+            delay = self.wait_time()
+            if self.clock() + delay > deadline:
+                raise QuotaError("The API quota is used up, the next request can be "
+                                 "made in {0:.0f} seconds".format(delay))
+            self.sleep(delay)
+
+    def refund(self, budget):
+        """
+        Gives back a request taken with take or acquire that wasn't made
+        """
+        with FetchLock(self.path + ".lock", _LOCK_TIMEOUT):
+            state = self._load()
+            keys = state.setdefault(self.provider_name, {})
+            usage = self._refill(budget, keys, self.clock())
+            usage['tokens'] = min(budget.per_minute, usage['tokens'] + 1)
+            usage['today'] = max(0, usage['today'] - 1)
+            usage['total'] = max(0, usage.get('total', 0) - 1)
+            self._save(state)
+
+    def wait_time(self):
+        """
+        Returns how many seconds until a key may make a request
+        """
+        state = self._load()
+        now = self.clock()
+        keys = state.get(self.provider_name, {})
+        waits = []
+        for budget in self.budgets:
+            usage = self._refill(budget, keys, now)
+            if usage['today'] >= budget.per_day:
+                waits.append(_seconds_to_tomorrow(now))
+            else:
+                waits.append(max(0, (1 - usage['tokens']) * 60 / budget.per_minute))
+        return min(waits)
+
+    def usage(self):
+        """
+        Returns a (budget, usage) pair for every key, usage being a dict of
+        the requests available now, made today and made in total, and
+        when the key was last used
+        """
+        keys = self._load().get(self.provider_name, {})
+        now = self.clock()
+        return [(budget, self._refill(budget, keys, now)) for budget in self.budgets]
+
+    def _refill(self, budget, keys, now):
+        usage = keys.setdefault(budget.key_id, {'tokens': budget.per_minute, 'updated': now,
+                                                'day': _today(now), 'today': 0})
+        usage['tokens'] = min(budget.per_minute, usage['tokens'] + max(
+            0, now - usage['updated']) * budget.per_minute / 60)
+        usage['updated'] = now
+        if usage['day'] != _today(now):
+            usage['day'] = _today(now)
+            usage['today'] = 0
+        return usage
+
+    def _load(self):
+        return load_json_state(self.path)
+
+    def _save(self, state):
+        # Losing count of a request only makes the quota more generous
+        save_json_state(self.path, state)
+
+
+def print_report(settings, out):
+    """
+    Prints the usage of every API key of the configured provider
+    """
+    from .providers import get_provider
+    from .table import render_table
+
+    provider = get_provider(settings)
+    quota = Quota.from_settings(settings, provider)
+    if quota is None:
+        print("No API quota for {0}, set quota in .weatherrc to limit "
+              "requests".format(settings.get('api_root') or provider.name), file=out)
+        return
+    table = [["Key", "Available now", "Per minute", "Today", "Per day", "Total", "Last used"]]
+    for budget, usage in quota.usage():
+        last_used = usage.get('last_used')
+        table.append([
+            budget.masked,
+            "%d" % usage['tokens'],
+            "%g" % budget.per_minute,
+            "%d" % usage['today'],
+            "%d" % budget.per_day,
+            "%d" % usage.get('total', 0),
+            time.strftime("%Y-%m-%d %H:%M", time.localtime(last_used)) if last_used else "never",
+        ])
+    print("API quota for {0} ({1})".format(provider.name, quota.selection), file=out)
+    out.write(render_table(table))
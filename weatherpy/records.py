@@ -0,0 +1,84 @@
+from collections import namedtuple
+
+# One row of the hourly forecast
+HourlyPoint = namedtuple('HourlyPoint', [
+    'epoch', 'month', 'day', 'hour', 'minute', 'civil',
+    'temp_f', 'temp_c', 'pop', 'condition',
+])
+# The hourly forecast has no weekday names, so dates always print in full
+HourlyPoint.weekday = None
+
+# One day of the 3 or 10 day forecast
+ForecastDay = namedtuple('ForecastDay', [
+    'epoch', 'month', 'day', 'weekday', 'conditions', 'pop',
+    'high_f', 'high_c', 'low_f', 'low_c',
+    'wind_mph', 'wind_kph', 'wind_dir', 'humidity',
+])
+
+
+def to_number(value):
+    """
+    Weather underground returns numbers as both strings and ints, returns
+    value as an int or float when it is one, otherwise unchanged.
+    """
+    if isinstance(value, (int, float)) or value is None:
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def normalize_hourly(data):
+    """
+    Returns a list of HourlyPoints from the API's hourly_forecast list
+    """
+    points = []
+    for item in data:
+        time = item['FCTTIME']
+        points.append(HourlyPoint(
+            to_number(time['epoch']), time['mon_abbrev'], to_number(time['mday']),
+            to_number(time['hour_padded']), to_number(time['min']), time['civil'],
+            to_number(item['temp']['english']), to_number(item['temp']['metric']),
+            to_number(item['pop']), item['condition'],
+        ))
+    return points
+
+
+def normalize_forecast(data):
+    """
+    Returns a list of ForecastDays from the API's simpleforecast days
+    """
+    days = []
+    for item in data:
+        date = item['date']
+        wind = item['avewind']
+        days.append(ForecastDay(
+            to_number(date['epoch']), date['monthname'], to_number(date['day']),
+            date.get('weekday_short'), item['conditions'], to_number(item['pop']),
+            to_number(item['high']['fahrenheit']), to_number(item['high']['celsius']),
+            to_number(item['low']['fahrenheit']), to_number(item['low']['celsius']),
+            to_number(wind['mph']), to_number(wind['kph']), wind['dir'],
+            to_number(item['avehumidity']),
+        ))
+    return days
+
+
+def normalize_response(data):
+    """
+    Returns a copy of a decoded API response with the hourly forecast
+    under 'hourly' and the daily forecast under 'forecast' as lists of
+    records. The raw forecast subtrees aren't referenced by the copy, so
+    they are freed along with the decoded response.
+    """
+    normalized = dict(data)
+    if 'hourly_forecast' in normalized:
+        normalized['hourly'] = normalize_hourly(normalized.pop('hourly_forecast'))
+    if 'forecast' in normalized:
+        forecast = normalized.pop('forecast')
+        normalized['forecast'] = normalize_forecast(forecast['simpleforecast']['forecastday'])
+    return normalized
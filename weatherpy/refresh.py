@@ -0,0 +1,79 @@
+"""
+Refreshes cached responses in a detached process, for runs that printed
+a stale response instead of waiting on the API (see the stale_window
+setting). The process outlives the run that started it and writes
+nowhere; the next run finds the new response in the cache.
+
+    python -m weatherpy.refresh [--provider NAME] < urls
+
+The urls, which hold the API key, are read one per line from stdin so
+they don't show up in the process list.
+"""
+import os
+import sys
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def spawn(urls, settings):
+    """
+    Starts a detached process refreshing urls, leaving out the ones that
+    are being fetched or refreshed already. A failure to start it only
+    means the next run refreshes them instead.
+    """
+    import subprocess
+    from .cache import ResponseCache
+
+    cache = ResponseCache.from_settings(settings)
+    urls = [url for url in urls if cache.claim_refresh(url)]
+    if not urls:
+        return
+
+    command = [sys.executable, "-m", "weatherpy.refresh"]
+    if settings.get('provider'):
+        command += ["--provider", settings.get('provider')]
+    # The child imports the same weatherpy as this process
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [PACKAGE_ROOT] + [path for path in [env.get('PYTHONPATH')] if path])
+    if sys.version_info >= (3, 2):
+        detach = {'start_new_session': True}
+    else:
+        detach = {'preexec_fn': getattr(os, 'setsid', None)}
+
+    try:
+        with open(os.devnull, 'r+b') as devnull:
+            child = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=devnull,
+                                     stderr=devnull, close_fds=True, env=env, **detach)
+        child.stdin.write("".join(url + "\n" for url in urls).encode('utf-8'))
+        child.stdin.close()
+    except (IOError, OSError):
+        pass
+
+
+def main(argv=None, settings=None, session=None):
+    import argparse
+    from .settings import Settings
+    from . import weather
+
+    parser = argparse.ArgumentParser(prog="python -m weatherpy.refresh",
+                                     description="Refresh cached weatherpy responses")
+    parser.add_argument('--provider', help='Provider the urls belong to')
+    parser.add_argument('urls', nargs='*',
+                        help='API urls to refresh, read from stdin when none are given')
+    args = parser.parse_args(argv)
+    settings = settings or Settings(args)
+    urls = args.urls or [line.strip() for line in sys.stdin if line.strip()]
+
+    # A url another process refreshed since is left alone
+    fetch_args = argparse.Namespace(max_age=None, no_cache=False)
+    for url in urls:
+        try:
+            weather.fetch_response(url, fetch_args, settings, session, stale_window=0)
+        except Exception:
+            # Nobody is listening, the next run tries again
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 import os
 import json
-from copy import deepcopy
 from .types import Units, TimeFormats, DateFormats
+from . import trace
 
 WEATHER_CONF_FILE = "~/.weatherrc"
 
+# Settings that command line arguments may override
+OVERRIDE_KEYS = ('units', 'time', 'date', 'provider')
+
+# Defaults merged with each weatherrc file this process has read, by path,
+# along with the file_key they were read at
+_loaded = {}
+
 
 class Settings(object):
     """
@@ -22,37 +29,30 @@ class Settings(object):
 
     def __init__(self, args=None):
         self.file_path = os.path.expanduser(WEATHER_CONF_FILE)
-        self.settings = deepcopy(self._settings)
 
         # Load (and create if needed) the weatherrc file
-        if not os.path.exists(self.file_path):
+        with trace.span("settings.load"):
+            base = _loaded_settings(self.file_path)
+        if base is None:
+            self.settings = dict(self._settings)
             self.generate_default_weatherrc()
         else:
-            with open(self.file_path) as weatherrc:
-                saved_settings = json.load(weatherrc)
-                for key in saved_settings:
-                    self._override(key, saved_settings)
+            self.settings = dict(base)
 
         if args is not None:
-            self._override("units", args)
-            self._override("time", args)
-            self._override("date", args)
+            self.settings.update(get_overrides(args))
 
-    def _override(self, key, args):
+    def copy(self, args=None):
         """
-        Updates the cached settings with the provided argument. Defaults to
-        the previous value if the key isn't found in the arguments object
-
-        :param key: Settings key to override, ex: 'time', 'units'
-        :param args: argument object provided to settings init function
+        Returns a copy of these settings with the argument overrides
+        applied, without reading the weatherrc file again.
         """
-        try:
-            if key in args and args[key] is not None:
-                self.settings[key] = args[key]
-        except TypeError:
-            if getattr(args, key, self.settings[key]) is not None:
-                self.settings[key] = getattr(args, key, self.settings[key])
-
+        settings = Settings.__new__(Settings)
+        settings.file_path = self.file_path
+        settings.settings = dict(self.settings)
+        if args is not None:
+            settings.settings.update(get_overrides(args))
+        return settings
 
     def generate_default_weatherrc(self):
         """
@@ -62,8 +62,73 @@ class Settings(object):
             weatherrc.write(json.dumps(self.settings, sort_keys=True,
                                        indent=4, separators=(',', ': ')))
 
+    def get(self, key, default=None):
+        """
+        Returns an optional setting, or default if it isn't configured
+        """
+        return self.settings.get(key, default)
+
     def __getattr__(self, attr):
         """
         Proxy attribute requests to the settings cache
         """
+        if attr.startswith("__"):
+            # Special methods pickle looks up, before settings is restored
+            raise AttributeError(attr)
         return self.settings[attr]
+
+
+def get_overrides(args):
+    """
+    Returns the settings given in an arguments object, either a dict or
+    an object with attributes such as an argparse namespace. Arguments
+    that are None leave the setting alone.
+
+    :param args: argument object provided to settings init function
+    """
+    if isinstance(args, dict):
+        values = [(key, args.get(key)) for key in OVERRIDE_KEYS]
+    else:
+        values = [(key, getattr(args, key, None)) for key in OVERRIDE_KEYS]
+    return dict((key, value) for key, value in values if value is not None)
+
+
+def file_key(path, stat=None):
+    """
+    Identifies a version of the file at path. Editors that save by
+    renaming a new file over the old one change its inode even when the
+    modification time and size come out the same.
+    """
+    stat = stat or os.stat(path)
+    return (path, stat.st_ino, stat.st_mtime, stat.st_size)
+
+
+def _loaded_settings(path):
+    """
+    Returns the defaults merged with the weatherrc file at path, reading
+    it only if it changed since this process last did, or None if
+    there's no file.
+    """
+    try:
+        key = file_key(path)
+    except OSError:
+        _loaded.pop(path, None)
+        return None
+
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    merged = dict(Settings._settings)
+    merged.update((name, value) for name, value in load_weatherrc(path).items()
+                  if value is not None)
+    _loaded[path] = (key, merged)
+    return merged
+
+
+def load_weatherrc(path):
+    """
+    Returns the parsed weatherrc file at path
+    """
+    with open(path) as weatherrc:
+        return json.load(weatherrc)
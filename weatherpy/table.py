@@ -0,0 +1,101 @@
+# Rows rendered per write when streaming a table
+STREAM_CHUNK_ROWS = 256
+
+
+def display_width(text):
+    """
+    Returns the number of terminal columns text takes up. Wide east
+    asian characters take two columns and combining marks none.
+    """
+    try:
+        text.encode('ascii')
+        return len(text)
+    except UnicodeError:
+        pass
+
+    import unicodedata
+    width = 0
+    for char in text:
+        if unicodedata.combining(char):
+            continue
+        width += 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+    return width
+
+
+def measure(rows, widths=None):
+    """
+    Returns the column widths of rows, grown from widths if given, along
+    with the display width of every cell, in a single pass over the rows.
+    """
+    widths = list(widths or [])
+    cell_widths = []
+    for row in rows:
+        row_widths = [display_width(cell) for cell in row]
+        for column, width in enumerate(row_widths):
+            if column == len(widths):
+                widths.append(width)
+            elif width > widths[column]:
+                widths[column] = width
+        cell_widths.append(row_widths)
+    return widths, cell_widths
+
+
+def render_rows(rows, cell_widths, widths):
+    """
+    Returns rows aligned to widths as one string: the first column is
+    left aligned and the rest are right aligned, two spaces apart.
+    """
+    lines = []
+    for row, row_widths in zip(rows, cell_widths):
+        cells = [row[0] + " " * (widths[0] + 1 - row_widths[0])]
+        for column in range(1, len(row)):
+            cells.append(" " * (widths[column] + 2 - row_widths[column]) + row[column])
+        lines.append("".join(cells))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def render_separator(widths):
+    return "-" * (sum(widths) + 3 * len(widths)) + "\n"
+
+
+def render_table(table):
+    """
+    Returns a table as one aligned string. The first row contains the
+    column names and every row has the same number of cells.
+    """
+    widths, cell_widths = measure(table)
+    return (render_rows(table[:1], cell_widths[:1], widths) +
+            render_separator(widths) +
+            render_rows(table[1:], cell_widths[1:], widths))
+
+
+def stream_table(out, header, rows, widths=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Writes a table whose rows come from an iterable too long to hold in
+    memory, one chunk of rows per write.
+
+    The column widths are fixed before the header is written: they are
+    the given widths, grown to fit the header and the first chunk. Later
+    rows that are wider than that push the rest of their line right.
+    """
+    rows = iter(rows)
+    chunk = _take(rows, chunk_rows)
+    widths, cell_widths = measure([header] + chunk, widths)
+
+    out.write(render_rows([header], cell_widths[:1], widths) + render_separator(widths))
+    cell_widths = cell_widths[1:]
+    while chunk:
+        out.write(render_rows(chunk, cell_widths, widths))
+        chunk = _take(rows, chunk_rows)
+        cell_widths = measure(chunk)[1]
+
+
+def _take(rows, count):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == count:
+            break
+    return chunk
+
@@ -0,0 +1,205 @@
+"""
+Timing spans around weatherpy's hot paths, for finding out where a slow
+run spends its time: settings loading, building urls, each phase of an
+HTTP request, decoding and every section printed.
+
+Tracing is off unless a Tracer is started, and then span() only checks a
+module global and returns a shared object that does nothing. A started
+tracer keeps running totals per span name, and optionally every span as
+an event for a Chrome trace (chrome://tracing, or ui.perfetto.dev):
+
+    weatherpy --profile -anoe 48104            summary table on stderr
+    WEATHERPY_TRACE=run.json weatherpy -anoe   trace events written to run.json
+"""
+from __future__ import print_function
+
+import os
+import time
+
+# Names a file to write the trace events of a run to
+TRACE_ENV = "WEATHERPY_TRACE"
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+# The running Tracer, None when tracing is off
+_tracer = None
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span(object):
+    """
+    Times the block it's entered for and hands it to the tracer on exit
+    """
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = _clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.start, _clock(), self.args)
+        return False
+
+
+class Tracer(object):
+    """
+    Collects spans from every thread: calls, total and longest duration
+    by name, and with keep_events every span with its thread and args
+    """
+    def __init__(self, keep_events=True):
+        import threading
+
+        self.keep_events = keep_events
+        self.started = _clock()
+        # name -> [calls, total seconds, longest seconds]
+        self.counters = {}
+        self.events = []
+        self._lock = threading.Lock()
+
+    def record(self, name, start, end, args=None):
+        import threading
+
+        duration = end - start
+        with self._lock:
+            counter = self.counters.get(name)
+            if counter is None:
+                counter = self.counters[name] = [0, 0.0, 0.0]
+            counter[0] += 1
+            counter[1] += duration
+            counter[2] = max(counter[2], duration)
+            if self.keep_events:
+                self.events.append((name, start, duration,
+                                    threading.current_thread().ident, args))
+
+    def snapshot(self):
+        """
+        Returns a copy of the counters, safe from spans recorded meanwhile
+        """
+        with self._lock:
+            return dict((name, tuple(counter)) for name, counter in self.counters.items())
+
+    def chrome_trace(self):
+        """
+        Returns the events as a Chrome trace event format dict
+        """
+        pid = os.getpid()
+        events = []
+        for name, start, duration, thread, args in self.events:
+            event = {
+                'name': name,
+                'cat': name.split(".", 1)[0],
+                'ph': "X",
+                'ts': round((start - self.started) * 1e6, 1),
+                'dur': round(duration * 1e6, 1),
+                'pid': pid,
+                'tid': thread,
+            }
+            if args:
+                event['args'] = args
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': "ms"}
+
+    def write_chrome_trace(self, path):
+        import json
+
+        with open(path, "w") as trace_file:
+            json.dump(self.chrome_trace(), trace_file)
+
+
+def span(name, **args):
+    """
+    Returns a context manager timing its block as the span name, args
+    are kept with the event for the trace viewer
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, args)
+
+
+def traced(name):
+    """
+    Decorates a function to run in a span
+    """
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with Span(_tracer, name, None):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+    return decorator
+
+
+def start(keep_events=True):
+    """
+    Starts tracing, returns the Tracer
+    """
+    global _tracer
+    _tracer = Tracer(keep_events)
+    return _tracer
+
+
+def stop():
+    """
+    Stops tracing, returns the Tracer that was running or None
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def current():
+    return _tracer
+
+
+def trace_path():
+    """
+    Returns the file the environment asks trace events to be written to
+    """
+    return os.environ.get(TRACE_ENV) or None
+
+
+def finish(summary, path, out):
+    """
+    Stops tracing, writing the trace events to path and a summary table
+    to out when asked for
+    """
+    tracer = stop()
+    if tracer is None:
+        return
+    if path:
+        tracer.write_chrome_trace(path)
+    if summary:
+        print_summary(tracer.snapshot(), out)
+
+
+def print_summary(counters, out, title="Timings"):
+    """
+    Prints a table of counters, slowest total first
+    """
+    from .table import render_table
+
+    table = [["Span", "Calls", "Total ms", "Mean ms", "Max ms"]]
+    for name, (calls, total, longest) in sorted(counters.items(),
+                                                key=lambda item: -item[1][1]):
+        table.append([name, "%d" % calls, "%.2f" % (total * 1e3),
+                      "%.2f" % (total * 1e3 / calls), "%.2f" % (longest * 1e3)])
+    print(title + ":", file=out)
+    out.write(render_table(table))
@@ -0,0 +1,233 @@
+import time
+import zlib
+
+from . import trace
+
+# Seconds to wait for a connection, and then for each read of the response
+DEFAULT_TIMEOUT = (5, 15)
+
+# Times a request is retried after a connection error or a retryable status
+DEFAULT_RETRIES = 2
+
+# Seconds before the first retry, doubled for every retry after it
+BACKOFF_FACTOR = 0.5
+MAX_BACKOFF = 8
+
+# Statuses that are worth retrying, the API returns them under load
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Keep-alive connections kept per host
+DEFAULT_POOL_SIZE = 8
+
+
+class HTTPError(IOError):
+    """
+    Raised for a response that isn't an answer from the API: a server
+    error, or a body that isn't JSON such as a captive portal's login page
+    """
+
+
+class Response(object):
+    """
+    The parts of an HTTP response weatherpy uses, named like the
+    attributes of a requests response
+    """
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        # Header names are lower case
+        self.headers = headers
+        self.content = content
+
+
+class Transport(object):
+    """
+    Pool of keep-alive HTTP connections built on the standard library, so
+    weatherpy doesn't need requests. Safe to share between threads; each
+    request takes a connection out of the pool while it runs.
+
+    Responses are requested gzipped, connecting and reading are bounded
+    by timeouts, and connection errors and overloaded responses are
+    retried with exponential backoff.
+    """
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff=BACKOFF_FACTOR, sleep=time.sleep):
+        import threading
+
+        self.pool_size = pool_size
+        if isinstance(timeout, (int, float)):
+            timeout = (timeout, timeout)
+        self.connect_timeout, self.read_timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+        # (scheme, host, port) -> idle connections
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings, pool_size=DEFAULT_POOL_SIZE):
+        """
+        Builds a transport from the optional http_* keys of the weatherrc file
+        """
+        return cls(pool_size=pool_size,
+                   timeout=settings.get('http_timeout', DEFAULT_TIMEOUT),
+                   retries=settings.get('http_retries', DEFAULT_RETRIES))
+
+    def get(self, url, headers=None):
+        """
+        Returns the Response for a GET request of url. Connection errors
+        are raised once the retries are used up; a response with a
+        retryable status is returned as is.
+        """
+        scheme, host, port, path = split_url(url)
+        request_headers = {'Accept-Encoding': "gzip"}
+        request_headers.update(headers or {})
+
+        attempt = 0
+        while True:
+            try:
+                response = self._request(scheme, host, port, path, request_headers)
+            except connection_errors():
+                if attempt >= self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+            self.sleep(min(MAX_BACKOFF, self.backoff * 2 ** attempt))
+            attempt += 1
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _request(self, scheme, host, port, path, headers):
+        key = (scheme, host, port)
+        connection = self._checkout(key)
+        if connection is not None:
+            try:
+                return self._send(key, connection, path, headers)
+            except connection_errors():
+                # The server closed the idle connection, which isn't
+                # worth a retry of its own
+                connection.close()
+
+        return self._send(key, self._connect(key), path, headers)
+
+    def _send(self, key, connection, path, headers):
+        try:
+            # Sending and waiting for the status line and headers, then
+            # downloading the body
+            with trace.span("http.request", host=key[1]):
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+            with trace.span("http.read"):
+                content = response.read()
+        except Exception:
+            connection.close()
+            raise
+
+        response_headers = dict((name.lower(), value) for name, value in response.getheaders())
+        if response_headers.get('content-encoding') == "gzip":
+            with trace.span("http.gunzip"):
+                content = zlib.decompress(content, 16 + zlib.MAX_WBITS)
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._checkin(key, connection)
+        return Response(response.status, response_headers, content)
+
+    def _connect(self, key):
+        try:
+            from http.client import HTTPConnection, HTTPSConnection
+        except ImportError:
+            from httplib import HTTPConnection, HTTPSConnection
+
+        scheme, host, port = key
+        connection_class = HTTPSConnection if scheme == "https" else HTTPConnection
+        connection = connection_class(host, port, timeout=self.connect_timeout)
+        # Resolving the host, the TCP handshake and TLS
+        with trace.span("http.connect", host=host):
+            connection.connect()
+        connection.sock.settimeout(self.read_timeout)
+        return connection
+
+    def _checkout(self, key):
+        with self._lock:
+            connections = self._idle.get(key)
+            if connections:
+                return connections.pop()
+        return None
+
+    def _checkin(self, key, connection):
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self.pool_size:
+                connections.append(connection)
+                return
+        connection.close()
+
+
+def split_url(url):
+    """
+    Returns the scheme, host, port and path (with the query) of url
+    """
+    scheme, _, rest = url.partition("://")
+    netloc, slash, path = rest.partition("/")
+    host, _, port = netloc.partition(":")
+    if port:
+        port = int(port)
+    else:
+        port = 443 if scheme == "https" else 80
+    return scheme, host, port, slash + path or "/"
+
+
+def connection_errors():
+    """
+    Exceptions of a failed connection, a timeout or a malformed response
+    """
+    try:
+        from http.client import HTTPException
+    except ImportError:
+        from httplib import HTTPException
+    return (IOError, OSError, HTTPException)
+
+
+def check_response(response):
+    """
+    Raises HTTPError unless response is a JSON answer from the API. Error
+    statuses below 500 pass, the API describes those in JSON.
+    """
+    if response.status_code >= 500:
+        raise HTTPError("The API answered with status {0}".format(response.status_code))
+    if response.content[:64].lstrip()[:1] not in (b"{", b"["):
+        raise HTTPError("The API answered with something other than JSON "
+                        "(status {0})".format(response.status_code))
+
+
+def conditional_headers(meta):
+    """
+    Returns the headers asking the server to only send the body when it
+    changed since the response meta was stored
+    """
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    return headers
+
+
+def validators(response):
+    """
+    Returns the validators of a response to store with it in the cache
+    """
+    meta = {}
+    if response.headers.get('etag'):
+        meta['etag'] = response.headers['etag']
+    if response.headers.get('last-modified'):
+        meta['last_modified'] = response.headers['last-modified']
+    return meta
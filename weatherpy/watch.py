@@ -0,0 +1,145 @@
+"""
+Watch mode: weatherpy stays running and refreshes its output every few
+seconds, for wall displays and spare terminals.
+
+Every tick renders the weather into a frame of lines, with responses
+coming from the cache and the warm transport like any other run, and
+only the lines that differ from the previous frame are rewritten in
+place with cursor addressing escapes.
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+HOME_AND_CLEAR = "\x1b[H\x1b[2J"
+MOVE_TO = "\x1b[%d;1H"
+CLEAR_LINE = "\x1b[K"
+CLEAR_BELOW = "\x1b[J"
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+
+
+class Frame(object):
+    """
+    A file-like object collecting what a printer writes, split into lines
+    """
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def flush(self):
+        pass
+
+    def lines(self):
+        text = "".join(self.parts)
+        if text.endswith("\n"):
+            text = text[:-1]
+        return text.split("\n") if text else []
+
+
+class Screen(object):
+    """
+    Remembers the lines on the terminal and works out the escapes that
+    turn them into the next frame
+    """
+    def __init__(self, width=None):
+        self.width = width
+        self.lines = None
+
+    def update(self, lines):
+        """
+        Returns what to write to the terminal to show lines, nothing when
+        they're already on it
+        """
+        if self.width:
+            lines = [line[:self.width] for line in lines]
+        if self.lines is None:
+            self.lines = lines
+            return HOME_AND_CLEAR + "".join(line + "\n" for line in lines)
+
+        parts = []
+        for row, line in enumerate(lines):
+            if row >= len(self.lines) or self.lines[row] != line:
+                parts.append(MOVE_TO % (row + 1) + line + CLEAR_LINE)
+        if len(lines) < len(self.lines):
+            parts.append(MOVE_TO % (len(lines) + 1) + CLEAR_BELOW)
+        elif parts:
+            # Leave the cursor under the frame, where the first draw did
+            parts.append(MOVE_TO % (len(lines) + 1))
+        self.lines = lines
+        return "".join(parts)
+
+
+def terminal_width(out):
+    """
+    Returns the width of the terminal out writes to, or None when it
+    isn't one. Lines are cut to it, a wrapped line would shift the rows.
+    """
+    if not hasattr(out, 'isatty') or not out.isatty():
+        return None
+    try:
+        from shutil import get_terminal_size
+    except ImportError:
+        return None
+    return get_terminal_size().columns
+
+
+class Watcher(object):
+    """
+    Runs weatherpy every interval seconds and redraws what changed
+    """
+    def __init__(self, args, settings, session, out=None, interval=None,
+                 sleep=time.sleep, clock=time.time):
+        self.args = args
+        self.settings = settings
+        self.session = session
+        self.out = out or sys.stdout
+        self.interval = interval or args.watch
+        self.sleep = sleep
+        self.clock = clock
+        self.screen = Screen(terminal_width(self.out))
+        self.last_frame = []
+
+    def render(self):
+        """
+        Returns the lines of one run, or of the last run that worked with
+        the reason this one didn't underneath
+        """
+        from .weather import run
+
+        frame = Frame()
+        try:
+            run(self.args, self.settings, frame, frame, self.session)
+        except Exception as e:
+            # A display should ride out a flaky network instead of exiting
+            return self.last_frame + ["Could not refresh: {0}".format(
+                str(e) or e.__class__.__name__)]
+        self.last_frame = frame.lines()
+        return self.last_frame
+
+    def tick(self):
+        changes = self.screen.update(self.render())
+        if changes:
+            self.out.write(changes)
+            self.out.flush()
+
+    def run(self, ticks=None):
+        """
+        Redraws until interrupted, or for a number of ticks
+        """
+        self.out.write(HIDE_CURSOR)
+        try:
+            while ticks is None or ticks > 0:
+                started = self.clock()
+                self.tick()
+                if ticks is not None:
+                    ticks -= 1
+                    if not ticks:
+                        break
+                self.sleep(max(0, self.interval - (self.clock() - started)))
+        finally:
+            self.out.write(SHOW_CURSOR)
+            self.out.flush()
@@ -2,13 +2,22 @@
 # -*- encoding: utf-8 -*-
 from __future__ import print_function
 
-import argparse
 import sys
-import json
-import codecs
 import os
+import time
 from .types import *
 from .settings import Settings, WEATHER_CONF_FILE
+from .cache import ResponseCache, CacheEntry, DAEMON_SOCKET
+from .decoding import decode_response
+from .providers import get_provider, ProviderError, Wunderground, PROVIDERS
+from .locations import (LocationIndex, LocationError, resolve as resolve_location,
+                        learn as learn_location)
+from .formatting import (FORMAT_STRINGS, format_temperature, format_degree,
+                         format_wind, format_windspeed, format_hour, format_date)
+from . import formatting
+from . import trace
+from .table import render_table
+from . import batch
 
 
 class ResultPrinter(object):
@@ -26,6 +35,7 @@ class ResultPrinter(object):
             else:
                 # Wrap sys.stdout in a utf8 stream writer in case output
                 # is piped
+                import codecs
                 self.out = codecs.getwriter('utf8')(sys.stdout)
 
         if not self.settings:
@@ -35,6 +45,7 @@ class ResultPrinter(object):
         # convert bytes (python 3) or unicode (python 2) to str
         print(msg, file=self.out)
 
+    @trace.traced("print.alerts")
     def print_alerts(self, data):
         """
         Prints any weather alerts in red
@@ -45,6 +56,25 @@ class ResultPrinter(object):
         for alert in data['alerts']:
             self._print("\033[91m" + alert['message'].rstrip("\n") + "\nExpires: " + alert['expires'] + "\033[0m")
 
+    @trace.traced("print.alerts")
+    def print_alert_changes(self, data, changes):
+        """
+        Prints the alerts that are new or changed since the last run in
+        red, and the ones that expired. Returns False when there are none.
+        """
+        from .alerts import NEW, EXPIRED
+
+        name = data['current_observation']['display_location']['full']
+        for kind, alert in changes:
+            if kind == EXPIRED:
+                self._print("Expired alert for {0}: {1}".format(name, alert['description']))
+                continue
+            self._print("{0} alert for {1}: {2}".format(
+                "New" if kind == NEW else "Updated", name, alert['description']))
+            self._print("\033[91m" + alert['message'].rstrip("\n") + "\nExpires: " + alert['expires'] + "\033[0m")
+        return bool(changes)
+
+    @trace.traced("print.conditions")
     def print_conditions(self, data):
         """
         Prints the current weather conditions
@@ -61,45 +91,71 @@ class ResultPrinter(object):
         self._print("Wind: {0}".format(data['wind_string']))
         self._print("Humidity: {0}".format(data['relative_humidity']))
 
+    @trace.traced("print.hourly")
     def print_hourly(self, data):
         """
-        Prints the hourly weather data in a table
+        Prints a list of HourlyPoints in a table
         """
-        # Need to generate an array to send the print_table, first row must be the keys
-        val = []
-        val.append(["Date", "Hour", "Temperature", "Chance of Rain", "Weather"])
+        units = self.settings.units
+        columns = [
+            formatting.format_dates(data, self.settings.date),
+            formatting.format_hours(data, self.settings.time),
+            formatting.format_temperatures(
+                formatting.temperature_column(data, 'temp_f', 'temp_c', units), units),
+            formatting.format_percents([point.pop for point in data]),
+            [point.condition for point in data],
+        ]
 
-        for item in data:
-            time = format_hour(item["FCTTIME"], self.settings.time)
-            date = format_date(item["FCTTIME"], self.settings.date)
-            temp = format_degree(item["temp"], self.settings.units)
-            val.append([date, time, temp, item["pop"] + "%", item['condition']])
+        # Need to generate an array to send the print_table, first row must be the keys
+        val = [["Date", "Hour", "Temperature", "Chance of Rain", "Weather"]]
+        val.extend(zip(*columns))
 
         self._print("36 Hour Hourly Forecast:")
         self._print_table(val)
 
+    @trace.traced("print.forecast")
     def print_forecast(self, data):
         """
-        Prints the forcast data in a table
+        Prints a list of ForecastDays in a table
         """
-        unit = self.settings.units
-        val = []
+        units = self.settings.units
+        highs = formatting.format_temperatures(
+            formatting.temperature_column(data, 'high_f', 'high_c', units), units)
+        lows = formatting.format_temperatures(
+            formatting.temperature_column(data, 'low_f', 'low_c', units), units)
+        columns = [
+            formatting.format_dates(data, self.settings.date),
+            [day.conditions for day in data],
+            formatting.format_percents([day.pop for day in data]),
+            [u"{0} / {1}".format(high, low) for high, low in zip(highs, lows)],
+            formatting.format_winds(formatting.windspeed_column(data, units),
+                                    [day.wind_dir for day in data], units),
+            formatting.format_percents([day.humidity for day in data]),
+        ]
+
         # Need to generate an array to send the print_table, first row must be the keys
-        val.append(["Date", "Condition", "Chance of Rain", "Temp (Hi/Lo)", "Wind", "Humidity"])
+        val = [["Date", "Condition", "Chance of Rain", "Temp (Hi/Lo)", "Wind", "Humidity"]]
+        val.extend(zip(*columns))
 
-        for item in data:
-            date = item['date']
-            date_str = format_date(date, self.settings.date)
-            temp = u"{0} / {1}".format(format_degree(item['high'], unit),
-                                       format_degree(item['low'], unit))
-            wind = format_windspeed(item['avewind'], unit)
+        self._print("Weather Forecast:")
+        self._print_table(val)
 
-            hum = str(item["avehumidity"]) + "%"
-            val.append([date_str, item['conditions'], str(item["pop"]) + "%", temp, wind, hum])
+    def print_errors(self, data):
+        return print_response_errors(data, self.out)
 
-        print("Weather Forecast:")
-        self._print_table(val)
+    def start_location(self, location):
+        """
+        Heads the sections of one location of a batch with its query
+        """
+        self._print("==> {0} <==".format(location))
+
+    def end_section(self):
+        self._print("")
 
+    def close(self):
+        pass
+
+    @trace.traced("print.table")
     def _print_table(self, table):
         """
         Aligns and prints an array into a formatted table
@@ -107,140 +163,156 @@ class ResultPrinter(object):
         Requires that the first row in the array contain the column names
         and that each row contains the same number of elements
         """
-        max_col_widths = []
-        for col in range(len(table[0])):
-            max_col_widths.append(self._get_max_col_width(table, col))
-
-        self.out.write((table[0][0].ljust(max_col_widths[0] + 1)))
-        for i in range(1, len(table[0])):
-            col = table[0][i].rjust(max_col_widths[i] + 2)
-            self.out.write(col)
-
-        self._print("")
-        self._print("-" * (sum(max_col_widths) + 3 * len(max_col_widths)))
+        self.out.write(render_table(table))
 
-        table.pop(0)
-        for row in table:
-            self.out.write(row[0].ljust(max_col_widths[0] + 1))
-            for i in range(1, len(row)):
-                col = row[i].rjust(max_col_widths[i] + 2)
-                self.out.write(col)
-
-            self._print("")
-
-    def _get_max_col_width(self, table, column_index):
-        """
-        Returns the length of the longest string in any column
-        """
-        return max([len(row[column_index]) for row in table])
 
+def make_printer(args, settings, out=None, location=None):
+    """
+    Returns the printer for the output format asked for by the program
+    arguments. Records are attributed to location, by default the one
+    given on the command line.
+    """
+    output_format = getattr(args, 'format', "text")
+    if output_format == "text":
+        return ResultPrinter(out=out, settings=settings)
 
-FORMAT_STRINGS = {
-    'windspeed': "~{0:2}{1} {2:3}",
-    'date': "{0} {1:3}",
-    'temp': u"{0:3}\u00B0{1:1}",
-    'military': u"{0}:{1}",
-}
+    from .output import make_record_printer
+    if location is None:
+        location = " ".join(args.location) or None
+    return make_record_printer(output_format, out or sys.stdout, location)
 
 
-def format_degree(temp_dict, unit):
+def print_response_errors(data, out=None):
     """
-    Takes a dictionary from the Weather underground api
-    and returns a formatted temperature string ex: "62 °F", "25 °C"
+    Prints the error or the list of ambiguous matches the API returned
+    instead of weather data. Returns True if there was one.
     """
-    symbol = "C" if unit == Units.METRIC else "F"
-
-    temp = temp_dict.get('fahrenheit') or temp_dict.get('english')
-    if unit == Units.METRIC:
-        temp = temp_dict.get('celsius') or temp_dict.get('metric')
+    if 'error' in data['response']:
+        print(data['response']['error']['description'], file=out)
+        return True
 
-    # For whatever reason, weather underground returns temps
-    # as both strings and ints
-    return FORMAT_STRINGS['temp'].format(str(temp), symbol)
+    if 'results' in data['response']:
+        print("More than 1 city matched your query, try being more specific "
+              "or pick one with --pick N", file=out)
+        for number, result in enumerate(data['response']['results'], 1):
+            print("{0}: {1}, {2} {3}".format(number, result['name'], result['state'],
+                                             result['country_name']), file=out)
+        return True
+    return False
 
 
-def format_windspeed(windspeed_dict, unit):
+def get_sections(args, settings=None):
     """
-    Returns a formatted windspeed, for example,
-    >>>format_windspeed({
-            'kph': 04,
-            'mph': 02,
-            'dir': NW,
-       }, Units.ENGLISH)
-    >>>'~02mph NW
+    Returns the sections to print as (required keys, print function)
+    pairs, in the order they are printed. A print function returning
+    False printed nothing and isn't followed by a section break.
     """
-    direction = Direction.shorthand(windspeed_dict['dir'])
-    idx = 'kph' if unit == Units.METRIC else 'mph'
-    return FORMAT_STRINGS['windspeed'].format(str(windspeed_dict[idx]), idx,
-                                              direction)
+    sections = []
+    if getattr(args, 'alerts_since_last', False):
+        sections.append((('alerts', 'current_observation'),
+                         lambda printer, data: printer.print_alert_changes(
+                             data, track_alerts(settings, data))))
+    elif args.alerts:
+        sections.append((('alerts', 'current_observation'),
+                         lambda printer, data: printer.print_alerts(data)))
+    if args.now:
+        sections.append((('current_observation',),
+                         lambda printer, data: printer.print_conditions(data['current_observation'])))
+    if args.hourly:
+        sections.append((('hourly',),
+                         lambda printer, data: printer.print_hourly(data['hourly'])))
+    if args.forecast or args.extended:
+        sections.append((('forecast',),
+                         lambda printer, data: printer.print_forecast(data['forecast'])))
+    return sections
 
 
-def format_hour(time_dict, time_format):
-    if time_format == TimeFormats.MILITARY:
-        return FORMAT_STRINGS['military'].format(time_dict['hour_padded'],
-                                                 time_dict['min'])
-    else:
-        return time_dict['civil']
+def track_alerts(settings, data):
+    """
+    Returns the alerts of a normalized response that are new, changed or
+    expired since its location was last tracked, see alerts.track
+    """
+    from . import alerts
+    return alerts.track(settings, get_provider(settings), data)
 
 
-def format_date(date, date_format):
+def print_weather_data(data, args, settings, out=None, printer=None):
     """
-    Returns a date string, 'April 2' for example
+    Prints the supplied weather data, a response body or a CacheEntry, as
+    specified by the options and program arguments. Returns the normalized data.
     """
-    if date_format == DateFormats.DATE or 'weekday_short' not in date:
-        if 'monthname' in date:
-            return FORMAT_STRINGS['date'].format(str(date['monthname']), str(date['day']))
-        else:
-            return FORMAT_STRINGS['date'].format(str(date['mon_abbrev']), str(date['mday']))
-    else:
-        return date['weekday_short']
+    provider = get_provider(settings)
+    if not isinstance(data, CacheEntry):
+        data = CacheEntry(data, {})
+    data = decode_entry(data, provider, provider.response_paths(args))
+    render_weather_data(data, args, settings, out, printer)
+    return data
 
 
-def print_weather_data(data, args, settings):
+def render_weather_data(data, args, settings, out=None, printer=None):
     """
-    Prints the supplied weather data as specified by the options and program arguments.
+    Prints an already decoded and normalized response as specified by
+    the options and program arguments. Without a printer, one for the
+    output format is made and closed.
     """
-    data = json.loads(data.decode('utf-8'))
+    close = printer is None
+    if close:
+        printer = make_printer(args, settings, out)
 
-    if 'error' in data['response']:
-        print(data['response']['error']['description'])
-        return
+    if not printer.print_errors(data):
+        for _, print_section in get_sections(args, settings):
+            if print_section(printer, data) is not False:
+                printer.end_section()
 
-    if 'results' in data['response']:
-        print("More than 1 city matched your query, try being more specific")
-        for result in data['response']['results']:
-            print("{0}, {1} {2}".format(result['name'], result['state'],
-                                        result['country_name']))
-        return
+    if close:
+        printer.close()
 
-    result_printer = ResultPrinter(settings=settings)
-    if args.alerts:
-        result_printer.print_alerts(data)
-        print("")
-    if args.now:
-        result_printer.print_conditions(data['current_observation'])
-        print("")
-    if args.hourly:
-        result_printer.print_hourly(data['hourly_forecast'])
-        print("")
-    if args.forecast or args.extended:
-        result_printer.print_forecast(data['forecast']['simpleforecast']['forecastday'])
-        print("")
 
+def print_split_weather_data(payloads, args, settings, out=None, printer=None):
+    """
+    Prints weather data that was fetched with one request per feature.
 
-def make_query_path(args):
+    The payloads, response bodies or CacheEntries, are consumed in the
+    order of make_features and each
+    section is printed as soon as the payloads it needs have arrived, so
+    the conditions show up while the forecasts are still downloading.
+    Returns the normalized data of every payload merged.
     """
-    Returns a path to use against the weather underground API
+    close = printer is None
+    if close:
+        printer = make_printer(args, settings, out)
+    try:
+        sections = get_sections(args, settings)
+        provider = get_provider(settings)
+        paths = provider.response_paths(args)
+        merged = {}
+        for data in payloads:
+            if isinstance(data, batch.FetchError):
+                raise data.exception
+
+            if not isinstance(data, CacheEntry):
+                data = CacheEntry(data, {})
+            data = decode_entry(data, provider, paths)
+            if printer.print_errors(data):
+                return data
+            merged.update(data)
+
+            while sections and all(key in merged for key in sections[0][0]):
+                _, print_section = sections.pop(0)
+                if print_section(printer, merged) is not False:
+                    printer.end_section()
+        return merged
+    finally:
+        if close:
+            printer.close()
+
+
+def make_features(args):
+    """
+    Returns the weather underground features to request, in order,
     by parsing program arguments.
     """
-    query = ""
-
-    paths = {
-        "now": "conditions/alerts/",
-        "forecast": "forecast/",
-        "extended": "forecast10day/",
-        "hourly": "hourly/",
-    }
+    features = []
 
     # In the case no options are set, use the default
     if not (args.now or args.hourly or args.alerts or args.forecast or
@@ -248,36 +320,54 @@ def make_query_path(args):
         args.now = True
 
     if args.now or args.alerts:
-        query += paths['now']
+        features += ["conditions", "alerts"]
     if args.hourly:
-        query += paths['hourly']
+        features.append("hourly")
     if args.forecast:
-        query += paths['forecast']
+        features.append("forecast")
     if args.extended:
-        query += paths['extended']
-    return query
+        features.append("forecast10day")
+    return features
 
 
-def make_api_url(args, settings):
+def make_query_path(args, features=None):
     """
-    Returns a url to the weather underground API endpoint by parsing
-    program arguments.
+    Returns a path to use against the weather underground API
+    by parsing program arguments.
     """
-    base_url="http://api.wunderground.com/api/%s/" % settings.api_key
+    if features is None:
+        features = make_features(args)
+    return Wunderground.query_path(features)
 
-    # Create a location string, or use autoip
-    query="q/%s.json"
-    if args.location:
-        query = query % "_".join(args.location);
-    else:
-        query = query % "autoip"
 
-    return base_url + make_query_path(args) + query
+def make_api_url(args, settings, location=None, features=None):
+    """
+    Returns a url to the API endpoint of the configured provider by
+    parsing program arguments. The location defaults to the one given on
+    the command line and the features to every one the arguments ask for.
+    """
+    with trace.span("make_api_url"):
+        if features is None:
+            features = make_features(args)
+        if location is None and args.location:
+            location = " ".join(args.location)
+        return get_provider(settings).make_api_url(settings, location, features)
+
+
+def make_feature_urls(args, settings, location=None):
+    """
+    Returns one API url per requested feature, in the order of make_features
+    """
+    return [make_api_url(args, settings, location, [feature])
+            for feature in make_features(args)]
 
 
-def parse_args():
-    parser = argparse.ArgumentParser(description="Display the current weather, or forecast")
-    parser.add_argument('location', nargs='*', help='Optional location, by default uses geoip')
+def add_report_arguments(parser, default_format="text"):
+    """
+    Adds the arguments choosing what weather is fetched and how it's
+    printed, shared by weatherpy and its fleet subcommand
+    """
+    from .output import FORMATS
 
     parser.add_argument('-n', '--now', help='Get the current conditions (Default)',
                         action='store_true')
@@ -289,24 +379,415 @@ def parse_args():
                         action='store_true')
     parser.add_argument('-a', '--alerts', help='View any current weather alerts',
                         action='store_true')
+    parser.add_argument('--alerts-since-last', help='Only show the alerts that are new, changed '
+                                                    'or expired since the last time',
+                        action='store_true')
     parser.add_argument('-t', '--time', choices=TimeFormats.to_array(),
                         help='Set time format to use (default is \'civilian\')')
     parser.add_argument('-d', '--date', choices=DateFormats.to_array(),
                         help='Set date format to use (default is \'date\')')
     parser.add_argument('-u', '--units', choices=Units.to_array(),
                         help='Set units to use (default is \'english\')')
-    return parser.parse_args()
+    parser.add_argument('--provider', choices=sorted(PROVIDERS),
+                        help='Weather service to use (default is \'wunderground\')')
+    parser.add_argument('--format', choices=FORMATS, default=default_format,
+                        help='Print aligned text or the records as JSON, JSON Lines or CSV '
+                             '(default is \'{0}\')'.format(default_format))
+    parser.add_argument('--max-age', type=int, metavar='SECONDS',
+                        help='Accept cached results up to this many seconds old')
+    parser.add_argument('--no-cache', help='Always fetch fresh results from the API',
+                        action='store_true')
+
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="weatherpy",
+                                     description="Display the current weather, or forecast")
+    parser.add_argument('location', nargs='*', help='Optional location, by default uses geoip')
+    add_report_arguments(parser)
+    parser.add_argument('--pick', type=int, metavar='N',
+                        help='Use match N of an earlier query that matched more than one city')
+    parser.add_argument('-s', '--split', help='Fetch every feature with its own request, in parallel',
+                        action='store_true')
+    parser.add_argument('-b', '--batch', help='Treat every location as a separate query',
+                        action='store_true')
+    parser.add_argument('--locations-file', metavar='FILE',
+                        help='Query every location listed in FILE, one per line')
+    parser.add_argument('--workers', type=int, default=batch.DEFAULT_WORKERS,
+                        help='Number of locations to fetch at once in batch mode')
+    parser.add_argument('--daemon', help='Serve requests from other weatherpy calls over a local socket',
+                        action='store_true')
+    parser.add_argument('--prefetch', help='Keep the locations on the .weatherrc watch list fresh in the cache',
+                        action='store_true')
+    parser.add_argument('--no-daemon', help='Don\'t hand the request to a running daemon',
+                        action='store_true')
+    parser.add_argument('--quota', help='Show how much of the API key quota has been used',
+                        action='store_true')
+    parser.add_argument('--watch', type=float, metavar='SECONDS',
+                        help='Keep running, redrawing what changed every SECONDS')
+    parser.add_argument('--profile', help='Print how long each step of the run took on stderr',
+                        action='store_true')
+    args = parser.parse_args(argv)
+    if args.alerts_since_last:
+        args.alerts = True
+    if args.watch is not None:
+        if args.watch <= 0:
+            parser.error("--watch needs a number of seconds above 0")
+        if args.format != "text":
+            parser.error("--watch only redraws --format text")
+    return args
+
+
+def describe_age(seconds):
+    """
+    Returns how long ago something happened, in words
+    """
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "less than a minute ago"
+    if minutes < 120:
+        return "{0} minute{1} ago".format(minutes, "" if minutes == 1 else "s")
+    return "{0} hours ago".format(minutes // 60)
+
+
+def note_stale(age, reason, err=None):
+    """
+    Tells the user the weather shown is age seconds old, and why
+    """
+    print("weatherpy: {0}, showing weather from {1}".format(reason, describe_age(age)),
+          file=err or sys.stderr)
+
+
+def _serve_stale(entry, reason, err):
+    note_stale(entry.age, reason, err)
+    return CacheEntry(entry.body, dict(entry.meta, stale=True), entry.records)
+
+
+def pack_records(provider, body):
+    """
+    Returns the normalized response in body packed for the cache, or None
+    when it has no hourly or daily records, the part worth packing
+    """
+    from .packing import pack_response
+    from .decoding import loads
+
+    try:
+        data = provider.normalize(loads(body))
+        if 'hourly' not in data and 'forecast' not in data:
+            return None
+        return pack_response(data)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        # The body is still cached, it's only decoded the slow way
+        return None
+
+
+def decode_entry(entry, provider, paths=None):
+    """
+    Returns the normalized response of a CacheEntry, unpacked from its
+    records when the cache has them, which is faster than decoding the
+    body. Records hold the whole response, not only the subtrees at paths.
+    """
+    if entry.records is not None:
+        from .packing import unpack_response
+        try:
+            with trace.span("unpack", bytes=len(entry.records)):
+                return unpack_response(entry.records)
+        except ValueError:
+            pass
+    data = decode_response(entry.body, paths)
+    with trace.span("normalize"):
+        return provider.normalize(data)
+
+
+@trace.traced("fetch")
+def fetch_response(api_url, args, settings, session=None, err=None, revalidate=None,
+                   stale_window=None):
+    """
+    Returns a CacheEntry with the API response for api_url, from the
+    response cache when a fresh enough copy is stored there. A stale copy
+    is revalidated with a conditional request, so the body is only
+    downloaded again when it changed. Requests are spent from the API
+    key quota; when it's used up a stale copy is returned unless
+    args.no_cache is set, otherwise the call waits for the quota and
+    raises QuotaError if that takes too long.
+
+    A copy that expired less than stale_window seconds ago (the
+    stale_window setting by default) is returned right away and
+    revalidate(api_url) is called to refresh it, by default in a detached
+    process. When the API can't be reached or answers with an error, a
+    stale copy is returned too, unless args.no_cache is set. Stale copies
+    have 'stale' in their meta and are noted on err, stderr by default.
+
+    :param session: optional transport to reuse connections from
+    """
+    from .transport import (Transport, conditional_headers, validators, check_response,
+                            connection_errors)
+    from .quota import Quota
+
+    cache = ResponseCache.from_settings(settings)
+    max_age = cache.ttl_for(api_url) if args.max_age is None else args.max_age
+    if stale_window is None:
+        stale_window = settings.get('stale_window') or 0
+    entry = cache.lookup(api_url)
+    if entry is not None and not args.no_cache:
+        if entry.age <= max_age:
+            return entry
+        if entry.age <= max_age + stale_window:
+            # Answer now, a later run finds the refreshed response
+            if revalidate is None:
+                from .refresh import spawn
+                revalidate = lambda url: spawn([url], settings)
+            revalidate(api_url)
+            return _serve_stale(entry, "refreshing it in the background", err)
+
+    # The request is spent before taking the fetch lock, so waiting for
+    # the quota never holds up other processes waiting on this url
+    provider = get_provider(settings)
+    quota = Quota.from_settings(settings, provider)
+    budget = None
+    if quota is not None:
+        budget = quota.take()
+        if budget is None:
+            if entry is not None and not args.no_cache:
+                # Out of requests, an old response beats none
+                return _serve_stale(entry, "the API quota is used up", err)
+            budget = quota.acquire()
+
+    # Only one process fetches a url at a time, the ones that waited for
+    # it use the response it stored
+    started = time.time()
+    with cache.fetch_lock(api_url):
+        latest = cache.lookup(api_url)
+        if latest is not None:
+            if latest.stored_at >= started or (not args.no_cache and latest.age <= max_age):
+                if budget is not None:
+                    quota.refund(budget)
+                return latest
+            entry = latest
+
+        if session is None:
+            session = Transport.from_settings(settings)
+        headers = conditional_headers(entry.meta) if entry is not None else {}
+        api_key = budget.key if budget is not None else None
+        try:
+            r = session.get(provider.request_url(settings, api_url, api_key), headers=headers)
+            if r.status_code != 304:
+                check_response(r)
+        except connection_errors() as e:
+            if entry is None or args.no_cache:
+                raise
+            # Offline, or the API is down
+            return _serve_stale(entry, "could not reach the API ({0})".format(
+                str(e) or e.__class__.__name__), err)
+
+        if r.status_code == 304 and entry is not None:
+            # Not modified, the stored body is current again
+            meta = dict((key, entry.meta[key]) for key in ('etag', 'last_modified')
+                        if key in entry.meta)
+            meta.update(validators(r))
+            cache.put(api_url, entry.body, entry.records, **meta)
+            return CacheEntry(entry.body, dict(meta, stored_at=time.time()), entry.records)
+        if r.status_code == 200:
+            records = pack_records(provider, r.content)
+            cache.put(api_url, r.content, records, **validators(r))
+            return CacheEntry(r.content, {'stored_at': time.time()}, records)
+        return CacheEntry(r.content, {'stored_at': time.time()})
+
+
+def fetch_weather_data(api_url, args, settings, session=None, err=None):
+    """
+    Returns the API response body for api_url, see fetch_response
+    """
+    return fetch_response(api_url, args, settings, session, err).body
+
+
+def get_batch_locations(args):
+    """
+    Returns the list of locations to query in batch mode, or None when
+    a single location was asked for.
+    """
+    if args.locations_file:
+        return batch.read_locations(args.locations_file) + list(args.location)
+    if args.batch and args.location:
+        return list(args.location)
+    return None
+
+
+def print_batch(locations, args, settings, out=None, err=None, session=None, printer=None):
+    """
+    Fetches every location concurrently and prints their weather in
+    the order they were given. Failures are reported on err (stderr by
+    default) and don't stop the batch.
+    """
+    if err is None:
+        err = sys.stderr
+    if printer is None:
+        printer = make_printer(args, settings, out)
+
+    provider = get_provider(settings)
+    index = LocationIndex.from_settings(settings)
+    resolved = [resolve_location(provider, index, location) for location in locations]
+    if args.split:
+        urls_per_location = [make_feature_urls(args, settings, location)
+                             for location, _ in resolved]
+    else:
+        urls_per_location = [[make_api_url(args, settings, location)]
+                             for location, _ in resolved]
+
+    if session is None:
+        from .transport import Transport
+        session = Transport.from_settings(settings, args.workers)
+
+    def fetch(url):
+        return fetch_response(url, args, settings, session, err)
+
+    urls = [url for location_urls in urls_per_location for url in location_urls]
+    results = batch.fetch_all(urls, fetch, args.workers)
+    for location, (_, known), location_urls in zip(locations, resolved, urls_per_location):
+        payloads = [next(results) for _ in location_urls]
+        errors = [data for data in payloads if isinstance(data, batch.FetchError)]
+        if errors:
+            print("Could not fetch {0}: {1}".format(location, errors[0]), file=err)
+            continue
+        printer.start_location(location)
+        try:
+            if args.split:
+                data = print_split_weather_data(payloads, args, settings, out, printer)
+            else:
+                data = print_weather_data(payloads[0], args, settings, out, printer)
+        except (ValueError, KeyError, TypeError) as e:
+            print("Could not print {0}: {1}".format(location, e), file=err)
+            continue
+        if not known:
+            learn_location(provider, index, location, data)
+        record_history(settings, provider, location, data)
+
+
+def print_split(args, settings, location=None, out=None, session=None, printer=None,
+                err=None):
+    """
+    Fetches every requested feature in parallel and prints each section
+    as soon as its data is in. Returns the normalized data.
+    """
+    urls = make_feature_urls(args, settings, location)
+    if session is None:
+        from .transport import Transport
+        session = Transport.from_settings(settings, len(urls))
+
+    def fetch(url):
+        return fetch_response(url, args, settings, session, err)
+
+    return print_split_weather_data(batch.fetch_all(urls, fetch, len(urls)), args,
+                                    settings, out, printer)
+
+
+def record_history(settings, provider, location, data):
+    """
+    Appends the conditions and hourly forecast of a normalized response to
+    the location's history, when the history setting turns it on
+    """
+    if not settings.get('history'):
+        return
+    from .history import HistoryStore
+    from .locations import location_key
+    try:
+        HistoryStore.from_settings(settings).record(location_key(provider, location), data)
+    except (IOError, OSError):
+        # The weather was printed, a missed history row isn't worth failing over
+        pass
+
+
+def run(args, settings, out=None, err=None, session=None):
+    """
+    Fetches and prints the weather asked for by the program arguments
+    """
+    # One printer for the whole run, so a JSON array spans every location
+    printer = make_printer(args, settings, out)
+    try:
+        locations = get_batch_locations(args)
+        if locations is not None:
+            print_batch(locations, args, settings, out, err, session, printer)
+            return
+
+        provider = get_provider(settings)
+        index = LocationIndex.from_settings(settings)
+        query = " ".join(args.location) or None
+        location, known = resolve_location(provider, index, query, args.pick)
+        if args.split:
+            data = print_split(args, settings, location, out, session, printer, err)
+        else:
+            api_url = make_api_url(args, settings, location)
+            entry = fetch_response(api_url, args, settings, session, err)
+            data = print_weather_data(entry, args, settings, out, printer)
+        if not known:
+            learn_location(provider, index, query, data)
+        record_history(settings, provider, query, data)
+    finally:
+        printer.close()
 
 
 def main():
-    import requests
+    if sys.argv[1:2] == ["history"]:
+        from . import history
+        history.main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["fleet"]:
+        from . import fleet
+        fleet.main(sys.argv[2:])
+        return
+
     args = parse_args()
-    settings = Settings(args)
-    api_url = make_api_url(args, settings)
-    r = requests.get(api_url)
-    print_weather_data(r.content, args, settings)
+    if args.daemon:
+        from . import daemon
+        daemon.serve()
+        return
+
+    if args.prefetch:
+        from .prefetch import PrefetchScheduler
+        from .transport import Transport
+        try:
+            settings = Settings(args)
+            PrefetchScheduler(settings, Transport.from_settings(settings)).run()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.quota:
+        from .quota import print_report
+        print_report(Settings(args), sys.stdout)
+        return
+
+    if args.watch:
+        from .watch import Watcher
+        from .transport import Transport
+        try:
+            settings = Settings(args)
+            Watcher(args, settings, Transport.from_settings(settings, args.workers)).run()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    # A trace file is of this process, so the request isn't handed to a
+    # daemon. With --profile the daemon sends its own timings back.
+    trace_path = trace.trace_path()
+    if not args.no_daemon and not trace_path and os.path.exists(os.path.expanduser(DAEMON_SOCKET)):
+        from . import daemon
+        if daemon.forward(args):
+            return
+
+    if args.profile or trace_path:
+        trace.start(keep_events=trace_path is not None)
+
+    from .quota import QuotaError
+    try:
+        run(args, Settings(args))
+    except (ProviderError, LocationError, QuotaError, IOError) as e:
+        # IOError covers the network being down with nothing cached to show
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        trace.finish(args.profile, trace_path, sys.stderr)
 
 
 if __name__ == "__main__":
     main()
-